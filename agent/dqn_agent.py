@@ -1,13 +1,17 @@
 """DQN agent with target network, replay buffer, and gradient-based updates."""
 
 import random
-from collections import deque
-from typing import Any, Deque, Iterable, List, Tuple
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional
 
+import numpy as np
 import torch
 import torch.nn as nn
 import torch.optim as optim
 
+from agent.replay_buffer import PrioritizedReplayBuffer, ReplayBuffer
+
 
 class DQNNetwork(nn.Module):
     def __init__(self, input_dim: int, output_dim: int, hidden: int = 64):
@@ -36,16 +40,36 @@ class DQNAgent:
         target_sync: int = 10,
         grad_clip: float = 1.0,
         input_dim: int = 3,
+        train_every: int = 1,
+        steps_per_interval: int = 1,
+        prioritized: bool = False,
+        alpha: float = 0.6,
+        beta: float = 0.4,
+        beta_steps: int = 5000,
     ):
+        """
+        train_every: one gradient step per `train_every` stored transitions (0: none)
+        steps_per_interval: gradient steps run by end_interval()
+        prioritized: sample by TD-error priority (alpha) with importance weights whose
+            exponent anneals from beta to 1 over beta_steps gradient steps
+        Call start_background() to run the scheduled steps on a worker thread.
+        """
         self.action_space = list(action_space)
         self.action_to_idx = {a: i for i, a in enumerate(self.action_space)}
+        self.input_dim = input_dim
         self.epsilon_scheduler = epsilon_scheduler
-        self.replay_buffer: Deque[Tuple[Any, str, float, Any, bool]] = deque(maxlen=replay_capacity)
         self.minibatch_size = minibatch_size
         self.gamma = gamma
         self.grad_clip = grad_clip
         self.target_sync = target_sync
         self.device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+        self.prioritized = prioritized
+        self.beta = beta
+        self.beta_steps = max(1, beta_steps)
+        if prioritized:
+            self.replay_buffer = PrioritizedReplayBuffer(replay_capacity, input_dim, self.device, alpha=alpha)
+        else:
+            self.replay_buffer = ReplayBuffer(replay_capacity, input_dim, self.device)
 
         self.online_net = DQNNetwork(input_dim, len(self.action_space)).to(self.device)
         self.target_net = DQNNetwork(input_dim, len(self.action_space)).to(self.device)
@@ -54,6 +78,19 @@ class DQNAgent:
         self.loss_fn = nn.MSELoss()
 
         self.update_steps = 0
+        self.train_every = max(0, train_every)
+        self.steps_per_interval = max(0, steps_per_interval)
+        self.transitions = 0
+        self.train_seconds = 0.0
+        self._started_at = time.perf_counter()
+
+        # Background training: scheduled steps become credits a worker thread consumes
+        self._lock = threading.RLock()          # replay buffer + networks
+        self._work = threading.Condition()
+        self._pending_steps = 0
+        self._worker: Optional[threading.Thread] = None
+        self._stopping = False
+        self._sample_rng: Optional[random.Random] = None
 
     @property
     def epsilon(self) -> float:
@@ -61,14 +98,29 @@ class DQNAgent:
 
     def select_strategy(self, state_vector: Any) -> str:
         """Epsilon-greedy action selection."""
-        if random.random() < self.epsilon:
-            return random.choice(self.action_space)
+        return self.select_strategies([state_vector])[0]
 
-        state_tensor = self._to_tensor(state_vector).unsqueeze(0)  # [1, input_dim]
-        with torch.no_grad():
-            q_values = self.online_net(state_tensor)
-            action_idx = int(torch.argmax(q_values, dim=1).item())
-        return self.action_space[action_idx]
+    def select_strategies(self, state_matrix: Any, explore: bool = True) -> List[str]:
+        """Epsilon-greedy actions for stacked states [n, input_dim] in one forward pass.
+
+        Exploration is decided per row, drawing from `random` in the same order as
+        n calls to select_strategy. explore=False is pure greedy and draws nothing.
+        """
+        states = self._to_tensor(state_matrix).reshape(-1, self.input_dim)
+        actions: List[Optional[str]] = [None] * len(states)
+        if explore:
+            epsilon = self.epsilon
+            for row in range(len(states)):
+                if random.random() < epsilon:
+                    actions[row] = random.choice(self.action_space)
+        greedy = [row for row, action in enumerate(actions) if action is None]
+        if greedy:
+            with self._lock, torch.no_grad():
+                q_values = self.online_net(states[greedy] if len(greedy) < len(states) else states)
+                best = torch.argmax(q_values, dim=1).tolist()
+            for row, action_idx in zip(greedy, best):
+                actions[row] = self.action_space[action_idx]
+        return actions
 
     def store_experience(
         self,
@@ -78,24 +130,57 @@ class DQNAgent:
         next_state_vector: Any,
         done: bool = False,
     ) -> None:
-        self.replay_buffer.append((state_vector, action, reward, next_state_vector, done))
-        self.train_step()
+        with self._lock:
+            self.replay_buffer.push(state_vector, self.action_to_idx[action], reward, next_state_vector, done)
+        self.transitions += 1
+        if self.train_every and self.transitions % self.train_every == 0:
+            self._schedule(1)
 
-    def train_step(self) -> None:
-        if len(self.replay_buffer) < self.minibatch_size:
+    def store_experiences(self, states: Any, actions: List[str], rewards: Any,
+                          next_states: Any, dones: Any = None) -> None:
+        """Push a batch of transitions (e.g. one per WorkCenter and shop) at once"""
+        count = len(actions)
+        dones = [False] * count if dones is None else dones
+        with self._lock:
+            for state, action, reward, next_state, done in zip(states, actions, rewards, next_states, dones):
+                self.replay_buffer.push(state, self.action_to_idx[action], reward, next_state, done)
+        before, self.transitions = self.transitions, self.transitions + count
+        if self.train_every:
+            self._schedule(self.transitions // self.train_every - before // self.train_every)
+
+    def end_interval(self) -> None:
+        """Run (or, in the background, queue) the per-interval gradient steps"""
+        self._schedule(self.steps_per_interval)
+
+    def _schedule(self, steps: int) -> None:
+        if self._worker is None:
+            for _ in range(steps):
+                self.train_step()
             return
+        with self._work:
+            self._pending_steps += steps
+            self._work.notify()
 
-        batch = random.sample(self.replay_buffer, self.minibatch_size)
-        states, actions, rewards, next_states, dones = zip(*batch)
+    def train_step(self) -> None:
+        with self._lock:
+            if len(self.replay_buffer) < self.minibatch_size:
+                return
+            started = time.perf_counter()
+            self._update()
+            self.train_seconds += time.perf_counter() - started
 
-        state_batch = self._to_tensor(states)
-        next_state_batch = self._to_tensor(next_states)
-        reward_batch = torch.tensor(rewards, dtype=torch.float32, device=self.device)
-        done_batch = torch.tensor(dones, dtype=torch.float32, device=self.device)
+    def current_beta(self) -> float:
+        return min(1.0, self.beta + (1.0 - self.beta) * self.update_steps / self.beta_steps)
 
-        action_indices = torch.tensor(
-            [self.action_to_idx[a] for a in actions], dtype=torch.int64, device=self.device
-        )
+    def _update(self) -> None:
+        if self.prioritized:
+            slots, weights = self.replay_buffer.sample_prioritized(
+                self.minibatch_size, self.current_beta(), self._sample_rng)
+            state_batch, action_indices, reward_batch, next_state_batch, done_batch = \
+                self.replay_buffer.gather(slots)
+        else:
+            state_batch, action_indices, reward_batch, next_state_batch, done_batch = \
+                self.replay_buffer.sample(self.minibatch_size, self._sample_rng)
 
         # Q(s, a)
         q_values = self.online_net(state_batch).gather(1, action_indices.unsqueeze(1)).squeeze(1)
@@ -105,7 +190,12 @@ class DQNAgent:
             next_q_values = self.target_net(next_state_batch).max(dim=1)[0]
             targets = reward_batch + self.gamma * (1 - done_batch) * next_q_values
 
-        loss = self.loss_fn(q_values, targets)
+        if self.prioritized:
+            td_errors = targets - q_values
+            loss = (weights * td_errors.pow(2)).mean()
+            self.replay_buffer.update_priorities(slots, td_errors.detach().cpu().numpy())
+        else:
+            loss = self.loss_fn(q_values, targets)
 
         self.optimizer.zero_grad()
         loss.backward()
@@ -116,9 +206,56 @@ class DQNAgent:
         if self.update_steps % self.target_sync == 0:
             self.target_net.load_state_dict(self.online_net.state_dict())
 
+    # ------------------------------------------------------------------
+    # background training
+    # ------------------------------------------------------------------
+    def start_background(self, seed: Optional[int] = None) -> None:
+        """Consume scheduled gradient steps on a worker thread
+
+        The worker samples from its own random.Random(seed), so it never draws
+        from the simulation's random stream.
+        """
+        if self._worker is not None:
+            return
+        self._sample_rng = random.Random(seed)
+        self._stopping = False
+        self._worker = threading.Thread(target=self._background_loop, name="dqn-train", daemon=True)
+        self._worker.start()
+
+    def stop_background(self, drain: bool = True) -> None:
+        """Stop the worker; with drain, queued steps are run first"""
+        if self._worker is None:
+            return
+        with self._work:
+            if not drain:
+                self._pending_steps = 0
+            self._stopping = True
+            self._work.notify()
+        self._worker.join()
+        self._worker = None
+        self._sample_rng = None
+
+    def _background_loop(self) -> None:
+        while True:
+            with self._work:
+                while not self._pending_steps and not self._stopping:
+                    self._work.wait()
+                if not self._pending_steps:
+                    return
+                self._pending_steps -= 1
+            self.train_step()
+
+    def training_stats(self) -> Dict[str, float]:
+        """Gradient step counters: per second of training time and of wall time"""
+        elapsed = time.perf_counter() - self._started_at
+        return {
+            'grad_steps': self.update_steps,
+            'transitions': self.transitions,
+            'pending_steps': self._pending_steps,
+            'steps_per_second': self.update_steps / self.train_seconds if self.train_seconds else 0.0,
+            'wall_steps_per_second': self.update_steps / elapsed if elapsed else 0.0,
+        }
+
     def _to_tensor(self, state: Any) -> torch.Tensor:
-        """Convert state tuple(s) to a float32 tensor."""
-        if isinstance(state, (list, tuple)):
-            if len(state) > 0 and isinstance(state[0], (list, tuple, float, int)):
-                return torch.tensor(state, dtype=torch.float32, device=self.device)
-        return torch.tensor(state, dtype=torch.float32, device=self.device)
+        """Convert state vector(s) (tuples, lists of rows or arrays) to a float32 tensor."""
+        return torch.as_tensor(np.asarray(state, dtype=np.float32), device=self.device)
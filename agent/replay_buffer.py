@@ -0,0 +1,155 @@
+"""Preallocated ring-buffer storage for DQN transitions."""
+
+import random
+from typing import Any, Optional, Sequence, Tuple
+
+import numpy as np
+import torch
+
+
+class ReplayBuffer:
+    """Fixed-capacity transition store backed by contiguous arrays
+
+    States and next states are float32 [capacity, state_dim] arrays, rewards
+    and dones float32 [capacity], actions int64 indices [capacity]. Writes go
+    through a circular pointer; the tensors handed to train_step are zero-copy
+    torch views of those arrays, gathered with one index tensor per batch.
+
+    Logical order matches the deque this replaces (oldest first), and indices
+    are drawn with random.sample(range(n), k), so a seeded run samples the
+    same transitions and consumes the shared random stream as before.
+    """
+
+    def __init__(self, capacity: int, state_dim: int, device: torch.device = torch.device("cpu")):
+        self.capacity = max(1, capacity)
+        self.state_dim = state_dim
+        self.device = device
+        self.states = np.zeros((self.capacity, state_dim), dtype=np.float32)
+        self.next_states = np.zeros((self.capacity, state_dim), dtype=np.float32)
+        self.rewards = np.zeros(self.capacity, dtype=np.float32)
+        self.dones = np.zeros(self.capacity, dtype=np.float32)
+        self.actions = np.zeros(self.capacity, dtype=np.int64)
+        # Views share memory with the arrays above, so they never need rebuilding
+        self._views = tuple(torch.from_numpy(a) for a in (
+            self.states, self.actions, self.rewards, self.next_states, self.dones))
+        self.ptr = 0        # next slot to write
+        self.size = 0
+
+    def __len__(self) -> int:
+        return self.size
+
+    def push(self, state: Sequence[float], action: int, reward: float,
+             next_state: Sequence[float], done: bool = False):
+        i = self.ptr
+        self.states[i] = state
+        self.actions[i] = action
+        self.rewards[i] = reward
+        self.next_states[i] = next_state
+        self.dones[i] = done
+        self.ptr = (i + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+
+    def slots(self, logical: Any) -> np.ndarray:
+        """Array slots of logical positions (0 = oldest stored transition)"""
+        start = self.ptr if self.size == self.capacity else 0
+        return (np.asarray(logical, dtype=np.int64) + start) % self.capacity
+
+    def sample_indices(self, batch_size: int, rng: Optional[random.Random] = None) -> np.ndarray:
+        # rng None: the module-level stream, as the seeded synchronous path expects
+        return self.slots((rng or random).sample(range(self.size), batch_size))
+
+    def gather(self, slots: np.ndarray) -> Tuple[torch.Tensor, ...]:
+        """(states, actions, rewards, next_states, dones) tensors for the given slots"""
+        index = torch.from_numpy(slots)
+        return tuple(view.index_select(0, index).to(self.device) for view in self._views)
+
+    def sample(self, batch_size: int, rng: Optional[random.Random] = None) -> Tuple[torch.Tensor, ...]:
+        return self.gather(self.sample_indices(batch_size, rng))
+
+
+class SumTree:
+    """Binary sum tree over `capacity` leaf priorities
+
+    Leaves sit at [size, size + capacity) of one flat array (size = capacity
+    rounded up to a power of two), every inner node holds the sum of its two
+    children, so tree[1] is the total. Proportional lookups and updates walk
+    one root-to-leaf path, vectorized over a whole batch of leaves.
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = max(1, capacity)
+        self.size = 1 << (self.capacity - 1).bit_length()
+        self.tree = np.zeros(2 * self.size)
+
+    def total(self) -> float:
+        return float(self.tree[1])
+
+    def get(self, leaves: np.ndarray) -> np.ndarray:
+        return self.tree[self.size + leaves]
+
+    def update(self, leaves: np.ndarray, priorities: np.ndarray):
+        nodes = self.size + np.asarray(leaves, dtype=np.int64)
+        self.tree[nodes] = priorities
+        # All nodes share a level, so one check covers the batch
+        while nodes[0] > 1:
+            nodes = np.unique(nodes // 2)
+            self.tree[nodes] = self.tree[2 * nodes] + self.tree[2 * nodes + 1]
+
+    def find(self, mass: np.ndarray, filled: Optional[int] = None) -> np.ndarray:
+        """Leaf holding each cumulative priority value in mass (0 <= mass <= total)
+
+        Leaves from filled on hold no priority; rounding on the way down can
+        still step into them, so results are clamped to the last filled leaf.
+        """
+        mass = np.array(mass, dtype=np.float64)
+        nodes = np.ones(len(mass), dtype=np.int64)
+        while nodes[0] < self.size:
+            left = 2 * nodes
+            right = mass > self.tree[left]
+            mass -= np.where(right, self.tree[left], 0.0)
+            nodes = left + right
+        last = self.capacity if filled is None else max(1, min(filled, self.capacity))
+        return np.minimum(nodes - self.size, last - 1)
+
+
+class PrioritizedReplayBuffer(ReplayBuffer):
+    """ReplayBuffer with proportional prioritized sampling (Schaul et al.)
+
+    A transition is drawn with probability p_i^alpha / sum_k p_k^alpha, where
+    p_i is its last absolute TD error (plus eps); new transitions get the
+    largest priority seen so far so each is replayed at least once. The batch
+    comes with importance-sampling weights (N * P(i))^-beta / max_j w_j.
+    """
+
+    def __init__(self, capacity: int, state_dim: int, device: torch.device = torch.device("cpu"),
+                 alpha: float = 0.6, eps: float = 1e-3):
+        super().__init__(capacity, state_dim, device)
+        self.alpha = alpha
+        self.eps = eps
+        self.tree = SumTree(self.capacity)
+        self.max_priority = 1.0
+
+    def push(self, state: Sequence[float], action: int, reward: float,
+             next_state: Sequence[float], done: bool = False):
+        slot = self.ptr
+        super().push(state, action, reward, next_state, done)
+        self.tree.update(np.array([slot]), np.array([self.max_priority ** self.alpha]))
+
+    def sample_prioritized(self, batch_size: int, beta: float,
+                           rng: Optional[random.Random] = None) -> Tuple[np.ndarray, torch.Tensor]:
+        """(slots, importance weights) from one stratified draw per batch segment"""
+        rng = rng or random
+        total = self.tree.total()
+        segment = total / batch_size
+        mass = (np.arange(batch_size) + [rng.random() for _ in range(batch_size)]) * segment
+        slots = self.tree.find(np.minimum(mass, total), filled=self.size)
+        # Every filled slot has priority >= eps^alpha; the floor keeps a stray zero from giving inf weights
+        probs = np.maximum(self.tree.get(slots), self.eps ** self.alpha) / total
+        weights = (self.size * probs) ** -beta
+        weights /= weights.max()
+        return slots, torch.as_tensor(weights, dtype=torch.float32, device=self.device)
+
+    def update_priorities(self, slots: np.ndarray, td_errors: np.ndarray):
+        priorities = np.abs(td_errors) + self.eps
+        self.max_priority = max(self.max_priority, float(priorities.max()))
+        self.tree.update(slots, priorities ** self.alpha)
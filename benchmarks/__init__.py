@@ -0,0 +1,6 @@
+"""Benchmarks for the simulator; run the modules with `python -m benchmarks.<name>`.
+
+startup (main.py startup and torch imports), micro (per-decision hot paths),
+macro (simulation steps and training intervals) and compare (two JSON result
+files against each other).
+"""
@@ -0,0 +1,128 @@
+"""Shared pieces of the benchmark modules: layouts, shop setup, timing and JSON output."""
+
+import argparse
+import datetime
+import json
+import logging
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+from typing import Callable, Dict, List, Optional
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MAX_WORK_CENTERS = 50
+# Same matrix as the coordinator's default
+SETUP_TIME = [[0, 10, 15], [10, 0, 20], [15, 20, 0]]
+
+
+def parse_layout(text: str) -> List[int]:
+    """'2,3,2' (machines per WorkCenter) or '50x2' (50 WorkCenters of 2 machines)"""
+    try:
+        if 'x' in text:
+            count, machines = (int(part) for part in text.split('x'))
+            layout = [machines] * count
+        else:
+            layout = [int(part) for part in text.split(',') if part.strip()]
+    except ValueError as exc:
+        raise argparse.ArgumentTypeError(f"Bad layout '{text}', expected e.g. '2,3,2' or '10x2'") from exc
+    if not layout or any(m <= 0 for m in layout):
+        raise argparse.ArgumentTypeError(f"Bad layout '{text}': machine counts must be positive")
+    # Job routings visit WorkCenters 1-3, so smaller layouts cannot route jobs
+    if not 3 <= len(layout) <= MAX_WORK_CENTERS:
+        raise argparse.ArgumentTypeError(
+            f"Bad layout '{text}': between 3 and {MAX_WORK_CENTERS} WorkCenters are supported")
+    return layout
+
+
+def layout_name(layout: List[int]) -> str:
+    if len(layout) > 3 and len(set(layout)) == 1:
+        return f"{len(layout)}x{layout[0]}"
+    return ",".join(str(m) for m in layout)
+
+
+def add_common_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument("--machines", action="append", type=parse_layout, default=None,
+                        help="Layout to benchmark, '2,3,2' or '10x2'; repeat for several (default 2,3,2).")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed repeats per measurement.")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--backend", choices=["simpy", "kernel"], default="simpy")
+    parser.add_argument("--json", default="", help="Also write the results to this file.")
+
+
+def quiet():
+    """Silence the simulator's trace and logging output for timing runs"""
+    from utils.tracing import configure_tracing
+    configure_tracing(quiet=True)
+    logging.disable(logging.INFO)
+
+
+def build_shop(layout: List[int], seed: int = 0, backend: str = "simpy", strategy: str = "FIS"):
+    """A fresh main-simulation shop: (env, work_centers, job_creator)"""
+    from simulation.environment import create_environment
+    from simulation.job_creator import JobCreator
+    from simulation.workcenter import WorkCenter
+
+    random.seed(seed)
+    env = create_environment(backend)
+    work_centers = {
+        wc_id: WorkCenter(env, wc_id, machines, strategy=strategy, setup_time=SETUP_TIME)
+        for wc_id, machines in enumerate(layout, start=1)
+    }
+    job_creator = JobCreator(env, work_centers, num_work_centers=len(work_centers))
+    for wc in work_centers.values():
+        for machine in wc.machines:
+            machine.job_creator = job_creator
+    return env, work_centers, job_creator
+
+
+def measure(fn: Callable[[], object], repeat: int = 5, number: int = 1,
+            setup: Optional[Callable[[], object]] = None) -> Dict[str, float]:
+    """Seconds per call of fn: median/min/mean over repeat timed batches of number calls
+
+    setup, when given, runs untimed before every batch.
+    """
+    samples = []
+    for _ in range(max(1, repeat)):
+        if setup is not None:
+            setup()
+        started = time.perf_counter()
+        for _ in range(number):
+            fn()
+        samples.append((time.perf_counter() - started) / number)
+    return {
+        "median": statistics.median(samples),
+        "min": min(samples),
+        "mean": statistics.fmean(samples),
+        "repeat": len(samples),
+        "number": number,
+    }
+
+
+def metadata(args: argparse.Namespace) -> Dict:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                                capture_output=True, text=True).stdout.strip()
+    except OSError:
+        commit = ""
+    import numpy
+    return {
+        "commit": commit or None,
+        "python": platform.python_version(),
+        "numpy": numpy.__version__,
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+        "argv": sys.argv[1:],
+    }
+
+
+def write_results(suite: str, args: argparse.Namespace, results: List[Dict]):
+    if not args.json:
+        return
+    with open(args.json, "w") as f:
+        json.dump({"suite": suite, "meta": metadata(args), "results": results}, f, indent=2)
+    print(f"Wrote {len(results)} results to {args.json}")
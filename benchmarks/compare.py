@@ -0,0 +1,55 @@
+"""Compare two benchmark JSON files (e.g. from two commits).
+
+    python -m benchmarks.compare base.json head.json [--threshold 1.10]
+
+Matches results by benchmark name, layout and parameters and prints the
+median seconds of both runs with their ratio (head / base). Exits with
+status 1 when any ratio is above the threshold.
+"""
+
+import argparse
+import json
+from typing import Dict, Tuple
+
+
+def _key(result: Dict) -> Tuple[str, str, str]:
+    return result["name"], result["layout"], json.dumps(result.get("params", {}), sort_keys=True)
+
+
+def load(path: str) -> Dict[Tuple[str, str, str], Dict]:
+    with open(path) as f:
+        data = json.load(f)
+    return {_key(result): result for result in data["results"]}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare two benchmark result files.")
+    parser.add_argument("base")
+    parser.add_argument("head")
+    parser.add_argument("--threshold", type=float, default=1.10,
+                        help="Ratio head/base above which a benchmark counts as a slowdown.")
+    args = parser.parse_args()
+
+    base, head = load(args.base), load(args.head)
+    slower = []
+    print(f"{'benchmark':<22}{'layout':<10}{'params':<30}{'base s':>12}{'head s':>12}{'ratio':>8}")
+    for key in [k for k in base if k in head]:
+        name, layout, params = key
+        before = base[key]["seconds"]["median"]
+        after = head[key]["seconds"]["median"]
+        ratio = after / before if before else float("inf")
+        params = " ".join(f"{k}={v}" for k, v in json.loads(params).items())
+        flag = "  <-- slower" if ratio > args.threshold else ""
+        print(f"{name:<22}{layout:<10}{params:<30}{before:>12.3e}{after:>12.3e}{ratio:>8.2f}{flag}")
+        if flag:
+            slower.append(key)
+    missing = len(base.keys() ^ head.keys())
+    if missing:
+        print(f"{missing} result(s) present in only one file")
+    if slower:
+        print(f"{len(slower)} benchmark(s) slower than {args.threshold:.2f}x")
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""Macro-benchmarks of whole simulation steps and the training loop.
+
+    python -m benchmarks.macro [--machines 2,3,2 --machines 10x2] [--intervals 20] [--warmup 10]
+                               [--train-intervals 3] [--only main,subsim,train] [--json macro.json]
+
+- main_interval: run_main_simulation_interval under static rules; simulated
+  time units and events per wall second, and wall seconds per interval
+- subsim_run: one EnhancedSubSimulation (build + run over evaluation_duration)
+  forked from the shop after --warmup main intervals
+- train_interval: wall seconds per interval of a one-episode dynamic train()
+  (imports torch; the first interval runs before any machine dispatches)
+"""
+
+import argparse
+import contextlib
+import io
+import time
+from typing import Dict, List
+
+from benchmarks.common import add_common_arguments, layout_name, measure, quiet, write_results
+
+SUITES = ("main", "subsim", "train")
+
+
+def _coordinator(layout: List[int], args, rule_mode: str = "static"):
+    import random
+    from coordinator.training_coordinator import PauseResumeTrainingCoordinator
+
+    random.seed(args.seed)
+    with contextlib.redirect_stdout(io.StringIO()):
+        return PauseResumeTrainingCoordinator(num_work_centers=len(layout), num_machines=layout,
+                                              rule_mode=rule_mode, backend=args.backend)
+
+
+def bench_main_interval(layout: List[int], args) -> List[Dict]:
+    trainer = _coordinator(layout, args)
+    walls = []
+    events = trainer.env.events_processed
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(args.intervals):
+            started = time.perf_counter()
+            trainer.run_main_simulation_interval()
+            walls.append(time.perf_counter() - started)
+    events = trainer.env.events_processed - events
+    total = sum(walls)
+    return [{"name": "main_interval", "layout": layout_name(layout),
+             "params": {"intervals": args.intervals, "interval_duration": trainer.interval_duration},
+             "seconds": {"median": sorted(walls)[len(walls) // 2], "min": min(walls),
+                         "mean": total / len(walls), "repeat": len(walls), "number": 1},
+             "sim_units_per_second": trainer.interval_duration * len(walls) / total,
+             "events_per_second": events / total,
+             "jobs_created": trainer.job_creator.created_count()}]
+
+
+def bench_subsim_run(layout: List[int], args) -> List[Dict]:
+    from simulation.enhance_simulation import EnhancedSubSimulation
+
+    trainer = _coordinator(layout, args)
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(args.warmup):
+            trainer.run_main_simulation_interval()
+    snapshot = trainer.snapshot_shop_state()
+
+    def run_subsim():
+        EnhancedSubSimulation(trainer, dict(trainer.workcenter_strategies),
+                              duration=trainer.evaluation_duration,
+                              current_time=trainer.env.now, snapshot=snapshot).run()
+
+    return [{"name": "subsim_run", "layout": layout_name(layout),
+             "params": {"warmup_intervals": args.warmup, "duration": trainer.evaluation_duration,
+                        "open_jobs": len(trainer.job_creator.created_jobs) - trainer.job_creator.completed_count()},
+             "seconds": measure(run_subsim, args.repeat)}]
+
+
+def bench_train_interval(layout: List[int], args) -> List[Dict]:
+    trainer = _coordinator(layout, args, rule_mode="dynamic")
+    trainer.num_episodes = 1
+    started = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        trainer.train(max_intervals=args.train_intervals)
+    wall = (time.perf_counter() - started) / args.train_intervals
+    return [{"name": "train_interval", "layout": layout_name(layout),
+             "params": {"intervals": args.train_intervals, "candidates": len(trainer.strategies) * len(layout)},
+             "seconds": {"median": wall, "min": wall, "mean": wall, "repeat": 1,
+                         "number": args.train_intervals}}]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Macro-benchmarks of simulation steps and training.")
+    add_common_arguments(parser)
+    parser.add_argument("--intervals", type=int, default=20, help="Main-simulation intervals to time.")
+    parser.add_argument("--warmup", type=int, default=10,
+                        help="Main intervals run before forking the benchmarked sub-simulation.")
+    parser.add_argument("--train-intervals", type=int, default=3, help="Intervals of the timed train() run.")
+    parser.add_argument("--only", default=",".join(SUITES), help=f"Subset of {', '.join(SUITES)}.")
+    args = parser.parse_args()
+    only = {name.strip() for name in args.only.split(',') if name.strip()}
+    quiet()
+
+    results = []
+    for layout in args.machines or [[2, 3, 2]]:
+        if "main" in only:
+            results += bench_main_interval(layout, args)
+        if "subsim" in only:
+            results += bench_subsim_run(layout, args)
+        if "train" in only:
+            results += bench_train_interval(layout, args)
+
+    print(f"{'benchmark':<16}{'layout':<10}{'median s':>12}{'min s':>12}  extra")
+    for result in results:
+        extra = ""
+        if "sim_units_per_second" in result:
+            extra = (f"{result['sim_units_per_second']:.0f} sim units/s, "
+                     f"{result['events_per_second']:.0f} events/s")
+        print(f"{result['name']:<16}{result['layout']:<10}"
+              f"{result['seconds']['median']:>12.4f}{result['seconds']['min']:>12.4f}  {extra}")
+    write_results("macro", args, results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""Micro-benchmarks of the per-decision hot paths.
+
+    python -m benchmarks.micro [--machines 2,3,2 --machines 50x2] [--queue-lengths 10,100,1000]
+                               [--repeat 5] [--json micro.json]
+
+- sequencing_select: SequencingAgent.select on one machine per rule and queue
+  length; every selected job is appended back so the length stays constant
+  (the time includes that append)
+- get_machine_state: WorkCenter.get_machine_state of one machine per queue length
+- generate_random_job: JobCreator.generate_random_job
+
+Times are seconds per call. Queues are filled on the first machine of
+WorkCenter 1, where every generated job starts.
+"""
+
+import argparse
+from typing import Dict, List
+
+from benchmarks.common import (add_common_arguments, build_shop, layout_name, measure, quiet,
+                               write_results)
+
+
+def _shop_with_queue(layout: List[int], length: int, seed: int, backend: str, rule: str = "FIS"):
+    env, work_centers, job_creator = build_shop(layout, seed, backend, strategy=rule)
+    wc = work_centers[1]
+    machine = wc.machines[0]
+    for _ in range(length):
+        machine.queue.append(job_creator.generate_random_job())
+    return env, wc, machine, job_creator
+
+
+def bench_sequencing_select(layout: List[int], lengths: List[int], args) -> List[Dict]:
+    from simulation.dispatch_queue import DispatchQueue
+    from simulation.sequencing_agent import SequencingAgent
+
+    results = []
+    for rule in DispatchQueue.RULES:
+        agent = SequencingAgent(rule)
+        for length in lengths:
+            _, _, machine, _ = _shop_with_queue(layout, length, args.seed, args.backend, rule)
+            queue = machine.queue
+
+            def select_and_return():
+                queue.append(agent.select(machine))
+
+            results.append({"name": "sequencing_select", "layout": layout_name(layout),
+                            "params": {"rule": rule, "queue_length": length},
+                            "seconds": measure(select_and_return, args.repeat, number=200)})
+    return results
+
+
+def bench_get_machine_state(layout: List[int], lengths: List[int], args) -> List[Dict]:
+    results = []
+    for length in lengths:
+        env, wc, machine, _ = _shop_with_queue(layout, length, args.seed, args.backend)
+        seconds = measure(lambda: wc.get_machine_state(machine, machine.get_sorted_queue(), env.now),
+                          args.repeat, number=20)
+        results.append({"name": "get_machine_state", "layout": layout_name(layout),
+                        "params": {"queue_length": length}, "seconds": seconds})
+    return results
+
+
+def bench_generate_random_job(layout: List[int], args) -> List[Dict]:
+    _, _, job_creator = build_shop(layout, args.seed, args.backend)
+    return [{"name": "generate_random_job", "layout": layout_name(layout), "params": {},
+             "seconds": measure(job_creator.generate_random_job, args.repeat, number=1000)}]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Micro-benchmarks of simulator hot paths.")
+    add_common_arguments(parser)
+    parser.add_argument("--queue-lengths", default="10,100,1000",
+                        help="Comma-separated queue lengths for the per-queue benchmarks.")
+    args = parser.parse_args()
+    lengths = [int(n) for n in args.queue_lengths.split(',') if n.strip()]
+    quiet()
+
+    results = []
+    for layout in args.machines or [[2, 3, 2]]:
+        results += bench_sequencing_select(layout, lengths, args)
+        results += bench_get_machine_state(layout, lengths, args)
+        results += bench_generate_random_job(layout, args)
+
+    print(f"{'benchmark':<22}{'layout':<14}{'params':<32}{'median us':>12}{'min us':>12}")
+    for result in results:
+        params = " ".join(f"{k}={v}" for k, v in result["params"].items())
+        print(f"{result['name']:<22}{result['layout']:<14}{params:<32}"
+              f"{result['seconds']['median'] * 1e6:>12.2f}{result['seconds']['min'] * 1e6:>12.2f}")
+    write_results("micro", args, results)
+
+
+if __name__ == "__main__":
+    main()
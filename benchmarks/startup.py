@@ -0,0 +1,76 @@
+"""Startup cost of main.py, and a check that static inference never imports torch.
+
+Each configuration runs `main.py` in a fresh interpreter and reports the wall
+time to the end of the run plus whether torch ended up in sys.modules:
+
+    python -m benchmarks.startup [--repeat 3] [--intervals 1] [--json out.json]
+
+Exits with status 1 when `--mode infer --rule static` imported torch.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from typing import Dict, List
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Runs main.py's main() in-process, then reports whether torch got loaded
+_PROBE = """
+import json, runpy, sys
+sys.argv = ["main.py"] + {argv!r}
+runpy.run_path("main.py", run_name="__main__")
+print("@@" + json.dumps({{"torch": "torch" in sys.modules}}))
+"""
+
+CONFIGURATIONS = {
+    "infer-static": ["--mode", "infer", "--rule", "static"],
+    "infer-dynamic": ["--mode", "infer", "--rule", "dynamic"],
+}
+
+
+def run_once(argv: List[str]) -> Dict:
+    started = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-c", _PROBE.format(argv=argv)],
+        cwd=ROOT, capture_output=True, text=True, check=True)
+    elapsed = time.perf_counter() - started
+    marker = next(line for line in result.stdout.splitlines() if line.startswith("@@"))
+    return {"wall_seconds": elapsed, **json.loads(marker[2:])}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure main.py startup and torch imports.")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--intervals", type=int, default=1)
+    parser.add_argument("--json", default="", help="Also write the results to this file.")
+    args = parser.parse_args()
+
+    results = {}
+    for name, argv in CONFIGURATIONS.items():
+        runs = [run_once(argv + ["--intervals", str(args.intervals), "--quiet"])
+                for _ in range(args.repeat)]
+        walls = [run["wall_seconds"] for run in runs]
+        results[name] = {
+            "median_seconds": statistics.median(walls),
+            "min_seconds": min(walls),
+            "imports_torch": any(run["torch"] for run in runs),
+        }
+        print(f"{name:>14}: median {results[name]['median_seconds']:.3f}s "
+              f"min {results[name]['min_seconds']:.3f}s torch={results[name]['imports_torch']}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if results["infer-static"]["imports_torch"]:
+        print("FAIL: --mode infer --rule static imported torch")
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""Check that the SimPy and event-kernel backends produce the same run."""
+
+import argparse
+import random
+import time
+from typing import Dict, List, Optional, Tuple
+
+from coordinator.training_coordinator import PauseResumeTrainingCoordinator
+
+
+def collect_job_end_times(backend: str, seed: int = 42, intervals: int = 6,
+                          mode: str = "infer", num_machines: Optional[List[int]] = None,
+                          **coordinator_kwargs) -> Tuple[Dict[int, float], float]:
+    """Run one seeded configuration and return ({job_id: end_time}, wall seconds)"""
+    num_machines = num_machines or [2, 2, 2]
+    random.seed(seed)
+    if coordinator_kwargs.get("rule_mode", "dynamic") == "dynamic":
+        # The DQN's initial weights come from torch's generator
+        import torch
+        torch.manual_seed(seed)
+    trainer = PauseResumeTrainingCoordinator(
+        num_work_centers=len(num_machines),
+        num_machines=num_machines,
+        backend=backend,
+        **coordinator_kwargs,
+    )
+    started = time.perf_counter()
+    if mode == "train":
+        trainer.train(max_intervals=intervals)
+    else:
+        trainer.run_inference(max_intervals=intervals)
+    elapsed = time.perf_counter() - started
+    end_times = {
+        job.job_id: job.end_time
+        for job in trainer.job_creator.created_jobs
+        if job.completion_status
+    }
+    return end_times, elapsed
+
+
+def compare_backends(seed: int = 42, intervals: int = 6, mode: str = "infer",
+                     **coordinator_kwargs) -> bool:
+    """Return True when both backends complete the same jobs at the same times"""
+    simpy_end, simpy_wall = collect_job_end_times("simpy", seed, intervals, mode, **coordinator_kwargs)
+    kernel_end, kernel_wall = collect_job_end_times("kernel", seed, intervals, mode, **coordinator_kwargs)
+    identical = simpy_end == kernel_end
+    rule = coordinator_kwargs.get("rule_mode", "dynamic")
+    print(f"\n=== Backend parity (seed={seed}, intervals={intervals}, mode={mode}, rule={rule}) ===")
+    print(f"Completed jobs: simpy={len(simpy_end)} kernel={len(kernel_end)}")
+    print(f"Wall time: simpy={simpy_wall:.3f}s kernel={kernel_wall:.3f}s")
+    print(f"Identical job end times: {identical}")
+    return identical
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare SimPy and event-kernel backends.")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--intervals", type=int, default=6)
+    parser.add_argument("--mode", choices=["train", "infer"], default="infer")
+    parser.add_argument("--rule", choices=["static", "dynamic"], default="static",
+                        help="Rule mode of the compared runs; dynamic runs seed the DQN's weights from --seed.")
+    args = parser.parse_args()
+    if not compare_backends(args.seed, args.intervals, args.mode, rule_mode=args.rule):
+        raise SystemExit(1)
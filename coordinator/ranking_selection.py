@@ -0,0 +1,189 @@
+import math
+import random
+from statistics import NormalDist, mean, variance
+from functools import partial
+from typing import Callable, Dict, Hashable, List, Optional, Tuple
+
+from coordinator.result_cache import SubSimulationCache
+from simulation.enhance_simulation import EnhancedSubSimulation, SubSimulationSummary
+from simulation.snapshot import ShopSnapshot
+
+
+class _Replication:
+    """One resumable sub-simulation run with its own random stream
+
+    The run is built on the first cache miss. Summaries at each horizon go
+    through the cache under key_for(horizon); a miss after earlier hits runs
+    from the start, which reaches the same state as running stage by stage.
+    """
+
+    def __init__(self, snapshot: ShopSnapshot, wc_strategies: Dict[int, str], duration: float,
+                 current_time: float, seed: int, backend: str,
+                 cache: Optional[SubSimulationCache] = None,
+                 key_for: Optional[Callable[[float], Hashable]] = None):
+        self.args = (snapshot, wc_strategies, duration, current_time, backend)
+        self.seed = seed
+        self.cache = cache
+        self.key_for = key_for
+        self.sub_sim: Optional[EnhancedSubSimulation] = None
+        self.rng_state = None
+        self.summary: Optional[SubSimulationSummary] = None
+        self.simulated = 0.0    # horizon the sub-simulation itself has run to
+        self.reached = 0.0      # horizon of the latest summary, simulated or cached
+        self.events = 0
+
+    def _build(self):
+        snapshot, wc_strategies, duration, current_time, backend = self.args
+        outer = random.getstate()
+        random.seed(self.seed)
+        try:
+            self.sub_sim = EnhancedSubSimulation(
+                None, wc_strategies, duration=duration,
+                current_time=current_time, snapshot=snapshot, backend=backend)
+        finally:
+            self.rng_state = random.getstate()
+            random.setstate(outer)
+
+    def advance(self, until: float, test_wc_id: int) -> float:
+        """Continue to until and return the partial WorkCenter cost"""
+        self.reached = until
+        key = self.key_for(until) if self.cache is not None else None
+        cached = self.cache.get(key) if key is not None else None
+        if cached is not None:
+            self.summary = cached
+            return cached.calculate_workcenter_reward(test_wc_id)
+
+        if self.sub_sim is None:
+            self._build()
+        outer = random.getstate()
+        random.setstate(self.rng_state)
+        try:
+            self.sub_sim.run(until=until)
+        finally:
+            self.rng_state = random.getstate()
+            random.setstate(outer)
+        self.simulated = self.sub_sim.env.now
+        self.events = self.sub_sim.env.events_processed
+        self.summary = self.sub_sim.summary()
+        if key is not None:
+            self.cache.put(key, self.summary)
+        return self.summary.calculate_workcenter_reward(test_wc_id)
+
+
+class _Candidate:
+    def __init__(self, name: str, test_wc_id: int, replications: List[_Replication]):
+        self.name = name
+        self.test_wc_id = test_wc_id
+        self.replications = replications
+        self.costs: List[float] = []
+        self.horizon = 0.0
+        self.dropped = False
+
+    def mean_cost(self) -> float:
+        return mean(self.costs)
+
+    def variance(self) -> float:
+        return variance(self.costs) if len(self.costs) > 1 else 0.0
+
+
+class SuccessiveHalvingEvaluator:
+    """Staged ranking-and-selection over strategy candidates
+
+    Candidates run in stages whose horizon grows by a factor eta up to the full
+    evaluation duration; every candidate keeps `replications` seeded runs that
+    are resumed, not restarted, between stages. After each stage, within every
+    tested WorkCenter, a candidate is dropped when its mean partial cost exceeds
+    the current best by more than z * sqrt(var_c/n + var_best/n), z being the
+    normal quantile at the configured confidence level. Survivors run on.
+    """
+
+    def __init__(self, confidence: float = 0.95, stages: int = 3,
+                 eta: float = 2.0, replications: int = 2, backend: str = "simpy"):
+        if not 0.5 <= confidence < 1:
+            raise ValueError("confidence must be in [0.5, 1)")
+        self.confidence = confidence
+        self.stages = max(1, stages)
+        self.eta = eta
+        self.replications = max(1, replications)
+        self.backend = backend
+        self.z = NormalDist().inv_cdf(confidence)
+        self.last_report: Dict[str, float] = {}
+
+    def horizons(self, duration: float) -> List[float]:
+        return [duration / self.eta ** (self.stages - 1 - stage) for stage in range(self.stages)]
+
+    @staticmethod
+    def replication_seed(seed: int, replication: int) -> int:
+        # Replication 0 keeps the candidate seed, so it matches the exhaustive run
+        return seed if replication == 0 else random.Random(f"{seed}:{replication}").getrandbits(32)
+
+    def evaluate(self, snapshot: ShopSnapshot, current_time: float, duration: float,
+                 candidates: List[Tuple[str, int, Dict[int, str]]],
+                 seed_for: Callable[[Dict[int, str]], int],
+                 cache: Optional[SubSimulationCache] = None,
+                 key_for: Optional[Callable[[Dict[int, str], int, float], Hashable]] = None) -> Dict[str, Dict]:
+        """Run (name, test_wc_id, wc_strategies) candidates; return per-name results
+
+        With a cache, key_for(wc_strategies, replication, horizon) names the
+        summary of one replication at one stage horizon.
+        """
+        if cache is not None and key_for is None:
+            raise ValueError("a cache needs key_for")
+        pool = []
+        for name, test_wc_id, wc_strategies in candidates:
+            seed = seed_for(wc_strategies)
+            pool.append(_Candidate(name, test_wc_id, [
+                _Replication(snapshot, wc_strategies, duration, current_time,
+                             self.replication_seed(seed, r), self.backend, cache,
+                             partial(key_for, wc_strategies, r) if cache is not None else None)
+                for r in range(self.replications)
+            ]))
+
+        horizons = self.horizons(duration)
+        for stage, horizon in enumerate(horizons):
+            alive = [c for c in pool if not c.dropped]
+            for candidate in alive:
+                candidate.costs = [rep.advance(horizon, candidate.test_wc_id)
+                                   for rep in candidate.replications]
+                candidate.horizon = horizon
+            if stage < len(horizons) - 1:
+                self._drop_dominated(alive)
+
+        # Time the exhaustive search would simulate = simulated + served by the cache + cut by early stopping
+        replications = [rep for c in pool for rep in c.replications]
+        simulated = sum(rep.simulated for rep in replications)
+        reached = sum(rep.reached for rep in replications)
+        exhaustive = len(pool) * duration * self.replications
+        self.last_report = {
+            'candidates': len(pool),
+            'survivors': sum(1 for c in pool if not c.dropped),
+            'simulated_time': simulated,
+            'exhaustive_time': exhaustive,
+            'saved_time': exhaustive - reached,
+            'cached_time': max(0.0, reached - simulated),
+            'runs': sum(1 for rep in replications if rep.sub_sim is not None),
+            'events': sum(rep.events for rep in replications),
+        }
+        return {
+            c.name: {
+                'summary': c.replications[0].summary,
+                'cost': c.mean_cost(),
+                'horizon': c.horizon,
+                'early_stopped': c.dropped,
+            }
+            for c in pool
+        }
+
+    def _drop_dominated(self, alive: List[_Candidate]):
+        groups: Dict[int, List[_Candidate]] = {}
+        for candidate in alive:
+            groups.setdefault(candidate.test_wc_id, []).append(candidate)
+        for group in groups.values():
+            best = min(group, key=lambda c: c.mean_cost())
+            for candidate in group:
+                if candidate is best or len(candidate.costs) < 2:
+                    continue
+                margin = self.z * math.sqrt(candidate.variance() / len(candidate.costs)
+                                            + best.variance() / len(best.costs))
+                if candidate.mean_cost() - best.mean_cost() > margin:
+                    candidate.dropped = True
@@ -0,0 +1,74 @@
+from collections import OrderedDict
+from typing import Dict, Hashable, Optional, Tuple
+
+
+class SubSimulationCache:
+    """Size-bounded LRU cache of sub-simulation summaries
+
+    Keys combine the snapshot fingerprint (relative shop state, no absolute
+    time), the per-WorkCenter strategy vector, the horizon and the
+    replication (see candidate_key). The candidate seed is derived from the
+    same fingerprint and vector, so a hit is exactly the result the
+    sub-simulation would have produced, also in a later interval that
+    reaches the same relative state.
+    """
+
+    def __init__(self, maxsize: int = 256):
+        self.maxsize = maxsize
+        self._entries: OrderedDict = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def candidate_key(fingerprint: str, workcenter_strategies: Dict[int, str], duration: float,
+                      backend: str, replication: int = 0, horizon: Optional[float] = None) -> Tuple:
+        """horizon defaults to the full duration; replication 0 is the exhaustive run"""
+        return (fingerprint, tuple(sorted(workcenter_strategies.items())), duration, backend,
+                replication, duration if horizon is None else horizon)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._entries
+
+    def get(self, key: Hashable):
+        """Return the cached value (refreshing its recency) or None; counts hits and misses"""
+        value = self._entries.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def record_duplicate(self):
+        """Count a lookup answered by an identical request earlier in the same batch"""
+        self.hits += 1
+
+    def put(self, key: Hashable, value):
+        if self.maxsize <= 0:
+            return
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        self._entries.clear()
+
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            'size': len(self._entries),
+            'maxsize': self.maxsize,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': self.hit_rate(),
+        }
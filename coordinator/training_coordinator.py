@@ -1,7 +1,14 @@
+import multiprocessing
+import random
+import time
 import simpy
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
 from typing import Dict, List, Tuple, Optional
-from agent.dqn_agent import DQNAgent
 from agent.epsilon_scheduler import EpsilonScheduler
+from coordinator.ranking_selection import SuccessiveHalvingEvaluator
+from coordinator.result_cache import SubSimulationCache
+from coordinator.vector_env import VectorShopEnv
 from metrics.recent_metrics_collector import RecentMetricsCollector
 from memory.workcenter_experience import (
     OptimalWorkCenterMemory,
@@ -9,15 +16,24 @@ from memory.workcenter_experience import (
     WorkCenterExperienceReplayMemory,
 )
 from reward.reward_calculator import RewardCalculator
-from simulation.enhance_simulation import EnhancedSubSimulation
+from simulation.enhance_simulation import SubSimulationSummary, evaluate_candidate
+from simulation.environment import create_environment
+from simulation.job_archive import JobArchive
 from simulation.job_creator import JobCreator
+from simulation.snapshot import ShopSnapshot
 from simulation.workcenter import WorkCenter
+from state.feature_schema import WorkCenterStates
 from state.state_vectorizer import StateVectorizer
 from utils.logger import get_logger
+from utils.profiling import PhaseProfiler
 
 
 
 class PauseResumeTrainingCoordinator:
+    # Timed steps of a train() interval, in order
+    PHASES = ("main_sim", "collect_states", "evaluate", "store_experiences", "dqn_update",
+              "update_strategies", "summary")
+
     def __init__(self, num_work_centers: int = 3,
                  num_machines: List[int] = [2,2,2],
                  strategies: List[str] = ["SPT", "EDD", "FIFO", "LPT", "FIS"],
@@ -25,15 +41,70 @@ class PauseResumeTrainingCoordinator:
                  rule_mode: str = "dynamic",
                  static_strategies: Optional[Dict[int, str]] = None,
                  processing_distributions: Optional[Dict[int, Dict]] = None,
-                 target_utilization: float = 1.02):
+                 target_utilization: float = 1.02,
+                 backend: str = "simpy",
+                 workers: int = 1,
+                 cache_size: int = 256,
+                 evaluation_mode: str = "exhaustive",
+                 confidence: float = 0.95,
+                 stages: int = 3,
+                 replications: int = 2,
+                 long_horizon: bool = False,
+                 history_limit: int = 1000,
+                 archive_path: Optional[str] = None,
+                 train_every: int = 1,
+                 steps_per_interval: int = 1,
+                 background_training: bool = False,
+                 prioritized_replay: bool = False,
+                 policy_control: bool = False,
+                 phase_log: Optional[str] = None,
+                 profile_phases: Optional[List[str]] = None,
+                 profile_dir: str = "profiles"):
         """
         Initialize training coordinator with WorkCenter-level strategy management
 
         Args:
             num_work_centers: Number of WorkCenters in the system
             num_machines: Number of machines per WorkCenter
+            backend: Simulation backend, "simpy" or the heap-based "kernel"
+            workers: Processes used to evaluate strategy candidates (1 runs them in-process)
+            cache_size: Sub-simulation results kept in the LRU result cache (0 disables it)
+            evaluation_mode: "exhaustive" runs every candidate for the full horizon,
+                "staged" drops statistically dominated candidates early
+            confidence, stages, replications: settings for the staged mode
+            long_horizon: archive completed jobs after every interval and keep
+                machine/WorkCenter histories in ring buffers of history_limit entries,
+                so memory stays flat however long the run
+            archive_path: directory for the on-disk columnar archive of completed jobs
+            train_every, steps_per_interval: DQN update schedule, one gradient step per
+                train_every stored transitions plus steps_per_interval per interval
+            background_training: run those gradient steps on a worker thread
+            prioritized_replay: sample DQN transitions by TD-error priority
+            policy_control: in train(), apply the greedy DQN policy instead of the
+                search optimum with probability 1 - epsilon (off: always the optimum)
+            phase_log: JSON-lines file receiving one phase-timing record per train() interval
+            profile_phases: PHASES (or "all") to run under cProfile, dumped to profile_dir
         """
         self.rule_mode = rule_mode
+        self.backend = backend
+        self.workers = max(1, workers)
+        self._candidate_pool: Optional[ProcessPoolExecutor] = None
+        self.result_cache = SubSimulationCache(maxsize=cache_size)
+        self.evaluation_mode = evaluation_mode
+        self.staged_evaluator = SuccessiveHalvingEvaluator(
+            confidence=confidence, stages=stages,
+            replications=replications, backend=backend)
+        self.time_saved_history: List[float] = []
+        self.policy_control = policy_control
+        # Its own stream, seeded once, so the control draws never shift the simulation's
+        self._policy_rng = random.Random(random.getrandbits(32)) if policy_control else None
+        self.profiler = PhaseProfiler(phase_log, profile_phases or (), profile_dir)
+        self.subsims_run = 0
+        self.subsim_events = 0
+        self.long_horizon = long_horizon
+        self.history_limit = history_limit if long_horizon else None
+        self.archive_path = archive_path
+        self.metrics_window = 240
         self.static_strategies = static_strategies or {}
         self.processing_distributions = processing_distributions or {}
         self.target_utilization = target_utilization
@@ -68,18 +139,31 @@ class PauseResumeTrainingCoordinator:
         self.wc3_count_upper = 0
         self.recent_metric = {}
         self.logger = get_logger(__name__)
-        self.state_vectorizer = StateVectorizer()
+        self.state_vectorizer = StateVectorizer(max(num_machines))
         self.reward_calculator = RewardCalculator()
         self.epsilon_scheduler = EpsilonScheduler()
-        self.dqn_agent = DQNAgent(action_space=self.strategies, epsilon_scheduler=self.epsilon_scheduler)
-        self.latest_state_vectors: Dict[int, Tuple[float, ...]] = {}
+        # The agent (and torch) is built on first use, so static runs never import torch
+        self._dqn_agent = None
+        self._dqn_config = dict(input_dim=self.state_vectorizer.dim, train_every=train_every, steps_per_interval=steps_per_interval,
+                                prioritized=prioritized_replay)
+        self.background_training = background_training
+        self.latest_features = None     # [num_wc, dim] float32, rows in wc_id order
+        self.latest_state_vectors: Dict[int, np.ndarray] = {}
         self.reward_estimates: Dict[int, float] = {}
         # Initialize environment
         self.initialize_environment()
 
+    @property
+    def dqn_agent(self):
+        if self._dqn_agent is None:
+            from agent.dqn_agent import DQNAgent
+            self._dqn_agent = DQNAgent(action_space=self.strategies,
+                                       epsilon_scheduler=self.epsilon_scheduler, **self._dqn_config)
+        return self._dqn_agent
+
     def initialize_environment(self):
         """Initialize the simulation environment with WorkCenter-level strategies"""
-        self.env = simpy.Environment()
+        self.env = create_environment(self.backend)
         print("""Initialize the simulation environment with WorkCenter-level strategies""")
         self.work_centers = {}
         for wc_id in range(1, self.num_work_centers + 1):
@@ -93,6 +177,7 @@ class PauseResumeTrainingCoordinator:
                 self.num_machines[wc_id-1],
                 strategy=wc_strategy,
                 setup_time=self.setup_time,
+                history_limit=self.history_limit,
             )
 
         # Initialize job creator and link to machines
@@ -103,29 +188,31 @@ class PauseResumeTrainingCoordinator:
             target_utilization=self.target_utilization,
             processing_distributions=self.processing_distributions
         )
+        if self.long_horizon:
+            self.job_creator.archive = JobArchive(path=self.archive_path)
 
         for wc in self.work_centers.values():
             for machine in wc.machines:
                 machine.job_creator = self.job_creator
 
 
-    def pause_and_collect_workcenter_states(self) -> Dict[int, Dict]:
-        """Pause simulation and collect WorkCenter states"""
+    def pause_and_collect_workcenter_states(self) -> WorkCenterStates:
+        """Pause simulation and collect WorkCenter states
+
+        The states are one float32 feature row per WorkCenter; the returned
+        mapping decodes a row into the legacy nested dict only when accessed.
+        """
         # print(f"Pausing simulation at time: {self.env.now}")
 
-        recent_collector  = RecentMetricsCollector(self.env, self.job_creator, time_window=240)
+        recent_collector  = RecentMetricsCollector(self.env, self.job_creator, time_window=self.metrics_window)
         recent_metrics = recent_collector.calculate()
         # recent_collector.print_metrics()
         self.recent_metric = recent_metrics
 
-        workcenter_states = {}
-
         for wc_id, wc in self.work_centers.items():
-            machine_states = []
             tempupper = 0
             templower = 0
             for machine in wc.machines:
-                queue_sorted = machine.get_sorted_queue()
                 if wc_id == 1:
                   self.wc1_count_lower +=machine.temp_lower
                   self.wc1_count_upper +=machine.temp_upper
@@ -136,23 +223,44 @@ class PauseResumeTrainingCoordinator:
                   self.wc3_count_lower += machine.temp_lower
                   self.wc3_count_upper += machine.temp_upper
 
-                machine_state = wc.get_machine_state(machine, queue_sorted, self.env.now)
-                machine_states.append(machine_state)
+        self.latest_features = self.state_vectorizer.vectorize_all(self.work_centers, self.env.now)
+        wc_ids = sorted(self.work_centers)
+        self.latest_state_vectors = dict(zip(wc_ids, self.latest_features))
+        return WorkCenterStates(wc_ids, self.latest_features, self.state_vectorizer.schema)
+
+    def select_policy_strategies(self, explore: bool = False) -> Dict[int, str]:
+        """DQN strategy for every WorkCenter from one batched forward pass over the latest states"""
+        # latest_features rows are already in wc_id order
+        wc_ids = sorted(self.latest_state_vectors)
+        actions = self.dqn_agent.select_strategies(self.latest_features, explore=explore)
+        return dict(zip(wc_ids, actions))
 
-            # Combine first two machines' states (adjust as needed)
-            wc_state = wc.get_workcenter_states(machine_states, max(self.num_machines))
-            workcenter_states[wc_id] = wc_state
-            # print(f"Workcenter {wc_state}")
-            # self.print_state(wc_state)
+    def choose_training_strategies(self, optimal_strategies: Dict[int, str]) -> Dict[int, str]:
+        """Strategies to run next in train()
 
-        self.latest_state_vectors = self.state_vectorizer.vectorize_all(workcenter_states)
-        return workcenter_states
+        The search optimum, unless policy_control is on: then, per WorkCenter,
+        the optimum with probability epsilon and the greedy DQN policy otherwise.
+        """
+        if not self.policy_control:
+            return dict(optimal_strategies)
+        policy = self.select_policy_strategies()
+        epsilon = self.dqn_agent.epsilon
+        return {
+            wc_id: strategy if self._policy_rng.random() < epsilon else policy[wc_id]
+            for wc_id, strategy in optimal_strategies.items()
+        }
+
+    def snapshot_shop_state(self) -> ShopSnapshot:
+        """Capture open jobs and machine queues for sub-simulations to fork from"""
+        return ShopSnapshot.capture(self.work_centers, self.job_creator, self.env.now)
 
     def evaluate_workcenter_strategy_combinations(self, current_time: float):
         """Evaluate different strategy combinations across WorkCenters"""
         strategy_results = {}
+        snapshot = self.snapshot_shop_state()
 
         # Test each strategy on each WorkCenter individually
+        candidates = []
         for strategy in self.strategies:
             for test_wc_id in self.work_centers.keys():
                 # Create strategy configuration: one WorkCenter gets test strategy,
@@ -166,29 +274,130 @@ class PauseResumeTrainingCoordinator:
 
                 strategy_name = f"WC{test_wc_id}_{strategy}"
                 print(f"  Evaluating strategy combination: {strategy_name}")
+                candidates.append((strategy_name, test_wc_id, strategy, wc_strategies))
+
+        if self.evaluation_mode == "staged":
+            return self._evaluate_candidates_staged(snapshot, current_time, candidates)
 
-                # Run sub-simulation with this strategy combination
-                sub_sim = EnhancedSubSimulation(
-                    main_coordinator=self,
-                    workcenter_strategies=wc_strategies,
-                    duration=self.evaluation_duration,
-                    current_time=current_time
-                )
-
-                metrics = sub_sim.run()
-
-                strategy_results[strategy_name] = {
-                    'sub_simulation': sub_sim,
-                    'metrics': metrics,
-                    'wc_strategies': wc_strategies,
-                    'test_wc_id': test_wc_id,
-                    'test_strategy': strategy,
-                    'final_states': sub_sim._capture_final_states(),
-                }
+        summaries = self._run_candidates(snapshot, current_time, [
+            wc_strategies for _, _, _, wc_strategies in candidates])
 
+        for (strategy_name, test_wc_id, strategy, wc_strategies), summary in zip(candidates, summaries):
+            strategy_results[strategy_name] = {
+                'summary': summary,
+                'metrics': summary.metrics,
+                'wc_strategies': wc_strategies,
+                'test_wc_id': test_wc_id,
+                'test_strategy': strategy,
+                'final_states': summary.final_workcenter_states,
+            }
+
+        return strategy_results
+
+    def _evaluate_candidates_staged(self, snapshot: ShopSnapshot, current_time: float,
+                                    candidates: List[Tuple]) -> Dict[str, Dict]:
+        """Ranking-and-selection variant of the candidate search (in-process)
+
+        Every replication's summary at every stage horizon goes through the
+        result cache; the full-horizon replication 0 shares its entry with
+        the exhaustive mode.
+        """
+        evaluator = self.staged_evaluator
+        fingerprint = snapshot.fingerprint()
+        staged = evaluator.evaluate(
+            snapshot, current_time, self.evaluation_duration,
+            [(name, test_wc_id, wc_strategies) for name, test_wc_id, _, wc_strategies in candidates],
+            lambda wc_strategies: self.candidate_seed(fingerprint, wc_strategies),
+            cache=self.result_cache,
+            key_for=lambda wc_strategies, replication, horizon: SubSimulationCache.candidate_key(
+                fingerprint, wc_strategies, self.evaluation_duration, self.backend, replication, horizon))
+
+        strategy_results = {}
+        for strategy_name, test_wc_id, strategy, wc_strategies in candidates:
+            result = staged[strategy_name]
+            strategy_results[strategy_name] = {
+                'summary': result['summary'],
+                'metrics': result['summary'].metrics,
+                'cost': result['cost'],
+                'horizon': result['horizon'],
+                'early_stopped': result['early_stopped'],
+                'wc_strategies': wc_strategies,
+                'test_wc_id': test_wc_id,
+                'test_strategy': strategy,
+                'final_states': result['summary'].final_workcenter_states,
+            }
+
+        report = evaluator.last_report
+        self.time_saved_history.append(report['saved_time'])
+        self.subsims_run += report['runs']
+        self.subsim_events += report['events']
+        print(f"  Staged evaluation: {report['survivors']}/{report['candidates']} candidates ran the full horizon, "
+              f"simulated {report['simulated_time']:.0f} of {report['exhaustive_time']:.0f} time units "
+              f"(early stopping saved {report['saved_time']:.0f}, cache served {report['cached_time']:.0f}, "
+              f"confidence {evaluator.confidence:.0%})")
         return strategy_results
 
-    def store_workcenter_experiences_and_find_optimal(self, initial_wc_states: Dict[int, Dict],
+    @staticmethod
+    def candidate_seed(fingerprint: str, wc_strategies: Dict[int, str]) -> int:
+        """Seed for one candidate
+
+        Derived from the snapshot fingerprint and the strategy vector, so it is
+        independent of evaluation order and worker count, and a candidate from
+        the same relative shop state always gets the same seed (and cache entry).
+        """
+        vector = ",".join(f"{wc_id}:{rule}" for wc_id, rule in sorted(wc_strategies.items()))
+        return random.Random(f"{fingerprint}:{vector}").getrandbits(32)
+
+    def _run_candidates(self, snapshot: ShopSnapshot, current_time: float,
+                        candidates: List[Dict[int, str]]) -> List[SubSimulationSummary]:
+        """Run sub-simulations for a list of strategy vectors, in order
+
+        Vectors already in the result cache, or repeated within the batch,
+        are not simulated again.
+        """
+        fingerprint = snapshot.fingerprint()
+        keys = []
+        summaries: Dict[Tuple, SubSimulationSummary] = {}
+        pending: Dict[Tuple, Tuple] = {}
+        for wc_strategies in candidates:
+            key = SubSimulationCache.candidate_key(
+                fingerprint, wc_strategies, self.evaluation_duration, self.backend)
+            keys.append(key)
+            if key in pending or key in summaries:
+                self.result_cache.record_duplicate()
+                continue
+            cached = self.result_cache.get(key)
+            if cached is not None:
+                summaries[key] = cached
+            else:
+                pending[key] = (snapshot, wc_strategies, self.evaluation_duration, current_time,
+                                self.candidate_seed(fingerprint, wc_strategies), self.backend)
+
+        args = list(pending.values())
+        if self.workers <= 1 or len(args) <= 1:
+            computed = [evaluate_candidate(*task) for task in args]
+        else:
+            if self._candidate_pool is None:
+                # spawn rather than fork: the parent holds torch threads
+                self._candidate_pool = ProcessPoolExecutor(
+                    max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"))
+            chunksize = -(-len(args) // self.workers)
+            computed = list(self._candidate_pool.map(evaluate_candidate, *zip(*args), chunksize=chunksize))
+
+        self.subsims_run += len(computed)
+        self.subsim_events += sum(summary.events_processed for summary in computed)
+        for key, summary in zip(pending, computed):
+            self.result_cache.put(key, summary)
+            summaries[key] = summary
+        return [summaries[key] for key in keys]
+
+    def shutdown_workers(self):
+        """Stop the candidate process pool, if one was started"""
+        if self._candidate_pool is not None:
+            self._candidate_pool.shutdown()
+            self._candidate_pool = None
+
+    def store_workcenter_experiences_and_find_optimal(self, initial_wc_states: WorkCenterStates,
                                                      strategy_results: Dict[str, Dict]) -> Dict[int, str]:
         """Store WorkCenter experiences and identify optimal strategies"""
 
@@ -199,26 +408,28 @@ class PauseResumeTrainingCoordinator:
 
             # Find results where this WorkCenter was tested
             for result_name, result_data in strategy_results.items():
+                # A candidate dropped by staged evaluation only has a partial-horizon cost and
+                # next state; it neither competes for the optimum nor becomes a DQN transition
+                if result_data.get('early_stopped'):
+                    continue
                 if result_data['test_wc_id'] == wc_id:
                     # Calculate WorkCenter-specific reward
-                    sub_sim = result_data['sub_simulation']
-                    wc_reward = sub_sim.calculate_workcenter_reward(wc_id)
-                    state_vec = self.latest_state_vectors.get(
-                        wc_id,
-                        self.state_vectorizer.vectorize(initial_wc_states[wc_id])
-                    )
-                    next_state_vec = self.state_vectorizer.vectorize(
-                        sub_sim.final_workcenter_states.get(wc_id, {})
-                    )
+                    summary = result_data['summary']
+                    wc_reward = result_data.get('cost')
+                    if wc_reward is None:
+                        wc_reward = summary.calculate_workcenter_reward(wc_id)
+                    state_vec = self.latest_state_vectors[wc_id]
+                    next_state_vec = summary.final_workcenter_states.row(wc_id)
                     reward_estimate = self.reward_calculator.calculate(
                         initial_wc_states[wc_id],
                         self.recent_metric or {}
                     )
                     self.reward_estimates[wc_id] = reward_estimate
+                    # wc_reward is a cost; the agent maximizes, like on the vectorized path
                     self.dqn_agent.store_experience(
                         state_vec,
                         result_data['test_strategy'],
-                        wc_reward,
+                        -wc_reward,
                         next_state_vec,
                     )
 
@@ -227,7 +438,7 @@ class PauseResumeTrainingCoordinator:
                         state=initial_wc_states[wc_id].copy(),
                         action=result_data['test_strategy'],
                         reward=wc_reward,
-                        next_state=sub_sim.final_workcenter_states[wc_id].copy(),
+                        next_state=summary.final_workcenter_states[wc_id].copy(),
                         timestamp=self.env.now,
                         episode=self.current_episode
                     )
@@ -244,7 +455,7 @@ class PauseResumeTrainingCoordinator:
                 print(f"WorkCenter {wc_id}: Optimal Strategy = {optimal_exp.action}, "
                       f"Reward = {optimal_exp.reward:.2f}")
 
-        self.dqn_agent.train_step()
+        self.dqn_agent.end_interval()
         self.epsilon_scheduler.step()
         return optimal_strategies
 
@@ -268,12 +479,21 @@ class PauseResumeTrainingCoordinator:
                 # print(f"inside machine case  just cheking {self.env.now} and {machine.is_idle} ")
                 if machine.queue and machine.is_idle:
                     # print(f"Queue Size of machine {machine.machine_id}: {len(machine.queue)}at  time {self.env.now}")
-                    machine.env.process(machine.process_jobs())
+                    machine.start()
 
                 # else : print("not ran from th pause this")
 
         # Run until target time
+        self.env.reset_window()
         self.env.run(until=target_time)
+        print(f"  SimPy events per simulated hour: {self.env.events_per_hour(since_window=True):.1f}")
+        if self.long_horizon:
+            archived = self.job_creator.archive_completed(keep_window=self.metrics_window)
+            print(f"  Archived {archived} completed jobs, {len(self.job_creator.created_jobs)} open")
+
+    def _flush_archive(self):
+        if self.job_creator.archive is not None:
+            self.job_creator.archive.flush()
 
 
 
@@ -288,6 +508,14 @@ class PauseResumeTrainingCoordinator:
         print(f"  Future Duration: {self.evaluation_duration/3600} hours")
         print(f"  Strategies: {self.strategies}")
         print(f"  Rule mode: {self.rule_mode}")
+        if self.rule_mode == "dynamic":
+            # Build the agent (and import torch) now, so no phase of the first interval is charged for it
+            started = time.perf_counter()
+            _ = self.dqn_agent
+            print(f"  DQN agent ready in {time.perf_counter() - started:.2f}s")
+        if self.background_training:
+            # Gradient steps run on a worker thread; the step order is then timing dependent
+            self.dqn_agent.start_background()
 
         for episode in range(self.num_episodes):
             self.current_episode = episode
@@ -305,52 +533,159 @@ class PauseResumeTrainingCoordinator:
                 interval_count += 1
                 print(f"\n--- Interval {interval_count}/{max_intervals} ---")
 
+                profiler = self.profiler
+                dqn_seconds = self._dqn_train_seconds()
+
                 # Step 1: Run main simulation for 4 hours
-                self.run_main_simulation_interval()
+                with profiler.phase("main_sim"):
+                    self.run_main_simulation_interval()
 
                 # Step 2+: Depending on mode, either keep static rules or run search
                 if self.rule_mode == "dynamic":
-                    initial_wc_states = self.pause_and_collect_workcenter_states()
-                    strategy_results = self.evaluate_workcenter_strategy_combinations(self.env.now)
-                    optimal_strategies = self.store_workcenter_experiences_and_find_optimal(
-                        initial_wc_states, strategy_results)
-                    self.update_workcenter_strategies(optimal_strategies)
-                    self._print_interval_summary(interval_count, optimal_strategies)
+                    with profiler.phase("collect_states"):
+                        initial_wc_states = self.pause_and_collect_workcenter_states()
+                    with profiler.phase("evaluate"):
+                        strategy_results = self.evaluate_workcenter_strategy_combinations(self.env.now)
+                    with profiler.phase("store_experiences"):
+                        optimal_strategies = self.store_workcenter_experiences_and_find_optimal(
+                            initial_wc_states, strategy_results)
+                    if not self.background_training:
+                        # Gradient steps ran inside store_experiences
+                        profiler.split("store_experiences", "dqn_update", self._dqn_train_seconds() - dqn_seconds)
+                    with profiler.phase("update_strategies"):
+                        applied_strategies = self.choose_training_strategies(optimal_strategies)
+                        self.update_workcenter_strategies(applied_strategies)
+                    with profiler.phase("summary"):
+                        self._print_interval_summary(interval_count, optimal_strategies, applied_strategies)
                 else:
-                    wc_states = self.pause_and_collect_workcenter_states()
-                    self._print_static_summary(interval_count, wc_states)
+                    with profiler.phase("collect_states"):
+                        wc_states = self.pause_and_collect_workcenter_states()
+                    with profiler.phase("summary"):
+                        self._print_static_summary(interval_count, wc_states)
+                record = profiler.end_interval(self._profile_counters(), episode=episode + 1,
+                                               interval=interval_count)
+                print(f"  Phases: {profiler.format_record(record)}")
 
             # Print episode summary
             self._print_episode_summary(episode)
 
+        if self.background_training:
+            self.dqn_agent.stop_background()
+        self.shutdown_workers()
+        self._flush_archive()
+        self.profiler.print_table()
+        self.profiler.close()
         print("\nTraining Complete!")
         # self.save_results()
 
 
 
 
-    def _print_interval_summary(self, interval: int, optimal_strategies: Dict[int, str]):
+    def _dqn_train_seconds(self) -> float:
+        # Without touching the lazy property, so static runs still never build the agent
+        return self._dqn_agent.train_seconds if self._dqn_agent is not None else 0.0
+
+    def _profile_counters(self) -> Dict[str, float]:
+        """Running totals recorded per interval by the profiler (as deltas)"""
+        agent = self._dqn_agent
+        counters = {
+            'sim_events': self.env.events_processed,
+            'subsims': self.subsims_run,
+            'subsim_events': self.subsim_events,
+            'grad_steps': agent.update_steps if agent is not None else 0,
+        }
+        if self.background_training:
+            # Gradient time on the worker thread overlaps the phases instead of being one
+            counters['background_dqn_seconds'] = self._dqn_train_seconds()
+        return counters
+
+    def train_vectorized(self, num_envs: int = 4, max_intervals: int = 6,
+                         workers: Optional[int] = None, seed: Optional[int] = None):
+        """DQN data collection from num_envs independently seeded shops in lockstep
+
+        Every interval, the states of all shops go through one batched
+        epsilon-greedy selection, every shop runs the interval with its chosen
+        strategies, and all num_envs * num_work_centers transitions are pushed
+        at once. Shops are spread over `workers` processes (default: self.workers).
+        """
+        seed = random.getrandbits(32) if seed is None else seed
+        vector_env = VectorShopEnv(
+            num_envs, seed, self.num_machines, self.workcenter_strategies, self.setup_time,
+            self.processing_distributions, target_utilization=self.target_utilization,
+            backend=self.backend, workers=self.workers if workers is None else workers,
+            interval_duration=self.interval_duration, metrics_window=self.metrics_window)
+        wc_ids = sorted(self.workcenter_strategies)
+        print(f"Vectorized training: {vector_env.num_envs} shops on {vector_env.workers} worker(s)")
+        if self.background_training:
+            self.dqn_agent.start_background()
+        try:
+            states = vector_env.reset()
+            dim = states.shape[-1]
+            for interval in range(1, max_intervals + 1):
+                flat_states = states.reshape(-1, dim)
+                actions = self.dqn_agent.select_strategies(flat_states)
+                per_env = [dict(zip(wc_ids, actions[i * len(wc_ids):(i + 1) * len(wc_ids)]))
+                           for i in range(vector_env.num_envs)]
+                next_states, rewards, infos = vector_env.step(per_env)
+                self.dqn_agent.store_experiences(flat_states, actions, rewards.reshape(-1),
+                                                 next_states.reshape(-1, dim))
+                self.dqn_agent.end_interval()
+                self.epsilon_scheduler.step()
+                states = next_states
+
+                stats = self.dqn_agent.training_stats()
+                print(f"\nInterval {interval}/{max_intervals}: time {infos[0]['time']}, "
+                      f"mean reward {rewards.mean():.3f}, epsilon {self.dqn_agent.epsilon:.3f}")
+                print(f"  Transitions: {stats['transitions']}, gradient steps: {stats['grad_steps']}")
+                print(f"  Jobs completed per shop: {[info['completed'] for info in infos]}")
+        finally:
+            vector_env.close()
+            if self.background_training:
+                self.dqn_agent.stop_background()
+        print("\nVectorized training complete!")
+
+    def _print_interval_summary(self, interval: int, optimal_strategies: Dict[int, str],
+                                applied_strategies: Dict[int, str]):
         """Print interval summary"""
         print(f"\nInterval {interval} Complete:")
         print(f"  Current Time: {self.env.now}")
         print(f"  Optimal Strategies: {optimal_strategies}")
+        if self.policy_control:
+            from_search = sum(applied_strategies[wc_id] == strategy for wc_id, strategy in optimal_strategies.items())
+            print(f"  Applied Strategies: {applied_strategies} ({from_search}/{len(optimal_strategies)} match the "
+                  f"search, epsilon {self.dqn_agent.epsilon:.3f})")
+        else:
+            # Greedy policy only: no exploration draws from the simulation's random stream
+            policy = self.select_policy_strategies()
+            agree = sum(policy.get(wc_id) == strategy for wc_id, strategy in optimal_strategies.items())
+            print(f"  DQN Policy: {policy} (agrees on {agree}/{len(optimal_strategies)})")
         print(f"  Total WC Experiences: {len(self.wc_experience_memory)}")
-        print(f"  Optimal WC Experiences: {len(self.wc_optimal_memory.optimal_experiences)}")
+        print(f"  Optimal WC Experiences: {len(self.wc_optimal_memory)}")
+        stats = self.dqn_agent.training_stats()
+        print(f"  DQN gradient steps: {stats['grad_steps']} ({stats['pending_steps']} queued), "
+              f"{stats['steps_per_second']:.0f}/s training, {stats['wall_steps_per_second']:.1f}/s wall")
+        cache = self.result_cache
+        print(f"  Sub-simulation cache: {cache.hits} hits, {cache.misses} misses "
+              f"({cache.hit_rate():.0%}), {len(cache)}/{cache.maxsize} entries")
 
     def _print_episode_summary(self, episode: int):
         """Print episode summary"""
-        completed_jobs = len([j for j in self.job_creator.created_jobs if j.completion_status])
-        total_jobs = len(self.job_creator.created_jobs)
+        completed_jobs = self.job_creator.completed_count()
+        total_jobs = self.job_creator.created_count()
 
         print(f"\nEpisode {episode + 1} Complete:")
         print(f"  Simulation Time: {self.env.now}")
         print(f"  Jobs Completed: {completed_jobs}/{total_jobs}")
         print(f"  Total WC Experiences: {len(self.wc_experience_memory)}")
-        print(f"  Optimal WC Experiences: {len(self.wc_optimal_memory.optimal_experiences)}")
+        print(f"  Optimal WC Experiences: {len(self.wc_optimal_memory)}")
 
 
     def run_inference(self, max_intervals: int = 6):
-        """Run the simulation without training or strategy search."""
+        """Run the simulation without training or strategy search.
+
+        With rule_mode "dynamic" the greedy DQN policy picks every WorkCenter's
+        strategy at each pause; "static" keeps the configured rules.
+        """
         self.logger.info("Starting inference-only simulation...")
         print("\n=== Inference Mode: running simulation without training ===")
         interval_count = 0
@@ -359,11 +694,14 @@ class PauseResumeTrainingCoordinator:
             print(f"\n--- Inference Interval {interval_count}/{max_intervals} ---")
             self.run_main_simulation_interval()
             wc_states = self.pause_and_collect_workcenter_states()
-            metrics = RecentMetricsCollector(self.env, self.job_creator, time_window=240).calculate()
+            if self.rule_mode == "dynamic":
+                self.update_workcenter_strategies(self.select_policy_strategies())
+            metrics = RecentMetricsCollector(self.env, self.job_creator, time_window=self.metrics_window).calculate()
             self._print_inference_summary(interval_count, wc_states, metrics or {})
+        self._flush_archive()
         print("\nInference run complete.")
 
-    def _print_inference_summary(self, interval: int, wc_states: Dict[int, Dict], metrics: Dict):
+    def _print_inference_summary(self, interval: int, wc_states: WorkCenterStates, metrics: Dict):
         """Summarize inference interval."""
         print(f"Interval {interval} Summary:")
         print(f"  Current Time: {self.env.now}")
@@ -371,16 +709,16 @@ class PauseResumeTrainingCoordinator:
         if metrics:
             print(f"  Recent mean tardiness: {metrics.get('recent_mean_tardiness', 0):.2f}")
             print(f"  Recent throughput: {metrics.get('recent_throughput', 0):.2f}")
-        for wc_id, state in wc_states.items():
-            print(f"  WC{wc_id} jobs in queue: {state.get('num_jobs', 0)}")
+        for wc_id in wc_states:
+            print(f"  WC{wc_id} jobs in queue: {wc_states.schema.num_jobs(wc_states.row(wc_id))}")
 
-    def _print_static_summary(self, interval: int, wc_states: Dict[int, Dict]):
+    def _print_static_summary(self, interval: int, wc_states: WorkCenterStates):
         """Summarize interval when using static rules."""
         print(f"Interval {interval} (static rules) Summary:")
         print(f"  Current Time: {self.env.now}")
         print(f"  Strategies (static): {self.workcenter_strategies}")
-        for wc_id, state in wc_states.items():
-            print(f"  WC{wc_id} jobs in queue: {state.get('num_jobs', 0)}")
+        for wc_id in wc_states:
+            print(f"  WC{wc_id} jobs in queue: {wc_states.schema.num_jobs(wc_states.row(wc_id))}")
 
 
     def print_state(self, state: Dict):
@@ -0,0 +1,218 @@
+import multiprocessing
+import random
+import traceback
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from reward.reward_calculator import RewardCalculator
+from simulation.environment import create_environment
+from simulation.job_creator import JobCreator
+from simulation.workcenter import WorkCenter
+from state.state_vectorizer import StateVectorizer
+from utils.tracing import configure_tracing
+
+
+class ShopInstance:
+    """One independently seeded shop, advanced one decision interval per step
+
+    The instance keeps its own copy of the module-level random state and swaps
+    it in only while it runs, so several instances can share a process (and
+    the caller's random stream) without disturbing each other.
+    """
+
+    def __init__(self, seed: int, num_machines: List[int], strategies: Dict[int, str],
+                 setup_time: List[List[int]], processing_distributions: Dict[int, Dict],
+                 target_utilization: float = 1.02, backend: str = "simpy",
+                 interval_duration: float = 60, metrics_window: int = 240):
+        self.seed = seed
+        self.num_machines = num_machines
+        self.initial_strategies = dict(strategies)
+        self.setup_time = setup_time
+        self.processing_distributions = processing_distributions
+        self.target_utilization = target_utilization
+        self.backend = backend
+        self.interval_duration = interval_duration
+        self.metrics_window = metrics_window
+        self.state_vectorizer = StateVectorizer(max(num_machines))
+        self.reward_calculator = RewardCalculator()
+        self.rng_state = None
+
+    def _swap_in(self):
+        outer = random.getstate()
+        random.setstate(self.rng_state)
+        return outer
+
+    def _swap_out(self, outer):
+        self.rng_state = random.getstate()
+        random.setstate(outer)
+
+    def reset(self) -> np.ndarray:
+        """Build the shop, run its first interval and return the [num_wc, dim] states"""
+        outer = random.getstate()
+        random.seed(self.seed)
+        try:
+            self.env = create_environment(self.backend)
+            self.work_centers = {
+                wc_id: WorkCenter(self.env, wc_id, machines,
+                                  strategy=self.initial_strategies.get(wc_id, "FIS"),
+                                  setup_time=self.setup_time)
+                for wc_id, machines in enumerate(self.num_machines, start=1)
+            }
+            self.job_creator = JobCreator(
+                self.env, self.work_centers, num_work_centers=len(self.work_centers),
+                target_utilization=self.target_utilization,
+                processing_distributions=self.processing_distributions)
+            for wc in self.work_centers.values():
+                for machine in wc.machines:
+                    machine.job_creator = self.job_creator
+            self._advance()
+            states, _ = self._observe()
+        finally:
+            self._swap_out(outer)
+        return states
+
+    def step(self, strategies: Dict[int, str]) -> Tuple[np.ndarray, np.ndarray, Dict]:
+        """Apply per-WorkCenter strategies for one interval; return (states, rewards, info)"""
+        outer = self._swap_in()
+        try:
+            for wc_id, strategy in strategies.items():
+                self.work_centers[wc_id].update_workcenter_strategy(strategy)
+            self._advance()
+            states, rewards = self._observe()
+        finally:
+            self._swap_out(outer)
+        info = {'time': self.env.now, 'completed': self.job_creator.completed_count(),
+                'created': self.job_creator.created_count()}
+        return states, rewards, info
+
+    def _advance(self):
+        for wc in self.work_centers.values():
+            for machine in wc.machines:
+                if machine.queue and machine.is_idle:
+                    machine.start()
+        self.env.run(until=self.env.now + self.interval_duration)
+
+    def _observe(self) -> Tuple[np.ndarray, np.ndarray]:
+        since = None if self.env.now < self.metrics_window else self.env.now - self.metrics_window
+        window = self.job_creator.completions.window(since, self.metrics_window)
+        metrics = {'recent_mean_tardiness': window['mean_tardiness']}
+        states = self.state_vectorizer.vectorize_all(self.work_centers, self.env.now)
+        schema = self.state_vectorizer.schema
+        rewards = [self.reward_calculator.reward(schema.num_jobs(row), metrics) for row in states]
+        return states, np.asarray(rewards, dtype=np.float32)
+
+
+def _instance_worker(conn, instance_kwargs: List[Dict]):
+    """Process loop hosting a contiguous slice of the vector env's instances
+
+    Every reply is ("ok", results) or ("error", traceback text); after an
+    error the worker keeps serving so the parent can still close it.
+    """
+    # Trace events could not reach the parent's buffer or file anyway
+    configure_tracing(quiet=True)
+    instances, failure = [], None
+    try:
+        instances = [ShopInstance(**kwargs) for kwargs in instance_kwargs]
+    except Exception:
+        failure = traceback.format_exc()
+    try:
+        while True:
+            command, payload = conn.recv()
+            if command == "close":
+                break
+            if failure is not None:
+                conn.send(("error", failure))
+                continue
+            try:
+                if command == "reset":
+                    conn.send(("ok", [instance.reset() for instance in instances]))
+                elif command == "step":
+                    conn.send(("ok", [instance.step(strategies)
+                                      for instance, strategies in zip(instances, payload)]))
+            except Exception:
+                conn.send(("error", traceback.format_exc()))
+    finally:
+        conn.close()
+
+
+class VectorShopEnv:
+    """N independently seeded shops stepped in lockstep, one interval per step
+
+    Instance i is seeded with env_seed(base_seed, i), so a run depends on the
+    base seed and the number of instances, never on how they are spread over
+    processes. With workers > 1 the instances are split into contiguous slices,
+    one persistent worker process per slice, and every step is one message
+    round trip per worker.
+    """
+
+    def __init__(self, num_envs: int, base_seed: int, num_machines: List[int],
+                 strategies: Dict[int, str], setup_time: List[List[int]],
+                 processing_distributions: Dict[int, Dict], target_utilization: float = 1.02,
+                 backend: str = "simpy", workers: int = 1, interval_duration: float = 60,
+                 metrics_window: int = 240):
+        self.num_envs = max(1, num_envs)
+        self.num_work_centers = len(num_machines)
+        kwargs = [dict(seed=self.env_seed(base_seed, i), num_machines=num_machines,
+                       strategies=strategies, setup_time=setup_time,
+                       processing_distributions=processing_distributions,
+                       target_utilization=target_utilization, backend=backend,
+                       interval_duration=interval_duration, metrics_window=metrics_window)
+                  for i in range(self.num_envs)]
+        self.workers = min(max(1, workers), self.num_envs)
+        bounds = np.linspace(0, self.num_envs, self.workers + 1).astype(int)
+        self._slices = list(zip(bounds[:-1].tolist(), bounds[1:].tolist()))
+        self._instances: Optional[List[ShopInstance]] = None
+        self._pipes = []
+        self._processes = []
+        if self.workers == 1:
+            self._instances = [ShopInstance(**kw) for kw in kwargs]
+        else:
+            # spawn rather than fork: the parent holds torch threads
+            context = multiprocessing.get_context("spawn")
+            for lo, hi in self._slices:
+                parent, child = context.Pipe()
+                process = context.Process(target=_instance_worker, args=(child, kwargs[lo:hi]), daemon=True)
+                process.start()
+                child.close()
+                self._pipes.append(parent)
+                self._processes.append(process)
+
+    @staticmethod
+    def env_seed(base_seed: int, index: int) -> int:
+        return random.Random(f"{base_seed}:env:{index}").getrandbits(32)
+
+    def reset(self) -> np.ndarray:
+        """Stacked initial states, [num_envs, num_work_centers, dim]"""
+        if self._instances is not None:
+            return np.stack([instance.reset() for instance in self._instances])
+        for pipe in self._pipes:
+            pipe.send(("reset", None))
+        return np.stack([states for replies in self._receive() for states in replies])
+
+    def step(self, strategies: List[Dict[int, str]]) -> Tuple[np.ndarray, np.ndarray, List[Dict]]:
+        """One interval in every instance: (states [N, W, dim], rewards [N, W], infos)"""
+        if self._instances is not None:
+            results = [instance.step(s) for instance, s in zip(self._instances, strategies)]
+        else:
+            for pipe, (lo, hi) in zip(self._pipes, self._slices):
+                pipe.send(("step", strategies[lo:hi]))
+            results = [result for replies in self._receive() for result in replies]
+        states, rewards, infos = zip(*results)
+        return np.stack(states), np.stack(rewards), list(infos)
+
+    def _receive(self) -> List[List]:
+        """One reply per worker, in slice order; re-raises the first worker failure"""
+        # Read every pipe first so no reply is left behind for the next command
+        replies = [pipe.recv() for pipe in self._pipes]
+        for index, (status, payload) in enumerate(replies):
+            if status == "error":
+                raise RuntimeError(f"Shop worker {index} failed:\n{payload}")
+        return [payload for _, payload in replies]
+
+    def close(self):
+        for pipe in self._pipes:
+            pipe.send(("close", None))
+        for process in self._processes:
+            process.join()
+        self._pipes, self._processes = [], []
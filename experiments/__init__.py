@@ -0,0 +1,6 @@
+"""Batch experiments over simulation configurations; run with `python -m experiments.<name>`.
+
+scenario (one configuration run to its KPIs), sweep (many scenarios in a
+process pool, streamed to a resumable results file) and replicate (seeded
+replications of one scenario with confidence intervals per KPI).
+"""
@@ -0,0 +1,188 @@
+"""Independent seeded replications of one scenario, with confidence intervals per KPI.
+
+    python -m experiments.replicate [--machines 2,3,2] [--static-rules 1:SPT,2:SPT,3:SPT] [...]
+        [--replications 5] [--workers 4] [--confidence 0.95]
+        [--target mean_tardiness=5 --target throughput=2%] [--max-replications 200]
+        [--results reps.jsonl] [--json summary.json]
+
+The scenario flags are those of experiments.sweep, one value each. Every
+replication runs the scenario with its own seed (derived from --seed and the
+replication index, so replication r is the same run however the batches
+fall). Replications run on a process pool; the report gives mean, standard
+deviation and the Student-t confidence interval of every KPI.
+
+With --target KPI=H (absolute half-width) or KPI=P% (half-width relative to
+the mean), replications are added in batches until every target is met or
+--max-replications is reached. Each batch is sized from the current variance
+estimate: n * (half_width / target)^2 replications are expected to suffice.
+"""
+
+import argparse
+import json
+import math
+import multiprocessing
+import os
+import statistics
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from statistics import NormalDist
+from typing import Dict, List, Tuple
+
+from experiments.scenario import normalize, run_scenario, scenario_key, scenario_seed
+from experiments.sweep import AXES
+
+# Replication bookkeeping, not a simulation KPI
+NON_KPIS = ("wall_seconds",)
+
+
+def student_t_quantile(p: float, dof: int) -> float:
+    """Quantile of Student's t (Cornish-Fisher expansion around the normal; within 0.1% for dof >= 3)"""
+    z = NormalDist().inv_cdf(p)
+    v = dof
+    return (z + (z ** 3 + z) / (4 * v)
+            + (5 * z ** 5 + 16 * z ** 3 + 3 * z) / (96 * v ** 2)
+            + (3 * z ** 7 + 19 * z ** 5 + 17 * z ** 3 - 15 * z) / (384 * v ** 3)
+            + (79 * z ** 9 + 776 * z ** 7 + 1482 * z ** 5 - 1920 * z ** 3 - 945 * z) / (92160 * v ** 4))
+
+
+def summarize(values: List[float], confidence: float) -> Dict[str, float]:
+    n = len(values)
+    mean = statistics.fmean(values)
+    std = statistics.stdev(values) if n > 1 else 0.0
+    half_width = student_t_quantile(0.5 + confidence / 2, n - 1) * std / math.sqrt(n) if n > 1 else math.inf
+    return {"n": n, "mean": mean, "std": std, "half_width": half_width,
+            "low": mean - half_width, "high": mean + half_width}
+
+
+def parse_target(text: str) -> Tuple[str, float, bool]:
+    """'mean_tardiness=5' -> absolute half-width 5, 'throughput=2%' -> 2% of the mean"""
+    try:
+        kpi, value = text.split('=')
+        relative = value.strip().endswith('%')
+        width = float(value.strip().rstrip('%'))
+    except ValueError as exc:
+        raise argparse.ArgumentTypeError(f"Bad target '{text}', expected KPI=H or KPI=P%") from exc
+    if width <= 0:
+        raise argparse.ArgumentTypeError(f"Bad target '{text}': the half-width must be positive")
+    return kpi.strip(), width / 100 if relative else width, relative
+
+
+def _target_width(stats: Dict[str, float], width: float, relative: bool) -> float:
+    return width * abs(stats["mean"]) if relative else width
+
+
+def needed_replications(summary: Dict[str, Dict], targets: List[Tuple[str, float, bool]]) -> float:
+    """Replications expected to bring every target KPI within its half-width (0 if all are met)"""
+    needed = 0
+    for kpi, width, relative in targets:
+        stats = summary[kpi]
+        target = _target_width(stats, width, relative)
+        if stats["half_width"] <= target:
+            continue
+        if target == 0 or math.isinf(stats["half_width"]):
+            return math.inf     # a relative target on a zero mean, or a single replication
+        needed = max(needed, math.ceil(stats["n"] * (stats["half_width"] / target) ** 2))
+    return needed
+
+
+def _run_replication(scenario: Dict, base_seed: int, replication: int) -> Dict:
+    seed = scenario_seed(base_seed, scenario, replication)
+    return {"key": scenario_key(scenario), "replication": replication, "seed": seed,
+            "kpis": run_scenario(scenario, seed)}
+
+
+def _summary(rows: List[Dict], confidence: float) -> Dict[str, Dict]:
+    kpis = [kpi for kpi in rows[0]["kpis"] if kpi not in NON_KPIS]
+    return {kpi: summarize([row["kpis"][kpi] for row in rows], confidence) for kpi in kpis}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replicate one scenario with confidence intervals per KPI.")
+    parser.add_argument("--machines")
+    parser.add_argument("--distributions")
+    parser.add_argument("--target-utilization", type=float)
+    parser.add_argument("--static-rules")
+    parser.add_argument("--rule", choices=["static", "dynamic"])
+    parser.add_argument("--mode", choices=["infer", "train"])
+    parser.add_argument("--intervals", type=int)
+    parser.add_argument("--backend", choices=["simpy", "kernel"])
+    parser.add_argument("--replications", type=int, default=5, help="Initial replications (at least 4).")
+    parser.add_argument("--max-replications", type=int, default=200,
+                        help="Upper bound when adding replications for --target.")
+    parser.add_argument("--target", action="append", type=parse_target, default=[],
+                        help="KPI=H or KPI=P%%: add replications until the CI half-width is at most H "
+                             "(or P%% of the mean); repeatable.")
+    parser.add_argument("--confidence", type=float, default=0.95)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="Replication processes (1 runs them in this process).")
+    parser.add_argument("--seed", type=int, default=42, help="Base seed the replication seeds derive from.")
+    parser.add_argument("--results", default="", help="Also write every replication's KPIs as JSON lines.")
+    parser.add_argument("--json", default="", help="Also write the summary to this file.")
+    args = parser.parse_args()
+
+    try:
+        scenario = normalize({key: getattr(args, key) for key in AXES if getattr(args, key) is not None})
+    except argparse.ArgumentTypeError as exc:
+        parser.error(str(exc))
+    # The t quantile is only accurate from 3 degrees of freedom on
+    if args.replications < 4:
+        parser.error("--replications must be at least 4")
+    if not 0 < args.confidence < 1:
+        parser.error("--confidence must be between 0 and 1")
+
+    started = time.perf_counter()
+    rows: List[Dict] = []
+    run = partial(_run_replication, scenario, args.seed)
+    pool = None
+    if args.workers > 1:
+        pool = ProcessPoolExecutor(max_workers=args.workers, mp_context=multiprocessing.get_context("spawn"))
+    try:
+        batch = min(args.replications, args.max_replications)
+        while batch > 0:
+            print(f"Running replications {len(rows) + 1}-{len(rows) + batch} ...")
+            indices = range(len(rows), len(rows) + batch)
+            rows += list(pool.map(run, indices)) if pool is not None else [run(r) for r in indices]
+            summary = _summary(rows, args.confidence)
+            if not args.target:
+                break
+            unknown = [kpi for kpi, _, _ in args.target if kpi not in summary]
+            if unknown:
+                parser.error(f"Unknown KPI(s) {', '.join(unknown)}; expected some of {', '.join(summary)}")
+            needed = needed_replications(summary, args.target)
+            if needed:
+                print("  " + ", ".join(f"{kpi} ±{summary[kpi]['half_width']:.4g}"
+                                       for kpi, _, _ in args.target) + f" -> about {needed} replications needed")
+            # At least one worker-load per batch, so the pool is never idle on a small step
+            batch = min(max(needed - len(rows), args.workers), args.max_replications - len(rows)) if needed else 0
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    met = not args.target or not needed_replications(summary, args.target)
+    print(f"\n=== {len(rows)} replications, {args.confidence:.0%} confidence intervals "
+          f"({time.perf_counter() - started:.1f}s wall) ===")
+    print(f"{'kpi':<18}{'mean':>12}{'std':>12}{'± half':>12}{'low':>12}{'high':>12}")
+    for kpi, stats in summary.items():
+        print(f"{kpi:<18}{stats['mean']:>12.4f}{stats['std']:>12.4f}{stats['half_width']:>12.4f}"
+              f"{stats['low']:>12.4f}{stats['high']:>12.4f}")
+    if args.target:
+        print("All targets met." if met else
+              f"Targets not met within --max-replications {args.max_replications}.")
+
+    if args.results:
+        with open(args.results, "w") as f:
+            for row in rows:
+                f.write(json.dumps(row) + "\n")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"scenario": scenario, "seed": args.seed, "confidence": args.confidence,
+                       "replications": len(rows), "targets_met": met,
+                       "targets": [{"kpi": kpi, "half_width": width * 100 if relative else width,
+                                    "relative": relative} for kpi, width, relative in args.target],
+                       "kpis": summary}, f, indent=2)
+        print(f"Wrote summary to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""One simulation configuration run end to end, returning its KPIs.
+
+A scenario is a plain dict of main.py settings, so it can be written to a
+results file and sent to worker processes:
+
+    {"machines": "2,3,2", "distributions": "", "target_utilization": 1.02,
+     "static_rules": "1:SPT,2:EDD,3:FIS", "rule": "static", "mode": "infer",
+     "intervals": 6, "backend": "simpy"}
+
+Missing keys take the main.py defaults, except rule and mode which default to
+a static inference run (no DQN, no strategy search).
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import logging
+import random
+import time
+from typing import Dict
+
+from utils.config_parsing import parse_distributions, parse_machine_layout, parse_static_rules
+
+DEFAULTS = {
+    "machines": "2,3,2",
+    "distributions": "",
+    "target_utilization": 1.02,
+    "static_rules": "",
+    "rule": "static",
+    "mode": "infer",
+    "intervals": 6,
+    "backend": "simpy",
+}
+
+
+def normalize(scenario: Dict) -> Dict:
+    """Scenario with defaults filled in; raises ArgumentTypeError on unknown keys or bad values"""
+    unknown = set(scenario) - set(DEFAULTS)
+    if unknown:
+        raise argparse.ArgumentTypeError(f"Unknown scenario key(s) {', '.join(sorted(unknown))}; "
+                                         f"expected some of {', '.join(DEFAULTS)}")
+    full = dict(DEFAULTS, **scenario)
+    full["target_utilization"] = float(full["target_utilization"])
+    full["intervals"] = int(full["intervals"])
+    if full["rule"] not in ("static", "dynamic") or full["mode"] not in ("infer", "train"):
+        raise argparse.ArgumentTypeError(f"Bad rule/mode {full['rule']}/{full['mode']}")
+    # Fail in the parent on malformed cells rather than in a worker
+    layout = parse_machine_layout(full["machines"])
+    parse_distributions(full["distributions"], len(layout))
+    parse_static_rules(full["static_rules"], len(layout))
+    return full
+
+
+def scenario_key(scenario: Dict) -> str:
+    """Stable identity of a normalized scenario (used to resume sweeps)"""
+    return json.dumps(scenario, sort_keys=True)
+
+
+def scenario_seed(base_seed: int, scenario: Dict, replication: int = 0) -> int:
+    """Seed derived from the scenario itself, so it does not depend on run order or resumes"""
+    return random.Random(f"{base_seed}:{scenario_key(scenario)}:{replication}").getrandbits(32)
+
+
+def run_scenario(scenario: Dict, seed: int) -> Dict:
+    """Run one normalized scenario with the given seed; returns its KPIs
+
+    KPIs are MetricsCollector.get_metrics_dict at full precision, plus the
+    wall seconds of the run. Simulation output is discarded.
+    """
+    from coordinator.training_coordinator import PauseResumeTrainingCoordinator
+    from metrics.metrics_collector import MetricsCollector
+    from utils.tracing import configure_tracing
+
+    configure_tracing(quiet=True)
+    logging.disable(logging.INFO)
+    random.seed(seed)
+    if scenario["rule"] == "dynamic":
+        # The DQN's initial weights come from torch's generator
+        import torch
+        torch.manual_seed(seed)
+    started = time.perf_counter()
+    layout = parse_machine_layout(scenario["machines"])
+    with contextlib.redirect_stdout(io.StringIO()):
+        trainer = PauseResumeTrainingCoordinator(
+            num_work_centers=len(layout),
+            num_machines=layout,
+            rule_mode=scenario["rule"],
+            static_strategies=parse_static_rules(scenario["static_rules"], len(layout)),
+            processing_distributions=parse_distributions(scenario["distributions"], len(layout)),
+            target_utilization=scenario["target_utilization"],
+            backend=scenario["backend"],
+        )
+        if scenario["mode"] == "train":
+            trainer.train(max_intervals=scenario["intervals"])
+        else:
+            trainer.run_inference(max_intervals=scenario["intervals"])
+        collector = MetricsCollector(trainer.env, trainer.job_creator, trainer.work_centers)
+        collector.finalize_metrics()
+    kpis = collector.get_metrics_dict(precision=None)
+    kpis["wall_seconds"] = time.perf_counter() - started
+    return kpis
@@ -0,0 +1,171 @@
+"""Run many scenarios across a process pool and stream their KPIs to a file.
+
+    python -m experiments.sweep --results sweep.jsonl [--workers 4] [--seed 42]
+        [--grid grid.json] [--scenarios scenarios.json]
+        [--machines 2,3,2 --machines 3,3,3] [--target-utilization 0.9 --target-utilization 1.0]
+        [--static-rules 1:SPT,2:SPT,3:SPT --static-rules 1:EDD,2:EDD,3:EDD] [--intervals 6]
+
+The cells are the cartesian product of the grid axes (a JSON object of
+scenario key -> list of values, extended by the repeatable flags) plus any
+explicit scenarios (a JSON list of scenario dicts). See experiments.scenario
+for the keys and their defaults.
+
+Every finished cell is appended to the results file as one JSON line with its
+scenario, seed and KPIs. Seeds derive from --seed and the scenario itself, so
+a cell gives the same result whatever the pool size or completion order.
+Rerunning with the same results file skips the cells already recorded as ok
+and retries failed ones; --restart discards the file first.
+"""
+
+import argparse
+import itertools
+import json
+import multiprocessing
+import os
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, List, Set
+
+from experiments.scenario import DEFAULTS, normalize, run_scenario, scenario_key, scenario_seed
+
+# Scenario keys that can also be given as repeatable flags
+AXES = ("machines", "distributions", "target_utilization", "static_rules", "rule", "mode",
+        "intervals", "backend")
+SUMMARY_KPIS = ("mean_tardiness", "throughput", "avg_utilization", "completed_jobs")
+
+
+def expand_grid(grid: Dict[str, List]) -> List[Dict]:
+    keys = list(grid)
+    return [dict(zip(keys, values)) for values in itertools.product(*(grid[key] for key in keys))]
+
+
+def build_cells(args) -> List[Dict]:
+    """Normalized, de-duplicated scenarios from the grid file, flags and scenario list"""
+    grid: Dict[str, List] = {}
+    if args.grid:
+        with open(args.grid) as f:
+            grid = json.load(f)
+        if not isinstance(grid, dict):
+            raise argparse.ArgumentTypeError(f"{args.grid}: expected an object of key -> list of values")
+        grid = {key: values if isinstance(values, list) else [values] for key, values in grid.items()}
+    for key in AXES:
+        values = getattr(args, key)
+        if values:
+            grid[key] = values
+
+    scenarios: List[Dict] = []
+    if args.scenarios:
+        with open(args.scenarios) as f:
+            scenarios = json.load(f)
+    if grid or not scenarios:
+        scenarios = expand_grid(grid) + scenarios
+
+    cells, seen = [], set()
+    for scenario in scenarios:
+        cell = normalize(scenario)
+        key = scenario_key(cell)
+        if key not in seen:
+            seen.add(key)
+            cells.append(cell)
+    return cells
+
+
+def completed_keys(path: str) -> Set[str]:
+    """Keys of the cells already recorded as ok in a results file"""
+    done = set()
+    if not os.path.exists(path):
+        return done
+    with open(path) as f:
+        for line in f:
+            try:
+                row = json.loads(line)
+            except json.JSONDecodeError:
+                continue    # a line cut short by an interrupted run
+            if row.get("status") == "ok":
+                done.add(row["key"])
+    return done
+
+
+def run_cell(scenario: Dict, seed: int) -> Dict:
+    """Worker entry point: one result row, with the error instead of KPIs if the run failed"""
+    row = {"key": scenario_key(scenario), "scenario": scenario, "seed": seed}
+    try:
+        row["kpis"] = run_scenario(scenario, seed)
+        row["status"] = "ok"
+    except Exception as exc:
+        row["status"] = "error"
+        row["error"] = f"{type(exc).__name__}: {exc}"
+        row["traceback"] = traceback.format_exc()
+    return row
+
+
+def _describe(scenario: Dict) -> str:
+    changed = [f"{key}={value}" for key, value in scenario.items() if value != DEFAULTS[key]]
+    return " ".join(changed) or "defaults"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a sweep of simulation scenarios in parallel.")
+    parser.add_argument("--results", required=True, help="JSON-lines file the finished cells are appended to.")
+    parser.add_argument("--grid", default="", help="JSON object of scenario key -> list of values.")
+    parser.add_argument("--scenarios", default="", help="JSON list of explicit scenario dicts.")
+    parser.add_argument("--machines", action="append", help="Layout axis value, e.g. '2,3,2' (repeatable).")
+    parser.add_argument("--distributions", action="append", help="Distributions axis value (repeatable).")
+    parser.add_argument("--target-utilization", action="append", type=float,
+                        help="Target utilization axis value (repeatable).")
+    parser.add_argument("--static-rules", action="append", help="Static rules axis value, e.g. '1:SPT,2:EDD,3:FIS'.")
+    parser.add_argument("--rule", action="append", choices=["static", "dynamic"])
+    parser.add_argument("--mode", action="append", choices=["infer", "train"])
+    parser.add_argument("--intervals", action="append", type=int)
+    parser.add_argument("--backend", action="append", choices=["simpy", "kernel"])
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="Scenario processes (1 runs them in this process).")
+    parser.add_argument("--seed", type=int, default=42, help="Base seed the per-scenario seeds derive from.")
+    parser.add_argument("--restart", action="store_true", help="Discard existing results instead of resuming.")
+    args = parser.parse_args()
+
+    try:
+        cells = build_cells(args)
+    except argparse.ArgumentTypeError as exc:
+        parser.error(str(exc))
+    if args.restart and os.path.exists(args.results):
+        os.remove(args.results)
+    done = completed_keys(args.results)
+    todo = [cell for cell in cells if scenario_key(cell) not in done]
+    print(f"Sweep: {len(cells)} scenarios, {len(cells) - len(todo)} already done, "
+          f"{len(todo)} to run on {max(1, args.workers)} worker(s)")
+
+    started = time.perf_counter()
+    failed = 0
+    with open(args.results, "a") as out:
+        def record(row: Dict, finished: int):
+            nonlocal failed
+            out.write(json.dumps(row) + "\n")
+            out.flush()
+            if row["status"] == "ok":
+                kpis = ", ".join(f"{name} {row['kpis'][name]:.3f}" for name in SUMMARY_KPIS)
+                print(f"[{finished}/{len(todo)}] {_describe(row['scenario'])}: {kpis}")
+            else:
+                failed += 1
+                print(f"[{finished}/{len(todo)}] {_describe(row['scenario'])}: FAILED {row['error']}")
+
+        seeds = [scenario_seed(args.seed, cell) for cell in todo]
+        if args.workers <= 1:
+            for finished, (cell, seed) in enumerate(zip(todo, seeds), start=1):
+                record(run_cell(cell, seed), finished)
+        elif todo:
+            with ProcessPoolExecutor(max_workers=args.workers,
+                                     mp_context=multiprocessing.get_context("spawn")) as pool:
+                futures = [pool.submit(run_cell, cell, seed) for cell, seed in zip(todo, seeds)]
+                for finished, future in enumerate(as_completed(futures), start=1):
+                    record(future.result(), finished)
+
+    print(f"Sweep finished in {time.perf_counter() - started:.1f}s: {len(todo) - failed} ok, "
+          f"{failed} failed; results in {args.results}")
+    if failed:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
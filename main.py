@@ -1,7 +1,8 @@
 import argparse
+import logging
 import os
 import random
-from typing import Dict, List
+from typing import List
 
 # Workaround for macOS / Conda OpenMP duplication when importing PyTorch
 os.environ.setdefault("KMP_DUPLICATE_LIB_OK", "TRUE")
@@ -9,6 +10,8 @@ os.environ.setdefault("OMP_NUM_THREADS", "1")
 
 from coordinator.training_coordinator import PauseResumeTrainingCoordinator
 from simulation.workcenter_layout import WorkshopLayout
+from utils.config_parsing import parse_distributions, parse_machine_layout, parse_static_rules
+from utils.tracing import SUBSYSTEMS, configure_tracing
 
 
 def parse_args() -> argparse.Namespace:
@@ -58,104 +61,179 @@ def parse_args() -> argparse.Namespace:
         default=1.02,
         help="Target system utilization used to derive job arrival rate.",
     )
+    parser.add_argument(
+        "--backend",
+        choices=["simpy", "kernel"],
+        default="simpy",
+        help="Simulation backend: SimPy processes or the heap-based event kernel.",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Processes used to evaluate strategy candidates in dynamic mode.",
+    )
+    parser.add_argument(
+        "--cache-size",
+        type=int,
+        default=256,
+        help="Sub-simulation results kept in the LRU result cache (0 disables it).",
+    )
+    parser.add_argument(
+        "--evaluation",
+        choices=["exhaustive", "staged"],
+        default="exhaustive",
+        help="Candidate search: full horizon for all, or staged with early stopping.",
+    )
+    parser.add_argument(
+        "--confidence",
+        type=float,
+        default=0.95,
+        help="Confidence level for dropping dominated candidates in staged evaluation.",
+    )
+    parser.add_argument(
+        "--stages",
+        type=int,
+        default=3,
+        help="Number of horizon stages in staged evaluation (horizon doubles each stage).",
+    )
+    parser.add_argument(
+        "--replications",
+        type=int,
+        default=2,
+        help="Seeded replications per candidate in staged evaluation (at least 2 to drop any).",
+    )
+    parser.add_argument(
+        "--envs",
+        type=int,
+        default=1,
+        help="With --mode train and --rule dynamic, collect DQN experience from this many seeded shops "
+             "in lockstep (spread over --workers processes).",
+    )
+    parser.add_argument(
+        "--train-every",
+        type=int,
+        default=1,
+        help="One DQN gradient step per this many stored transitions (0 disables).",
+    )
+    parser.add_argument(
+        "--steps-per-interval",
+        type=int,
+        default=1,
+        help="Extra DQN gradient steps after each decision interval.",
+    )
+    parser.add_argument(
+        "--background-training",
+        action="store_true",
+        help="Run DQN gradient steps on a background thread while the simulation continues.",
+    )
+    parser.add_argument(
+        "--policy-control",
+        action="store_true",
+        help="In training, apply the greedy DQN policy instead of the search optimum with probability 1 - epsilon.",
+    )
+    parser.add_argument(
+        "--prioritized-replay",
+        action="store_true",
+        help="Sample DQN replay by TD-error priority (sum-tree) with importance-sampling weights.",
+    )
+    parser.add_argument(
+        "--long-horizon",
+        action="store_true",
+        help="Archive completed jobs each interval and bound histories, keeping memory flat.",
+    )
+    parser.add_argument(
+        "--history-limit",
+        type=int,
+        default=1000,
+        help="Entries kept in each machine/WorkCenter history ring buffer with --long-horizon.",
+    )
+    parser.add_argument(
+        "--archive-dir",
+        default="",
+        help="With --long-horizon, also spill completed jobs to .npz column chunks in this directory.",
+    )
+    parser.add_argument(
+        "--phase-log",
+        default="",
+        help="Write one JSON line of phase timings, counters and peak memory per training interval.",
+    )
+    parser.add_argument(
+        "--profile",
+        default="",
+        help=("Comma-separated training phases to run under cProfile, or 'all': "
+              f"{','.join(PauseResumeTrainingCoordinator.PHASES)}."),
+    )
+    parser.add_argument(
+        "--profile-dir",
+        default="profiles",
+        help="Directory receiving one <phase>.prof cProfile dump per profiled phase.",
+    )
+    parser.add_argument(
+        "--trace-level",
+        choices=["DEBUG", "INFO", "WARNING"],
+        default="INFO",
+        help="Lowest level of simulation trace events that are recorded and echoed.",
+    )
+    parser.add_argument(
+        "--trace",
+        default="",
+        help=f"Comma-separated subsystems to trace (default all): {','.join(SUBSYSTEMS)}.",
+    )
+    parser.add_argument(
+        "--trace-file",
+        default="",
+        help="Append trace events as JSON lines to this file (written in batches).",
+    )
+    parser.add_argument(
+        "--quiet",
+        action="store_true",
+        help="Disable simulation tracing entirely.",
+    )
     parser.add_argument(
         "--seed",
         type=int,
         default=42,
         help="Random seed for reproducibility.",
     )
-    return parser.parse_args()
+    args = parser.parse_args()
+    if args.mode == "train" and args.envs > 1 and args.rule == "static":
+        # Vectorized training picks every strategy with the DQN, so there is no static variant
+        parser.error("--envs > 1 trains the DQN policy and needs --rule dynamic")
+    return args
 
 
-def _parse_machine_layout(machines_arg: str) -> List[int]:
-    try:
-        machines = [int(x) for x in machines_arg.split(',') if x.strip()]
-    except ValueError as exc:
+def _parse_profile_phases(profile_arg: str) -> List[str]:
+    phases = [p.strip() for p in profile_arg.split(',') if p.strip()]
+    known = set(PauseResumeTrainingCoordinator.PHASES) | {"all"}
+    unknown = [p for p in phases if p not in known]
+    if unknown:
         raise argparse.ArgumentTypeError(
-            "--machines must be a comma separated list of integers"
-        ) from exc
-    if not machines:
-        raise argparse.ArgumentTypeError("--machines cannot be empty")
-    if any(m <= 0 for m in machines):
-        raise argparse.ArgumentTypeError("Machine counts must be positive")
-    return machines
-
-
-def _parse_distributions(dist_arg: str, num_work_centers: int) -> Dict[int, Dict]:
-    """Return per-WC distribution config with sensible defaults."""
-    default = {
-        wc_id: {"type": "uniform", "low": 3.0, "high": 6.0}
-        for wc_id in range(1, num_work_centers + 1)
-    }
-    if not dist_arg:
-        return default
-
-    for item in dist_arg.split(','):
-        parts = [p.strip() for p in item.split(':') if p.strip()]
-        if len(parts) < 2:
-            raise argparse.ArgumentTypeError(
-                "Distribution entry must be 'wc:dist:param1:param2'"
-            )
-        wc_id = int(parts[0])
-        dist_type = parts[1].lower()
-        if wc_id < 1 or wc_id > num_work_centers:
-            raise argparse.ArgumentTypeError(f"Invalid workcenter id {wc_id}")
-
-        if dist_type in {"normal", "gaussian"}:
-            if len(parts) != 4:
-                raise argparse.ArgumentTypeError(
-                    "Normal distribution requires mean and std (wc:normal:mean:std)"
-                )
-            mean = float(parts[2])
-            std = float(parts[3])
-            default[wc_id] = {"type": "normal", "mean": mean, "std": std}
-        elif dist_type == "uniform":
-            if len(parts) != 4:
-                raise argparse.ArgumentTypeError(
-                    "Uniform distribution requires low and high (wc:uniform:low:high)"
-                )
-            low = float(parts[2])
-            high = float(parts[3])
-            default[wc_id] = {"type": "uniform", "low": low, "high": high}
-        elif dist_type in {"const", "constant"}:
-            if len(parts) != 3:
-                raise argparse.ArgumentTypeError(
-                    "Constant distribution requires a single value (wc:const:value)"
-                )
-            val = float(parts[2])
-            default[wc_id] = {"type": "constant", "value": val}
-        else:
-            raise argparse.ArgumentTypeError(f"Unsupported distribution '{dist_type}'")
-
-    return default
-
-
-def _parse_static_rules(rule_arg: str, num_work_centers: int) -> Dict[int, str]:
-    if not rule_arg:
-        return {}
-    mapping: Dict[int, str] = {}
-    for item in rule_arg.split(','):
-        parts = [p.strip() for p in item.split(':') if p.strip()]
-        if len(parts) != 2:
-            raise argparse.ArgumentTypeError(
-                "Static rule entry must be 'wc:STRATEGY'"
-            )
-        wc_id = int(parts[0])
-        if wc_id < 1 or wc_id > num_work_centers:
-            raise argparse.ArgumentTypeError(f"Invalid workcenter id {wc_id}")
-        mapping[wc_id] = parts[1].upper()
-    return mapping
+            f"Unknown phase(s) {', '.join(unknown)}; expected 'all' or some of "
+            f"{', '.join(PauseResumeTrainingCoordinator.PHASES)}"
+        )
+    return phases
 
 
 def main():
     """Main function to run training or inference."""
     args = parse_args()
     random.seed(args.seed)
+    if args.rule == "dynamic":
+        # The DQN's initial weights come from torch's generator
+        import torch
+        torch.manual_seed(args.seed)
+    configure_tracing(
+        level=logging.getLevelName(args.trace_level),
+        subsystems=[s.strip() for s in args.trace.split(',') if s.strip()] or None,
+        quiet=args.quiet,
+        path=args.trace_file or None,
+    )
 
-    num_machines = _parse_machine_layout(args.machines)
+    num_machines = parse_machine_layout(args.machines)
     num_work_centers = len(num_machines)
-    processing_distributions = _parse_distributions(args.distributions, num_work_centers)
-    static_rules = _parse_static_rules(args.static_rules, num_work_centers)
+    processing_distributions = parse_distributions(args.distributions, num_work_centers)
+    static_rules = parse_static_rules(args.static_rules, num_work_centers)
 
     # Display system layout before initialization
     WorkshopLayout.display_configuration(num_work_centers, num_machines)
@@ -168,6 +246,24 @@ def main():
         static_strategies=static_rules,
         processing_distributions=processing_distributions,
         target_utilization=args.target_utilization,
+        backend=args.backend,
+        workers=args.workers,
+        cache_size=args.cache_size,
+        evaluation_mode=args.evaluation,
+        confidence=args.confidence,
+        stages=args.stages,
+        replications=args.replications,
+        train_every=args.train_every,
+        steps_per_interval=args.steps_per_interval,
+        background_training=args.background_training,
+        prioritized_replay=args.prioritized_replay,
+        policy_control=args.policy_control,
+        long_horizon=args.long_horizon,
+        history_limit=args.history_limit,
+        archive_path=args.archive_dir or None,
+        phase_log=args.phase_log or None,
+        profile_phases=_parse_profile_phases(args.profile),
+        profile_dir=args.profile_dir,
     )
 
     # Display detailed layout after WorkCenters are initialized
@@ -175,7 +271,9 @@ def main():
     layout.display_layout_visual()
 
     # Run requested mode
-    if args.mode == "train":
+    if args.mode == "train" and args.envs > 1:
+        trainer.train_vectorized(num_envs=args.envs, max_intervals=args.intervals)
+    elif args.mode == "train":
         trainer.train(max_intervals=args.intervals)
     else:
         trainer.run_inference(max_intervals=args.intervals)
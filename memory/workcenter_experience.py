@@ -1,7 +1,8 @@
 import random
+from bisect import bisect_right
 from dataclasses import dataclass
 from collections import deque
-from typing import Dict, List, Optional
+from typing import Deque, Dict, Iterator, List, Optional
 
 @dataclass
 class WorkCenterExperience:
@@ -15,41 +16,102 @@ class WorkCenterExperience:
     episode: int
 
 class WorkCenterExperienceReplayMemory:
-    """Experience replay buffer for storing WorkCenter experiences"""
+    """Experience replay buffer for storing WorkCenter experiences
+
+    Experiences live in a fixed ring of `capacity` slots; each WorkCenter keeps
+    a deque of its slots, oldest first, so evicting the oldest experience and
+    looking up one WorkCenter's experiences never scan the whole memory.
+    """
     def __init__(self, capacity: int = 256):
-        self.capacity = capacity
-        self.memory = deque(maxlen=capacity)
+        self.capacity = max(1, capacity)
+        self.slots: List[Optional[WorkCenterExperience]] = [None] * self.capacity
+        self.ptr = 0        # next slot to write
+        self.size = 0
+        self.by_workcenter: Dict[int, Deque[int]] = {}
 
     def push(self, experience: WorkCenterExperience):
         """Store a WorkCenter experience"""
-        self.memory.append(experience)
+        evicted = self.slots[self.ptr]
+        if evicted is not None:
+            # The evicted experience is the oldest overall, hence the oldest of its WorkCenter
+            self.by_workcenter[evicted.workcenter_id].popleft()
+        self.slots[self.ptr] = experience
+        self.by_workcenter.setdefault(experience.workcenter_id, deque()).append(self.ptr)
+        self.ptr = (self.ptr + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+
+    def _slot(self, logical: int) -> int:
+        start = self.ptr if self.size == self.capacity else 0
+        return (start + logical) % self.capacity
+
+    @property
+    def memory(self) -> List[WorkCenterExperience]:
+        """All stored experiences, oldest first"""
+        return list(self)
 
     def sample(self, batch_size: int) -> List[WorkCenterExperience]:
         """Sample random batch of WorkCenter experiences"""
-        if len(self.memory) < batch_size:
-            return list(self.memory)
-        return random.sample(list(self.memory), batch_size)
+        if self.size < batch_size:
+            return list(self)
+        # Same draws as random.sample over the stored list, without building it
+        return [self.slots[self._slot(i)] for i in random.sample(range(self.size), batch_size)]
 
     def get_experiences_by_workcenter(self, wc_id: int) -> List[WorkCenterExperience]:
         """Get all experiences for a specific WorkCenter"""
-        return [exp for exp in self.memory if exp.workcenter_id == wc_id]
+        return [self.slots[slot] for slot in self.by_workcenter.get(wc_id, ())]
+
+    def __iter__(self) -> Iterator[WorkCenterExperience]:
+        return (self.slots[self._slot(i)] for i in range(self.size))
 
     def __len__(self):
-        return len(self.memory)
+        return self.size
 
 class OptimalWorkCenterMemory:
-    """Storage for optimal WorkCenter experiences"""
-    def __init__(self):
-        self.optimal_experiences = []
+    """Storage for optimal WorkCenter experiences
+
+    Each WorkCenter keeps its experiences sorted by episode (ties in insertion
+    order) next to a parallel list of episodes, so the latest best strategy up
+    to an episode is a bisection, and O(1) in the usual case of asking about
+    the current episode. At most max_per_workcenter experiences are kept per
+    WorkCenter; beyond that the earliest episode is evicted.
+    """
+    def __init__(self, max_per_workcenter: int = 1000):
+        self.max_per_workcenter = max(1, max_per_workcenter)
+        self.experiences: Dict[int, List[WorkCenterExperience]] = {}
+        self.episodes: Dict[int, List[int]] = {}
+        self.evicted = 0
 
     def add_optimal_experience(self, experience: WorkCenterExperience):
         """Add an optimal WorkCenter experience"""
-        self.optimal_experiences.append(experience)
+        wc_id = experience.workcenter_id
+        experiences = self.experiences.setdefault(wc_id, [])
+        episodes = self.episodes.setdefault(wc_id, [])
+        if not episodes or experience.episode >= episodes[-1]:
+            experiences.append(experience)
+            episodes.append(experience.episode)
+        else:
+            pos = bisect_right(episodes, experience.episode)
+            experiences.insert(pos, experience)
+            episodes.insert(pos, experience.episode)
+        if len(experiences) > self.max_per_workcenter:
+            del experiences[0], episodes[0]
+            self.evicted += 1
 
     def get_best_strategy_for_workcenter(self, wc_id: int, current_episode: int) -> str:
         """Get the most recent best strategy for a WorkCenter"""
-        wc_experiences = [exp for exp in self.optimal_experiences
-                         if exp.workcenter_id == wc_id and exp.episode <= current_episode]
-        if wc_experiences:
-            return sorted(wc_experiences, key=lambda x: x.episode)[-1].action
+        episodes = self.episodes.get(wc_id)
+        if episodes:
+            if current_episode >= episodes[-1]:
+                return self.experiences[wc_id][-1].action
+            pos = bisect_right(episodes, current_episode)
+            if pos:
+                return self.experiences[wc_id][pos - 1].action
         return "FIS"  # Default strategy
+
+    @property
+    def optimal_experiences(self) -> List[WorkCenterExperience]:
+        """Retained experiences, grouped by WorkCenter and episode-ordered within each"""
+        return [exp for wc_id in sorted(self.experiences) for exp in self.experiences[wc_id]]
+
+    def __len__(self):
+        return sum(len(experiences) for experiences in self.experiences.values())
@@ -1,7 +1,7 @@
 import simpy
 import pickle
 import statistics
-from typing import Dict
+from typing import Dict, Optional
 from simulation.job_creator import JobCreator
 from simulation.workcenter import WorkCenter
 
@@ -64,27 +64,41 @@ class MetricsCollector:
 
     def finalize_metrics(self):
         # self.save_jobs()
+        # Share of the simulated time each machine spent processing
+        if self.env.now > 0:
+            self.metrics['avg_utilization'] = statistics.mean(
+                machine.total_working_time / self.env.now
+                for wc in self.work_centers.values() for machine in wc.machines)
         completed_jobs = [job for job in self.job_creator.created_jobs if job.completion_status]
-        if not completed_jobs:
+        # Jobs already archived in long-horizon mode only survive as aggregates
+        archived = self.job_creator.archive.summary() if self.job_creator.archive is not None else None
+        if not completed_jobs and not (archived and archived['count']):
             return
-        if self.env.now < 240 : recent_completed_jobs = [job for job in self.job_creator.created_jobs if job.completion_status ]
-        else :
-          recent_completed_jobs = [job for job in self.job_creator.created_jobs if job.completion_status and job.end_time >= self.env.now -240]
-        print("recenly completed jobs :", len(recent_completed_jobs))
+        completions = self.job_creator.completions
+        recent = completions.window(None if self.env.now < 240 else self.env.now - 240)
+        print("recenly completed jobs :", recent['count'])
 
 
         self.metrics['tardiness'] = [job.calculate_tardiness() for job in completed_jobs]
-        self.metrics['total_tardiness'] = sum(self.metrics['tardiness'])
-        self.metrics['max_tardiness'] = max(self.metrics['tardiness']) if self.metrics['tardiness'] else 0
-        self.metrics['mean_tardiness'] = statistics.mean(self.metrics['tardiness'])
-
         flow_times = [job.calculate_flow_time() for job in completed_jobs]
-        self.metrics['total_flow_time'] = sum(flow_times)
-        self.metrics['avg_flow_time'] = statistics.mean(flow_times) if flow_times else 0
+        if archived and archived['count']:
+            count = len(completed_jobs) + archived['count']
+            self.metrics['total_tardiness'] = sum(self.metrics['tardiness']) + archived['total_tardiness']
+            self.metrics['max_tardiness'] = max(self.metrics['tardiness'] + [archived['max_tardiness']])
+            self.metrics['mean_tardiness'] = self.metrics['total_tardiness'] / count
+            self.metrics['total_flow_time'] = sum(flow_times) + archived['total_flow_time']
+            self.metrics['avg_flow_time'] = self.metrics['total_flow_time'] / count
+        else:
+            count = len(completed_jobs)
+            self.metrics['total_tardiness'] = sum(self.metrics['tardiness'])
+            self.metrics['max_tardiness'] = max(self.metrics['tardiness']) if self.metrics['tardiness'] else 0
+            self.metrics['mean_tardiness'] = statistics.mean(self.metrics['tardiness'])
+            self.metrics['total_flow_time'] = sum(flow_times)
+            self.metrics['avg_flow_time'] = statistics.mean(flow_times) if flow_times else 0
 
         simulation_time = self.env.now
-        self.metrics['throughput'] = len(completed_jobs) / simulation_time if simulation_time > 0 else 0
-        self.metrics['makespan'] = max(job.end_time for job in completed_jobs) if completed_jobs else 0
+        self.metrics['throughput'] = count / simulation_time if simulation_time > 0 else 0
+        self.metrics['makespan'] = max(completions.last_end_time(), archived['makespan'] if archived else 0)
 
         # if self.metrics['wip']:
         #     times, wips = zip(*self.metrics['wip'])
@@ -93,10 +107,6 @@ class MetricsCollector:
         #         wip_integral = sum((times[i] - times[i-1]) * wips[i-1] for i in range(1, len(times)))
         #         self.metrics['avg_wip'] = wip_integral / total_time
 
-        if self.metrics['machine_utilization']:
-            # self.metrics['avg_utilization'] = statistics.mean(self.metrics['machine_utilization'])
-            self.metrics['avg_utilization'] = 0
-
         if self.metrics['machine_idle_ratio']:
             # self.metrics['avg_idle_ratio'] = statistics.mean(self.metrics['machine_idle_ratio'])
             self.metrics['avg_idle_ratio'] = 0
@@ -122,54 +132,52 @@ class MetricsCollector:
         print(f"Total Flow Time: {self.metrics['total_flow_time']:.2f}")
         print(f"Average Flow Time: {self.metrics['avg_flow_time']:.2f}")
         print(f"Throughput: {self.metrics['throughput']:.2f} jobs/time unit")
+        print(f"Average Machine Utilization: {self.metrics.get('avg_utilization', 0)*100:.1f}%")
         # print(f"Average WIP: {self.metrics.get('avg_wip', 0):.2f}")
-        # print(f"Average Machine Utilization: {self.metrics.get('avg_utilization', 0)*100:.1f}%")
         # print(f"Average Machine Idle Ratio: {self.metrics.get('avg_idle_ratio', 0)*100:.1f}%")
-        print(f"Completed Jobs: {len([j for j in self.job_creator.created_jobs if j.completion_status])}")
-        print(f"Created Jobs: {len(self.job_creator.created_jobs)}")
+        print(f"Completed Jobs: {self.job_creator.completed_count()}")
+        print(f"Created Jobs: {self.job_creator.created_count()}")
 
 
-    def get_metrics_dict(self):
+    def get_metrics_dict(self, precision: Optional[int] = 2):
+        """KPIs of the finalized metrics, rounded to precision digits (None keeps full precision)"""
+        def r(value, digits=precision):
+            return value if precision is None else round(value, digits)
+
         return {
-            "total_tardiness": round(self.metrics['total_tardiness'], 2),
-            "mean_tardiness": round(self.metrics['mean_tardiness'], 2),
-            "max_tardiness": round(self.metrics['max_tardiness'], 2),
-            "makespan": round(self.metrics['makespan'], 2),
-            "total_flow_time": round(self.metrics['total_flow_time'], 2),
-            "avg_flow_time": round(self.metrics['avg_flow_time'], 2),
-            "throughput": round(self.metrics['throughput'], 2),
+            "total_tardiness": r(self.metrics['total_tardiness']),
+            "mean_tardiness": r(self.metrics['mean_tardiness']),
+            "max_tardiness": r(self.metrics['max_tardiness']),
+            "makespan": r(self.metrics['makespan']),
+            "total_flow_time": r(self.metrics['total_flow_time']),
+            "avg_flow_time": r(self.metrics['avg_flow_time']),
+            "throughput": r(self.metrics['throughput']),
+            "avg_utilization": r(self.metrics.get('avg_utilization', 0) * 100, 1),
             # Uncomment if needed:
             # "avg_wip": round(self.metrics.get('avg_wip', 0), 2),
-            # "avg_utilization": round(self.metrics.get('avg_utilization', 0) * 100, 1),
             # "avg_idle_ratio": round(self.metrics.get('avg_idle_ratio', 0) * 100, 1),
-            "completed_jobs": len([j for j in self.job_creator.created_jobs if j.completion_status]),
-            "created_jobs": len(self.job_creator.created_jobs)
+            "completed_jobs": self.job_creator.completed_count(),
+            "created_jobs": self.job_creator.created_count()
         }
 
 
     def calculate_recent_metrics(self, time_window=240):
         """Calculate metrics for jobs completed in the last `time_window` time units."""
-        recent_jobs = [
-            job for job in self.job_creator.created_jobs
-            if job.completion_status and job.end_time >= self.env.now - time_window
-        ]
+        recent = self.job_creator.completions.window(self.env.now - time_window, time_window)
 
-        print(f"\n--- Recently Completed Jobs (last {time_window} time units): {len(recent_jobs)} ---")
+        print(f"\n--- Recently Completed Jobs (last {time_window} time units): {recent['count']} ---")
 
-        if not recent_jobs:
+        if not recent['count']:
             print("No recently completed jobs.")
             return {}
 
-        recent_tardiness = [job.calculate_tardiness() for job in recent_jobs]
-        recent_flow_times = [job.calculate_flow_time() for job in recent_jobs]
-
         recent_metrics = {
-            'recent_total_tardiness': sum(recent_tardiness),
-            'recent_max_tardiness': max(recent_tardiness) if recent_tardiness else 0,
-            'recent_mean_tardiness': statistics.mean(recent_tardiness) if recent_tardiness else 0,
-            'recent_total_flow_time': sum(recent_flow_times),
-            'recent_avg_flow_time': statistics.mean(recent_flow_times) if recent_flow_times else 0,
-            'recent_throughput': len(recent_jobs) / time_window if time_window > 0 else 0
+            'recent_total_tardiness': recent['total_tardiness'],
+            'recent_max_tardiness': recent['max_tardiness'],
+            'recent_mean_tardiness': recent['mean_tardiness'],
+            'recent_total_flow_time': recent['total_flow_time'],
+            'recent_avg_flow_time': recent['mean_flow_time'],
+            'recent_throughput': recent['throughput']
         }
 
         self.recent_metric = recent_metrics
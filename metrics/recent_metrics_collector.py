@@ -1,6 +1,5 @@
 
 import simpy
-import statistics
 from simulation.job_creator import JobCreator
 
 
@@ -14,33 +13,23 @@ class RecentMetricsCollector:
 
     def calculate(self):
         """Calculate metrics for jobs completed in the last `time_window` time units."""
-        recent_jobs = []
-        if self.env.now < 240: recent_jobs = [
-            job for job in self.job_creator.created_jobs
-            if job.completion_status  ]
-        else :
-          recent_jobs = [
-              job for job in self.job_creator.created_jobs
-              if job.completion_status and job.end_time >= self.env.now - self.time_window
-          ]
-
-        print(f"\n--- Recently Completed Jobs (last {self.time_window} time units): {len(recent_jobs)} ---")
-
-        if not recent_jobs:
+        since = None if self.env.now < self.time_window else self.env.now - self.time_window
+        recent = self.job_creator.completions.window(since, self.time_window)
+
+        print(f"\n--- Recently Completed Jobs (last {self.time_window} time units): {recent['count']} ---")
+
+        if not recent['count']:
             print("No recently completed jobs.")
             self.metrics.clear()
             return {}
 
-        tardiness_list = [job.calculate_tardiness() for job in recent_jobs]
-        flow_times = [job.calculate_flow_time() for job in recent_jobs]
-
         self.metrics = {
-            'recent_total_tardiness': sum(tardiness_list),
-            'recent_max_tardiness': max(tardiness_list),
-            'recent_mean_tardiness': statistics.mean(tardiness_list),
-            'recent_total_flow_time': sum(flow_times),
-            'recent_avg_flow_time': statistics.mean(flow_times),
-            'recent_throughput': len(recent_jobs) / self.time_window
+            'recent_total_tardiness': recent['total_tardiness'],
+            'recent_max_tardiness': recent['max_tardiness'],
+            'recent_mean_tardiness': recent['mean_tardiness'],
+            'recent_total_flow_time': recent['total_flow_time'],
+            'recent_avg_flow_time': recent['mean_flow_time'],
+            'recent_throughput': recent['throughput']
         }
 
         return self.metrics
@@ -9,7 +9,14 @@ class RewardCalculator:
         self.tardiness_weight = tardiness_weight
 
     def calculate(self, workcenter_state: Dict[str, Union[int, float]], metrics: Dict[str, float]) -> float:
-        queue_length = workcenter_state.get('num_jobs', 0)
+        """Reward (higher is better) of a machine state dict or a WorkCenter dict with num_jobs_m1, ..."""
+        if 'num_jobs' in workcenter_state:
+            queue_length = workcenter_state['num_jobs']
+        else:
+            queue_length = sum(value for key, value in workcenter_state.items() if key.startswith('num_jobs_m'))
+        return self.reward(queue_length, metrics)
+
+    def reward(self, queue_length: float, metrics: Dict[str, float]) -> float:
         tardiness = metrics.get('recent_mean_tardiness', 0)
         reward = - (self.queue_weight * queue_length + self.tardiness_weight * tardiness)
         return max(-100.0, min(100.0, reward))
@@ -1,13 +1,43 @@
-"""Simulation package for the job shop environment."""
-from .job import Job
-from .job_creator import JobCreator
-from .machine import Machine
-from .workcenter import WorkCenter
-from .workcenter_layout import WorkshopLayout
-from .enhance_simulation import EnhancedSubSimulation
-from .sequencing_agent import SequencingAgent
+"""Simulation package for the job shop environment.
+
+Submodules are imported on first attribute access, so `import simulation`
+(or any one submodule) does not pull in the rest.
+"""
+import importlib
+
+_EXPORTS = {
+    'CompletionIndex': '.completion_index',
+    'DispatchQueue': '.dispatch_queue',
+    'CountingEnvironment': '.environment',
+    'create_environment': '.environment',
+    'EventKernel': '.event_kernel',
+    'Job': '.job',
+    'JobTable': '.job_table',
+    'JobArchive': '.job_archive',
+    'JobCreator': '.job_creator',
+    'ShopSnapshot': '.snapshot',
+    'Machine': '.machine',
+    'WorkCenter': '.workcenter',
+    'WorkshopLayout': '.workcenter_layout',
+    'EnhancedSubSimulation': '.enhance_simulation',
+    'SequencingAgent': '.sequencing_agent',
+}
 
 __all__ = [
-    'Job', 'JobCreator', 'Machine', 'WorkCenter', 'WorkshopLayout',
+    'CompletionIndex', 'CountingEnvironment', 'DispatchQueue', 'EventKernel', 'create_environment',
+    'Job', 'JobTable', 'JobArchive', 'JobCreator', 'ShopSnapshot', 'Machine', 'WorkCenter', 'WorkshopLayout',
     'EnhancedSubSimulation', 'SequencingAgent'
 ]
+
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module 'simulation' has no attribute {name!r}")
+    value = getattr(importlib.import_module(module, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,118 @@
+import bisect
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+
+class CompletionIndex:
+    """Append-only index of job completions ordered by end time
+
+    Holds the end times with prefix sums of tardiness and flow time, plus a
+    monotonic stack for suffix maxima of tardiness. A window "completed at or
+    after t" is a suffix of the index, so its count, totals, means and max
+    tardiness are a bisect plus O(1) arithmetic. Completions arrive in time
+    order from Job.record_operation_end; an out-of-order one is inserted in
+    place (O(n), which a single simulation clock never triggers).
+    """
+
+    def __init__(self, capacity: int = 1024):
+        self._reset(max(1, capacity))
+
+    def _reset(self, capacity: int):
+        self.size = 0
+        self.end_time = np.empty(capacity)
+        self.cum_tardiness = np.zeros(capacity + 1)   # cum[i] = sum of the first i
+        self.cum_flow = np.zeros(capacity + 1)
+        self._max_pos: List[int] = []                 # positions of suffix-max candidates
+        self._max_val: List[float] = []               # strictly decreasing tardiness
+
+    def __len__(self) -> int:
+        return self.size
+
+    def add(self, end_time: float, tardiness: float, flow_time: float):
+        if self.size and end_time < self.end_time[self.size - 1]:
+            self._insert(end_time, tardiness, flow_time)
+            return
+        if self.size == len(self.end_time):
+            self._grow()
+        i = self.size
+        self.end_time[i] = end_time
+        self.cum_tardiness[i + 1] = self.cum_tardiness[i] + tardiness
+        self.cum_flow[i + 1] = self.cum_flow[i] + flow_time
+        self.size = i + 1
+        while self._max_val and self._max_val[-1] <= tardiness:
+            self._max_val.pop()
+            self._max_pos.pop()
+        self._max_pos.append(i)
+        self._max_val.append(tardiness)
+
+    def _grow(self):
+        capacity = len(self.end_time) * 2
+        for name, length in (('end_time', capacity), ('cum_tardiness', capacity + 1),
+                             ('cum_flow', capacity + 1)):
+            old = getattr(self, name)
+            new = np.zeros(length)
+            new[:len(old)] = old
+            setattr(self, name, new)
+
+    def _insert(self, end_time: float, tardiness: float, flow_time: float):
+        n = self.size
+        times = self.end_time[:n].tolist()
+        tard = np.diff(self.cum_tardiness[:n + 1]).tolist()
+        flow = np.diff(self.cum_flow[:n + 1]).tolist()
+        pos = bisect.bisect_right(times, end_time)
+        times.insert(pos, end_time)
+        tard.insert(pos, tardiness)
+        flow.insert(pos, flow_time)
+        self._reset(len(self.end_time) + 1)
+        for entry in zip(times, tard, flow):
+            self.add(*entry)
+
+    def trim(self, before: float):
+        """Forget completions that ended before `before`, keeping the capacity"""
+        start = self.start_of(before)
+        if start == 0:
+            return
+        n = self.size - start
+        self.end_time[:n] = self.end_time[start:self.size]
+        for cum in (self.cum_tardiness, self.cum_flow):
+            cum[:n + 1] = cum[start:self.size + 1] - cum[start]
+        self.size = n
+        k = bisect.bisect_left(self._max_pos, start)
+        self._max_pos = [pos - start for pos in self._max_pos[k:]]
+        self._max_val = self._max_val[k:]
+
+    # ------------------------------------------------------------------
+    # window queries
+    # ------------------------------------------------------------------
+    def start_of(self, since: float) -> int:
+        """Position of the first completion with end_time >= since"""
+        return int(np.searchsorted(self.end_time[:self.size], since, side='left'))
+
+    def window(self, since: Optional[float], duration: Optional[float] = None) -> Dict[str, float]:
+        """Aggregates over completions with end_time >= since (None: all of them)
+
+        duration (if given) is used as the throughput denominator.
+        """
+        start = self.start_of(since) if since is not None else 0
+        n = self.size
+        count = n - start
+        total_tardiness = float(self.cum_tardiness[n] - self.cum_tardiness[start])
+        total_flow = float(self.cum_flow[n] - self.cum_flow[start])
+        k = bisect.bisect_left(self._max_pos, start)
+        return {
+            'count': count,
+            'total_tardiness': total_tardiness,
+            'mean_tardiness': total_tardiness / count if count else 0,
+            'max_tardiness': self._max_val[k] if count else 0,
+            'total_flow_time': total_flow,
+            'mean_flow_time': total_flow / count if count else 0,
+            'throughput': count / duration if duration else 0,
+        }
+
+    def windows(self, now: float, durations: Iterable[float]) -> Dict[float, Dict[str, float]]:
+        """Aggregates for several trailing windows ending at now"""
+        return {duration: self.window(now - duration, duration) for duration in durations}
+
+    def last_end_time(self) -> float:
+        return float(self.end_time[self.size - 1]) if self.size else 0
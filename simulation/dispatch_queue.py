@@ -0,0 +1,395 @@
+import bisect
+import heapq
+import math
+import os
+from collections import deque
+from collections.abc import Sequence
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+from .job import Job
+
+
+class OrderedQueueView(Sequence):
+    """Read-only view of a DispatchQueue in the order of one rule
+
+    The view is live: it reflects the queue as it is when read, so callers
+    that need the order to survive later enqueues or dequeues copy it first.
+    If the queue has dropped the rule's sorted list since, reading rebuilds it.
+    """
+
+    __slots__ = ('_queue', '_rule')
+
+    def __init__(self, queue: 'DispatchQueue', rule: str):
+        self._queue = queue
+        self._rule = rule
+
+    def __len__(self) -> int:
+        return len(self._queue)
+
+    def __iter__(self):
+        queue = self._queue
+        ordered = queue._ordered_for(self._rule)
+        if ordered is None:
+            return iter(queue)
+        entries = queue._entries
+        return (entries[seq] for _, seq in ordered)
+
+    def __getitem__(self, index):
+        queue = self._queue
+        ordered = queue._ordered_for(self._rule)
+        if ordered is None:
+            return list(queue)[index]
+        if isinstance(index, slice):
+            return [queue._entries[seq] for _, seq in ordered[index]]
+        return queue._entries[ordered[index][1]]
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, (OrderedQueueView, list, tuple)):
+            return list(self) == list(other)
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"OrderedQueueView({self._rule}, jobs={[j.job_id for j in self]})"
+
+
+class DispatchQueue:
+    """Per-machine job queue with O(log n) selection for the sequencing rules
+
+    Jobs are kept in arrival order (a deque of sequence numbers) and, for the
+    rule currently in use, in a heap keyed by that rule. Removed jobs are
+    dropped lazily from the deque and the heap. Switching the rule rebuilds the
+    heap on the next selection rather than on every strategy update.
+
+    Ordered views (sorted()) are backed by one sorted list of (key, seq) per
+    rule, built the first time the rule is viewed and then kept up to date by
+    bisection on every enqueue and dequeue. Switching the active rule drops
+    the lists of the other rules, so only rules in use pay that upkeep.
+
+    The queue also keeps running aggregates of the jobs' processing times on
+    this machine (count, sum, sum of squares, and lazily built min/max heaps),
+    updated on every enqueue and dequeue. A queued job's current operation does
+    not change while it waits, so its processing time is fixed until removal.
+    With debug_aggregates set (or FJJSP_DEBUG_AGGREGATES=1), every aggregate
+    read is cross-checked against a full recompute.
+    """
+
+    RULES = ('SPT', 'LPT', 'EDD', 'FIS', 'FIFO')
+    debug_aggregates = os.environ.get("FJJSP_DEBUG_AGGREGATES") == "1"
+
+    def __init__(self, machine_id: int, jobs: Optional[Iterable[Job]] = None, rule: str = 'FIFO'):
+        self.machine_id = machine_id
+        self.rule = rule
+        self._entries: Dict[int, Job] = {}     # seq -> job, live jobs only
+        self._seq_of: Dict[int, int] = {}      # id(job) -> seq
+        self._order = deque()                  # seqs in queue order, may hold stale seqs
+        self._next_seq = 0
+        self._front_seq = 0
+        self._heap: List[Tuple] = []
+        self._heap_rule: Optional[str] = None
+        self._ordered: Dict[str, List[Tuple]] = {}   # rule -> sorted (key, seq) of live jobs
+        self._pt: Dict[int, float] = {}        # seq -> processing time, eligible jobs only
+        self._pt_sum = 0.0
+        self._pt_sq = 0.0
+        self._pt_min_heap: Optional[List[Tuple[float, int]]] = None
+        self._pt_max_heap: Optional[List[Tuple[float, int]]] = None
+        for job in jobs or ():
+            self.append(job)
+
+    def __reduce__(self):
+        return (self.__class__, (self.machine_id, list(self), self.rule))
+
+    # ------------------------------------------------------------------
+    # list-like interface used by Machine, WorkCenter and the coordinators
+    # ------------------------------------------------------------------
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __bool__(self) -> bool:
+        return bool(self._entries)
+
+    def __iter__(self):
+        entries = self._entries
+        for seq in self._order:
+            job = entries.get(seq)
+            if job is not None:
+                yield job
+
+    def __contains__(self, job: Job) -> bool:
+        return id(job) in self._seq_of
+
+    def __getitem__(self, index):
+        return list(self)[index]
+
+    def __repr__(self) -> str:
+        return f"DispatchQueue(machine_id={self.machine_id}, jobs={[j.job_id for j in self]})"
+
+    def append(self, job: Job):
+        seq = self._next_seq
+        self._next_seq += 1
+        self._add(seq, job)
+        self._order.append(seq)
+
+    def insert(self, index: int, job: Job):
+        """Insert a job; only the front of the queue (index 0) is supported in O(1)"""
+        if index != 0:
+            jobs = list(self)
+            jobs.insert(index, job)
+            self.clear()
+            for j in jobs:
+                self.append(j)
+            return
+        self._front_seq -= 1
+        seq = self._front_seq
+        self._add(seq, job)
+        self._order.appendleft(seq)
+
+    def remove(self, job: Job):
+        seq = self._seq_of.pop(id(job), None)
+        if seq is None:
+            raise ValueError("job is not in the dispatch queue")
+        self._unorder(seq, job)
+        del self._entries[seq]
+        self._forget_pt(seq)
+        self._compact()
+
+    def pop(self, index: int = -1) -> Job:
+        if not self._entries:
+            raise IndexError("pop from empty dispatch queue")
+        if index == 0:
+            return self.select('FIFO')
+        job = list(self)[index]
+        self.remove(job)
+        return job
+
+    def clear(self):
+        self._entries.clear()
+        self._seq_of.clear()
+        self._order.clear()
+        self._heap = []
+        self._heap_rule = None
+        self._pt.clear()
+        self._pt_sum = 0.0
+        self._pt_sq = 0.0
+        self._pt_min_heap = None
+        self._pt_max_heap = None
+        for ordered in self._ordered.values():
+            ordered.clear()
+
+    # ------------------------------------------------------------------
+    # rule handling
+    # ------------------------------------------------------------------
+    def set_rule(self, rule: str):
+        """Switch the active rule; the heap is re-keyed on the next select"""
+        self.rule = rule
+        for other in [r for r in self._ordered if r != rule]:
+            del self._ordered[other]
+
+    def select(self, rule: Optional[str] = None) -> Optional[Job]:
+        """Remove and return the next job under the given (or active) rule"""
+        if not self._entries:
+            return None
+        rule = rule if rule is not None else self.rule
+        if rule not in self.RULES or rule == 'FIFO':
+            return self._pop_fifo()
+
+        if self._heap_rule != rule:
+            self._rebuild_heap(rule)
+        entries = self._entries
+        heap = self._heap
+        while heap:
+            entry = heapq.heappop(heap)
+            seq = entry[-1]
+            job = entries.get(seq)
+            if job is not None:
+                self._discard(seq, job)
+                return job
+        return None
+
+    def peek(self, rule: Optional[str] = None) -> Optional[Job]:
+        """Return the next job under the given rule without removing it"""
+        if not self._entries:
+            return None
+        rule = rule if rule is not None else self.rule
+        if rule not in self.RULES or rule == 'FIFO':
+            for job in self:
+                return job
+        if self._heap_rule != rule:
+            self._rebuild_heap(rule)
+        heap = self._heap
+        while heap and heap[0][-1] not in self._entries:
+            heapq.heappop(heap)
+        return self._entries[heap[0][-1]] if heap else None
+
+    def sorted(self, rule: Optional[str] = None) -> Sequence:
+        """Read-only view of the queue ordered by rule (FIFO: queue order)"""
+        rule = rule if rule is not None else self.rule
+        if rule not in self.RULES or rule == 'FIFO':
+            return OrderedQueueView(self, 'FIFO')
+        self._ordered_for(rule)
+        return OrderedQueueView(self, rule)
+
+    # ------------------------------------------------------------------
+    # running aggregates over processing times on this machine
+    # ------------------------------------------------------------------
+    def workload(self) -> float:
+        """Sum of processing times of the queued jobs (ineligible jobs count as 0)"""
+        if self.debug_aggregates:
+            self.check_aggregates()
+        return self._pt_sum
+
+    def pt_count(self) -> int:
+        return len(self._pt)
+
+    def pt_sum_squares(self) -> float:
+        if self.debug_aggregates:
+            self.check_aggregates()
+        return self._pt_sq
+
+    def pt_min(self) -> Optional[float]:
+        if self._pt_min_heap is None:
+            self._pt_min_heap = [(pt, seq) for seq, pt in self._pt.items()]
+            heapq.heapify(self._pt_min_heap)
+        heap = self._pt_min_heap
+        while heap and heap[0][1] not in self._pt:
+            heapq.heappop(heap)
+        value = heap[0][0] if heap else None
+        if self.debug_aggregates:
+            self.check_aggregates()
+        return value
+
+    def pt_max(self) -> Optional[float]:
+        if self._pt_max_heap is None:
+            self._pt_max_heap = [(-pt, seq) for seq, pt in self._pt.items()]
+            heapq.heapify(self._pt_max_heap)
+        heap = self._pt_max_heap
+        while heap and heap[0][1] not in self._pt:
+            heapq.heappop(heap)
+        value = -heap[0][0] if heap else None
+        if self.debug_aggregates:
+            self.check_aggregates()
+        return value
+
+    def check_aggregates(self, rel_tol: float = 1e-9):
+        """Recompute every aggregate from the jobs and raise if one has drifted"""
+        times = [job.current_processing_time(self.machine_id) for job in self]
+        times = [pt for pt in times if pt is not None]
+        expected = {
+            'count': (len(times), len(self._pt)),
+            'sum': (math.fsum(times), self._pt_sum),
+            'sum_sq': (math.fsum(pt * pt for pt in times), self._pt_sq),
+        }
+        for name, (want, have) in expected.items():
+            if not math.isclose(want, have, rel_tol=rel_tol, abs_tol=1e-9):
+                raise RuntimeError(f"DispatchQueue {self.machine_id}: {name} aggregate is {have}, "
+                                   f"recomputed {want}")
+        if self._pt_min_heap is not None:
+            live = [pt for pt, seq in self._pt_min_heap if seq in self._pt]
+            if min(live, default=None) != min(times, default=None):
+                raise RuntimeError(f"DispatchQueue {self.machine_id}: min heap out of date")
+        if self._pt_max_heap is not None:
+            live = [-pt for pt, seq in self._pt_max_heap if seq in self._pt]
+            if max(live, default=None) != max(times, default=None):
+                raise RuntimeError(f"DispatchQueue {self.machine_id}: max heap out of date")
+
+    # ------------------------------------------------------------------
+    # internals
+    # ------------------------------------------------------------------
+    def _key_func(self, rule: str) -> Callable[[Job], float]:
+        machine_id = self.machine_id
+        if rule == 'SPT':
+            return lambda job: job.current_processing_time(machine_id)
+        if rule == 'LPT':
+            return lambda job: -job.current_processing_time(machine_id)
+        if rule == 'EDD':
+            return lambda job: job.due_date
+        return lambda job: job.job_id  # FIS
+
+    def _iter_entries(self):
+        entries = self._entries
+        for seq in self._order:
+            job = entries.get(seq)
+            if job is not None:
+                yield seq, job
+
+    def _ordered_for(self, rule: str) -> Optional[List[Tuple]]:
+        """Sorted (key, seq) list of a rule, built on demand (None for FIFO)"""
+        if rule not in self.RULES or rule == 'FIFO':
+            return None
+        ordered = self._ordered.get(rule)
+        if ordered is None:
+            key = self._key_func(rule)
+            ordered = self._ordered[rule] = sorted((key(job), seq) for seq, job in self._entries.items())
+        return ordered
+
+    def _rebuild_heap(self, rule: str):
+        key = self._key_func(rule)
+        self._heap = [(key(job), seq) for seq, job in self._entries.items()]
+        heapq.heapify(self._heap)
+        self._heap_rule = rule
+
+    def _add(self, seq: int, job: Job):
+        self._entries[seq] = job
+        self._seq_of[id(job)] = seq
+        if self._heap_rule is not None:
+            heapq.heappush(self._heap, (self._key_func(self._heap_rule)(job), seq))
+        for rule, ordered in self._ordered.items():
+            bisect.insort(ordered, (self._key_func(rule)(job), seq))
+        pt = job.current_processing_time(self.machine_id)
+        if pt is not None:
+            self._pt[seq] = pt
+            self._pt_sum += pt
+            self._pt_sq += pt * pt
+            if self._pt_min_heap is not None:
+                heapq.heappush(self._pt_min_heap, (pt, seq))
+            if self._pt_max_heap is not None:
+                heapq.heappush(self._pt_max_heap, (-pt, seq))
+
+    def _forget_pt(self, seq: int):
+        pt = self._pt.pop(seq, None)
+        if pt is None:
+            return
+        if self._pt:
+            self._pt_sum -= pt
+            self._pt_sq -= pt * pt
+        else:
+            # Reset exactly when the queue drains so rounding never accumulates
+            self._pt_sum = 0.0
+            self._pt_sq = 0.0
+
+    def _discard(self, seq: int, job: Job):
+        self._unorder(seq, job)
+        del self._entries[seq]
+        self._seq_of.pop(id(job), None)
+        self._forget_pt(seq)
+        self._compact()
+
+    def _unorder(self, seq: int, job: Job):
+        # A queued job's rule keys do not change while it waits, so its entry is found by bisection
+        for rule, ordered in self._ordered.items():
+            entry = (self._key_func(rule)(job), seq)
+            del ordered[bisect.bisect_left(ordered, entry)]
+
+    def _pop_fifo(self) -> Job:
+        entries = self._entries
+        order = self._order
+        while order:
+            seq = order.popleft()
+            job = entries.get(seq)
+            if job is not None:
+                self._discard(seq, job)
+                return job
+        return None
+
+    def _compact(self):
+        """Drop stale sequence numbers once they outnumber the live jobs"""
+        live = len(self._entries)
+        if len(self._order) > 2 * live + 32:
+            self._order = deque(seq for seq in self._order if seq in self._entries)
+        if len(self._heap) > 2 * live + 32:
+            self._heap = [e for e in self._heap if e[-1] in self._entries]
+            heapq.heapify(self._heap)
+        for name in ('_pt_min_heap', '_pt_max_heap'):
+            heap = getattr(self, name)
+            if heap is not None and len(heap) > 2 * len(self._pt) + 32:
+                heap = [e for e in heap if e[1] in self._pt]
+                heapq.heapify(heap)
+                setattr(self, name, heap)
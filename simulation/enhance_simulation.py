@@ -1,30 +1,52 @@
-import copy
 import simpy
 import random
+from .completion_index import CompletionIndex
+from .dispatch_queue import DispatchQueue
+from .environment import create_environment
 from .job_creator import JobCreator
+from .snapshot import ShopSnapshot
 from .workcenter import WorkCenter
+from state.feature_schema import FeatureSchema, WorkCenterStates
+from utils.tracing import DEBUG, get_tracer
+
+_trace = get_tracer("subsim")
+_reward_trace = get_tracer("reward")
 
 from typing import Dict, List, Optional
+import numpy as np
 
 class EnhancedSubSimulation:
     def __init__(self, main_coordinator, workcenter_strategies: Dict[int, str],
-                 duration=14400, current_time: int = 0):
+                 duration=14400, current_time: int = 0,
+                 snapshot: Optional[ShopSnapshot] = None, backend: Optional[str] = None):
         """
         Initialize enhanced sub-simulation with WorkCenter-level strategies
 
         Args:
-            main_coordinator: Reference to main training coordinator
+            main_coordinator: Reference to main training coordinator (may be None
+                when snapshot and backend are given, e.g. in a worker process)
             workcenter_strategies: Dict mapping WorkCenter ID to strategy name
             duration: Simulation duration in seconds (default 4 hours)
-            current_time: Current simulation time
+            current_time: Main simulation time the run starts from (informational:
+                snapshot times are relative, so the sub-simulation clock starts at 0)
+            snapshot: Shop state to fork from; taken from the main coordinator if omitted
+            backend: Simulation backend; defaults to the main coordinator's
         """
         self.main = main_coordinator
         self.workcenter_strategies = workcenter_strategies
         self.duration = duration
-        self.env = simpy.Environment()
+        self.backend = backend or self.main.backend
+        self.env = create_environment(self.backend)
         self.env.timeout(current_time)
         self.current_time = current_time
         self.machine_config = []
+        self._started = False
+
+        if snapshot is None:
+            snapshot = self.main.snapshot_shop_state()
+        completions = CompletionIndex()
+        forked_jobs, forked_queues = snapshot.fork(completions)
+        self.snapshot_jobs = len(forked_jobs)
 
         # Initialize metrics tracking[6]
         self.metrics = {
@@ -45,53 +67,52 @@ class EnhancedSubSimulation:
         self.workcenter_processing_counts = {}
 
         # Clone WorkCenters with new strategies
-        self.work_centers = self._clone_workcenters_with_strategies()
+        self.work_centers = self._clone_workcenters_with_strategies(forked_queues)
 
         # Create isolated job creator
         self.job_creator = JobCreator(
             self.env,
             self.work_centers,
-            num_work_centers=len(self.main.work_centers),
-            current_time=0
+            num_work_centers=len(self.work_centers),
+            current_time=0,
+            completions=completions
         )
 
         self._link_machines_to_jobcreator()
 
-        # Deep copy incomplete jobs from main simulation
-        self.job_creator.created_jobs = [
-            copy.deepcopy(job)
-            for job in self.main.job_creator.created_jobs
-            if not job.completion_status
-        ]
+        # Incomplete jobs from the snapshot, the same objects as in the queues
+        self.job_creator.created_jobs = forked_jobs
 
         # Capture initial states
         self._capture_initial_states()
 
-    def _clone_workcenters_with_strategies(self):
+    def _clone_workcenters_with_strategies(self, forked_queues: Dict[int, List[List]]):
         """Clone WorkCenters and apply WorkCenter-level strategies"""
         cloned_wcs = {}
         
         
-        for wc_id, original_wc in self.main.work_centers.items():
+        for wc_id, machine_queues in forked_queues.items():
             # Get strategy for this WorkCenter
             wc_strategy = self.workcenter_strategies.get(wc_id, "FIS")
 
-            self.machine_config.append(len(original_wc.machines))
+            self.machine_config.append(len(machine_queues))
 
             # Create new WorkCenter with the assigned strategy
             new_wc = WorkCenter(
                 self.env,
                 wc_id=wc_id,
-                num_machines=len(original_wc.machines),
+                num_machines=len(machine_queues),
                 strategy=wc_strategy  # WorkCenter-level strategy
             )
             
             # Clone machine queues from original WorkCenter
-            for idx, original_machine in enumerate(original_wc.machines):
+            for idx, queue in enumerate(machine_queues):
                 cloned_machine = new_wc.machines[idx]
-                cloned_machine.queue = [
-                    copy.deepcopy(job) for job in original_machine.queue
-                ]
+                cloned_machine.queue = DispatchQueue(
+                    cloned_machine.machine_id,
+                    queue,
+                    rule=wc_strategy,
+                )
                 # Ensure the cloned machine has the WorkCenter strategy[7]
                 cloned_machine.strategy = wc_strategy
 
@@ -103,25 +124,22 @@ class EnhancedSubSimulation:
 
         return cloned_wcs
 
+    def _capture_states(self, machine_states: Dict[int, Dict]) -> WorkCenterStates:
+        """Feature rows of every WorkCenter at env.now; fills machine_states by machine id"""
+        schema = FeatureSchema(max(self.machine_config))
+        wc_ids = sorted(self.work_centers)
+        features = np.empty((len(wc_ids), schema.width), dtype=np.float32)
+        for row, wc_id in zip(features, wc_ids):
+            wc = self.work_centers[wc_id]
+            machine_rows = wc.machine_features(self.env.now)
+            for machine, values in zip(wc.machines, machine_rows):
+                machine_states[machine.machine_id] = FeatureSchema.machine_state(values)
+            schema.pack(machine_rows, row)
+        return WorkCenterStates(wc_ids, features, schema)
+
     def _capture_initial_states(self):
         """Capture initial machine and WorkCenter states"""
-
-        for wc_id, wc in self.work_centers.items():
-            # Collect machine states for this WorkCenter
-            machine_states = []
-            for machine in wc.machines:
-                queue_sorted = machine.get_sorted_queue()
-                machine_state = wc.get_machine_state(machine, queue_sorted, self.env.now)
-                machine_states.append(machine_state)
-                self.initial_machine_states[machine.machine_id] = machine_state
-
-            # Combine first two machines' states (adjust as needed)
-            wc_state = wc.get_workcenter_states(machine_states,max(self.machine_config))
-
-            self.initial_workcenter_states[wc_id] = wc_state
-
-
-
+        self.initial_workcenter_states = self._capture_states(self.initial_machine_states)
 
     def _link_machines_to_jobcreator(self):
         """Connect all machines to the sub-simulation's job creator"""
@@ -129,19 +147,27 @@ class EnhancedSubSimulation:
             for machine in wc.machines:
                 machine.job_creator = self.job_creator
 
-    def run(self):
-        """Run the sub-simulation and capture final states"""
-        print(f"Running future-simulation to evaluate it over {self.workcenter_strategies} strategies")
+    def run(self, until: Optional[float] = None):
+        """Run the sub-simulation and capture final states
 
-        # Start processing on all machines
-        for wc in self.work_centers.values():
-            for machine in wc.machines:
-                if machine.queue:
-                   
-                    self.env.process(machine.process_jobs())
+        until defaults to the full duration. A shorter horizon stops early, and a
+        later call continues the same run (used by staged candidate evaluation).
+        """
+        until = self.duration if until is None else min(until, self.duration)
+        if _trace.debug:
+            _trace.emit(DEBUG, "run", strategies=self.workcenter_strategies, until=until)
+
+        # Start processing on all machines (only once; later calls resume the run)
+        if not self._started:
+            self._started = True
+            for wc in self.work_centers.values():
+                for machine in wc.machines:
+                    if machine.queue:
+                        machine.start()
 
         # Run simulation for specified duration
-        self.env.run(until=self.duration)
+        if until > self.env.now:
+            self.env.run(until=until)
 
         # Capture final states
         self._capture_final_states()
@@ -149,36 +175,82 @@ class EnhancedSubSimulation:
         # Calculate metrics
         self._calculate_metrics()
 
-        print(f"Sub-simulation complete. Metrics: {self.metrics}")
+        if _trace.debug:
+            _trace.emit(DEBUG, "complete", strategies=self.workcenter_strategies, metrics=self.metrics,
+                        events_per_hour=round(self.env.events_per_hour(), 1))
         return self.metrics
 
     def _capture_final_states(self):
         """Capture final machine and WorkCenter states after simulation"""
-        for wc_id, wc in self.work_centers.items():
-            # Capture final WorkCenter state
-
-            machine_states = []
-            # Capture final machine states and processing counts
+        self.final_workcenter_states = self._capture_states(self.final_machine_states)
+        for wc in self.work_centers.values():
+            # Store processing time counts for reward calculation
             for machine in wc.machines:
-                queue_sorted = machine.get_sorted_queue()
-
-                machine_state = wc.get_machine_state(machine, queue_sorted, self.env.now)
-
-                self.final_machine_states[machine.machine_id] = machine_state
-                machine_states.append(machine_state)
-                # Store processing time counts for reward calculation
-
                 self.machine_processing_counts[machine.machine_id] = {
                     'over_5min': machine.temp_upper,
                     'under_5min': machine.temp_lower
                 }
-           
-            self.final_workcenter_states[wc_id] = wc.get_workcenter_states(machine_states, max(self.machine_config))
 
 
 
 
 
+    def summary(self) -> 'SubSimulationSummary':
+        """Compact, picklable result of this run (metrics and final states only)
+
+        The dicts are copied, so a summary taken at a partial horizon stays
+        as it was when the run continues.
+        """
+        return SubSimulationSummary(
+            dict(self.metrics), self.final_workcenter_states,
+            dict(self.final_machine_states), dict(self.machine_processing_counts),
+            events_processed=self.env.events_processed)
+
+    def calculate_machine_reward(self, machine_id: int) -> float:
+        return self.summary().calculate_machine_reward(machine_id)
+
+    def calculate_workcenter_reward(self, wc_id: int) -> float:
+        return self.summary().calculate_workcenter_reward(wc_id)
+
+    def _calculate_metrics(self):
+        """Calculate simulation metrics"""
+
+        # Early on use every completed job, later those of the last 240 minutes
+        completed = self.job_creator.completions.window(
+            None if self.env.now < 240 else self.env.now - 240)
+        total_working = sum(
+            m.total_working_time
+            for wc in self.work_centers.values()
+            for m in wc.machines
+        )
+
+        total_machines = sum(len(wc.machines) for wc in self.work_centers.values())
+        horizon = self.env.now or self.duration
+
+        # Calculate tardiness metrics
+        if completed['count']:
+            self.metrics.update({
+                'total_tardiness': completed['total_tardiness'],
+                'mean_tardiness': completed['mean_tardiness'],
+                'jobs_completed': completed['count'],
+                'throughput': completed['count'] / (horizon/3600),
+                'utilization': total_working / (horizon * total_machines) if total_machines > 0 else 0,
+                'new_jobs_created': len(self.job_creator.created_jobs) - self.snapshot_jobs,
+            })
+
+
+class SubSimulationSummary:
+    """What the coordinator keeps from a sub-simulation: metrics, final states, rewards"""
+
+    def __init__(self, metrics: Dict, final_workcenter_states: WorkCenterStates,
+                 final_machine_states: Dict[int, Dict], machine_processing_counts: Dict[int, Dict],
+                 events_processed: int = 0):
+        self.metrics = metrics
+        self.final_workcenter_states = final_workcenter_states
+        self.final_machine_states = final_machine_states
+        self.machine_processing_counts = machine_processing_counts
+        self.events_processed = events_processed
+
     def calculate_machine_reward(self, machine_id: int) -> float:
         """Calculate reward using the new proportional cost function"""
         mean_tardiness = self.metrics.get('mean_tardiness', 0)
@@ -201,7 +273,6 @@ class EnhancedSubSimulation:
         """Calculate WorkCenter-level reward"""
         mean_tardiness = self.metrics.get('mean_tardiness', 0)
         wc_state = self.final_workcenter_states.get(wc_id, {})
-        print(f"workcenter ID: {wc_id}" )
         if wc_id == 1:
           count1 = self.machine_processing_counts.get(1, {'over_5min': 0, 'under_5min': 0})
           count2 = self.machine_processing_counts.get(2, {'over_5min': 0, 'under_5min': 0})
@@ -224,49 +295,30 @@ class EnhancedSubSimulation:
         else:
             cost = mean_tardiness + 0.25 * (nlong / ntotal) + 0.75 * (nshort / ntotal)
 
-        print(f"reward Calulation for workcenter {wc_id}")
-        print("processed jobs count: ",self.machine_processing_counts)
-        print("cost :-",cost)
+        if _reward_trace.debug:
+            _reward_trace.emit(DEBUG, "workcenter_cost", wc=wc_id, cost=cost,
+                               counts=self.machine_processing_counts)
 
 
         return cost
 
-    def _calculate_metrics(self):
-        """Calculate simulation metrics"""
-
-        if self.env.now < 240:
-            print("using privious jobs ")
-            # During early simulation, use only completed jobs
-            completed_jobs = [
-                job for job in self.job_creator.created_jobs
-                if job.completion_status
-            ]
-        else:
-            print("Using recent jobs ")
-            # Use jobs completed in the last 240 minutes
-            completed_jobs = [
-                job for job in self.job_creator.created_jobs
-                if job.completion_status and job.end_time >= self.env.now - 240
-            ]
-        total_working = sum(
-            m.total_working_time
-            for wc in self.work_centers.values()
-            for m in wc.machines
-        )
-
-        total_machines = sum(len(wc.machines) for wc in self.work_centers.values())
 
-        # Calculate tardiness metrics
-        if completed_jobs:
-            tardiness_values = [j.calculate_tardiness() for j in completed_jobs]
-            self.metrics.update({
-                'total_tardiness': sum(tardiness_values),
-                'mean_tardiness': sum(tardiness_values) / len(tardiness_values),
-                'jobs_completed': len(completed_jobs),
-                'throughput': len(completed_jobs) / (self.duration/3600),
-                'utilization': total_working / (self.duration * total_machines) if total_machines > 0 else 0,
-                'new_jobs_created': len([
-                    j for j in self.job_creator.created_jobs
-                    if j.start_time >= self.current_time
-                ])
-            })
+def evaluate_candidate(snapshot: ShopSnapshot, workcenter_strategies: Dict[int, str],
+                       duration: float, current_time: float, seed: int,
+                       backend: str = "simpy") -> SubSimulationSummary:
+    """Run one strategy candidate from a snapshot with its own seed
+
+    Module-level so it can be sent to a process pool. The global random state
+    is restored afterwards, so running candidates in-process or in workers
+    leaves the main simulation on the same random stream.
+    """
+    state = random.getstate()
+    random.seed(seed)
+    try:
+        sub_sim = EnhancedSubSimulation(
+            None, workcenter_strategies, duration=duration,
+            current_time=current_time, snapshot=snapshot, backend=backend)
+        sub_sim.run()
+        return sub_sim.summary()
+    finally:
+        random.setstate(state)
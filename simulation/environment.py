@@ -0,0 +1,59 @@
+import simpy
+
+# Simulation time is measured in minutes (see Machine.shift_duration)
+TIME_UNITS_PER_HOUR = 60
+
+
+class CountingEnvironment(simpy.Environment):
+    """SimPy environment that counts the events it processes"""
+
+    def __init__(self, initial_time: float = 0):
+        super().__init__(initial_time)
+        self.events_processed = 0
+        self._window_start_time = initial_time
+        self._window_start_events = 0
+
+    # Process entry points shared with the event kernel backend
+    def start_arrivals(self, job_creator):
+        return self.process(job_creator.create_jobs())
+
+    def start_breakdowns(self, machine):
+        return self.process(machine.breakdown_process())
+
+    def start_dispatch(self, machine):
+        return self.process(machine.process_jobs())
+
+    def step(self):
+        super().step()
+        self.events_processed += 1
+
+    def events_per_hour(self, since_window: bool = False) -> float:
+        """Return processed events per simulated hour
+
+        Args:
+            since_window: Only count events since the last call to reset_window()
+        """
+        start_time = self._window_start_time if since_window else 0
+        start_events = self._window_start_events if since_window else 0
+        elapsed_hours = (self.now - start_time) / TIME_UNITS_PER_HOUR
+        if elapsed_hours <= 0:
+            return 0.0
+        return (self.events_processed - start_events) / elapsed_hours
+
+    def reset_window(self):
+        """Start a new measurement window at the current simulation time"""
+        self._window_start_time = self.now
+        self._window_start_events = self.events_processed
+
+
+BACKENDS = ('simpy', 'kernel')
+
+
+def create_environment(backend: str = 'simpy', initial_time: float = 0):
+    """Return a simulation environment for the requested backend"""
+    if backend == 'simpy':
+        return CountingEnvironment(initial_time)
+    if backend == 'kernel':
+        from .event_kernel import EventKernel
+        return EventKernel(initial_time)
+    raise ValueError(f"Unknown simulation backend '{backend}', expected one of {BACKENDS}")
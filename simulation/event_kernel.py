@@ -0,0 +1,173 @@
+import heapq
+from typing import Callable, List, Tuple
+
+from .environment import TIME_UNITS_PER_HOUR
+from utils.tracing import DEBUG, get_tracer
+
+_trace = get_tracer("kernel")
+
+# Same ordering rules as SimPy: (time, priority, insertion order)
+URGENT = 0
+NORMAL = 1
+
+
+class _DispatchLoop:
+    """Handle for a machine's dispatch loop, mirrors simpy.Process.is_alive"""
+
+    def __init__(self, machine):
+        self.machine = machine
+        self.is_alive = True
+
+
+class _WakeEvent:
+    """Stand-in for the SimPy event an idle machine waits on"""
+
+    def __init__(self, kernel: 'EventKernel', loop: _DispatchLoop):
+        self.kernel = kernel
+        self.loop = loop
+        self.triggered = False
+
+    def succeed(self):
+        self.triggered = True
+        self.kernel.schedule(0, NORMAL, self.kernel._dispatch, self.loop)
+
+
+class EventKernel:
+    """Compact heap-based discrete-event kernel for the job shop model
+
+    Drives the same Machine and JobCreator step methods as the SimPy processes,
+    but with four plain event types on one heap: arrival, dispatch, finish and
+    breakdown (plus the setup and repair completions that follow them). Events
+    are ordered exactly like SimPy orders them, so a fixed seed gives the same
+    trajectory on both backends.
+    """
+
+    def __init__(self, initial_time: float = 0):
+        self.now = initial_time
+        self._queue: List[Tuple[float, int, int, Callable, tuple]] = []
+        self._eid = 0
+        self.events_processed = 0
+        self._window_start_time = initial_time
+        self._window_start_events = 0
+
+    # ------------------------------------------------------------------
+    # scheduling
+    # ------------------------------------------------------------------
+    def schedule(self, delay: float, priority: int, handler: Callable, *args):
+        heapq.heappush(self._queue, (self.now + delay, priority, self._eid, handler, args))
+        self._eid += 1
+
+    def timeout(self, delay: float):
+        """No-op timeout, kept for API compatibility with simpy.Environment"""
+        return None
+
+    def run(self, until: float):
+        if until <= self.now:
+            raise ValueError(f'until(={until}) must be > the current simulation time')
+        queue = self._queue
+        pop = heapq.heappop
+        while queue and queue[0][0] < until:
+            self.now, _, _, handler, args = pop(queue)
+            handler(*args)
+            self.events_processed += 1
+        self.now = until
+
+    # ------------------------------------------------------------------
+    # process entry points (same interface as CountingEnvironment)
+    # ------------------------------------------------------------------
+    def start_arrivals(self, job_creator):
+        self.schedule(0, URGENT, self._schedule_arrival, job_creator)
+
+    def start_breakdowns(self, machine):
+        self.schedule(0, URGENT, self._schedule_breakdown, machine)
+
+    def start_dispatch(self, machine):
+        loop = _DispatchLoop(machine)
+        self.schedule(0, URGENT, self._dispatch_loop, loop)
+        return loop
+
+    # ------------------------------------------------------------------
+    # arrival events
+    # ------------------------------------------------------------------
+    def _schedule_arrival(self, job_creator):
+        self.schedule(job_creator.next_interarrival_time(), NORMAL, self._arrival, job_creator)
+
+    def _arrival(self, job_creator):
+        job_creator.release_job()
+        self._schedule_arrival(job_creator)
+
+    # ------------------------------------------------------------------
+    # dispatch and finish events
+    # ------------------------------------------------------------------
+    def _dispatch_loop(self, loop: _DispatchLoop):
+        """Top of Machine.process_jobs: stop before warm-up, otherwise dispatch"""
+        machine = loop.machine
+        if not machine.dispatch_open():
+            loop.is_alive = False
+            return
+        if machine.is_idle == True and _trace.debug:
+            _trace.emit(DEBUG, "start", machine=machine.machine_id, time=self.now)
+        self._dispatch(loop)
+
+    def _dispatch(self, loop: _DispatchLoop):
+        machine = loop.machine
+        if not machine.queue:
+            machine.is_idle = True
+            machine.wake_event = _WakeEvent(self, loop)
+            return
+        machine.wake_event = None
+
+        job = machine.select_next_job()
+        if job.current_processing_time(machine.machine_id) is None:
+            self._dispatch_loop(loop)
+            return
+        setup_duration = machine.get_setup_duration(job)
+        if setup_duration is not None:
+            self.schedule(setup_duration, NORMAL, self._setup_done, loop, job, setup_duration)
+            return
+        # Resource request granted in the same time step, as in SimPy
+        self.schedule(0, NORMAL, self._begin, loop, job)
+
+    def _setup_done(self, loop: _DispatchLoop, job, setup_duration: float):
+        loop.machine.end_setup(setup_duration)
+        self.schedule(0, NORMAL, self._begin, loop, job)
+
+    def _begin(self, loop: _DispatchLoop, job):
+        start_time, processing_time = loop.machine.begin_operation(job)
+        self.schedule(processing_time, NORMAL, self._finish, loop, job, start_time, processing_time)
+
+    def _finish(self, loop: _DispatchLoop, job, start_time: float, processing_time: float):
+        loop.machine.end_operation(job, start_time, processing_time)
+        self._dispatch_loop(loop)
+
+    # ------------------------------------------------------------------
+    # breakdown events
+    # ------------------------------------------------------------------
+    def _schedule_breakdown(self, machine):
+        self.schedule(machine.next_breakdown_delay(), NORMAL, self._breakdown, machine)
+
+    def _breakdown(self, machine):
+        repair_duration = machine.begin_breakdown()
+        if repair_duration is None:
+            self._schedule_breakdown(machine)
+        else:
+            self.schedule(repair_duration, NORMAL, self._repair_done, machine, repair_duration)
+
+    def _repair_done(self, machine, repair_duration: float):
+        machine.end_breakdown(repair_duration)
+        self._schedule_breakdown(machine)
+
+    # ------------------------------------------------------------------
+    # event accounting (same interface as CountingEnvironment)
+    # ------------------------------------------------------------------
+    def events_per_hour(self, since_window: bool = False) -> float:
+        start_time = self._window_start_time if since_window else 0
+        start_events = self._window_start_events if since_window else 0
+        elapsed_hours = (self.now - start_time) / TIME_UNITS_PER_HOUR
+        if elapsed_hours <= 0:
+            return 0.0
+        return (self.events_processed - start_events) / elapsed_hours
+
+    def reset_window(self):
+        self._window_start_time = self.now
+        self._window_start_events = self.events_processed
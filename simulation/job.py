@@ -1,75 +1,252 @@
-
 import simpy
 from typing import List, Dict, Optional, Callable, Tuple
+from .job_table import JobTable
+
+
+class OperationTimes:
+    """Read-only {machine_id: processing_time} view of one operation"""
+    __slots__ = ('table', 'row', 'op')
+
+    def __init__(self, table: JobTable, row: int, op: int):
+        self.table = table
+        self.row = row
+        self.op = op
+
+    def __getitem__(self, machine_id: int) -> float:
+        value = self.table.processing_time_on(self.row, self.op, machine_id)
+        if value is None:
+            raise KeyError(machine_id)
+        return value
+
+    def __contains__(self, machine_id: int) -> bool:
+        return self.table.processing_time_on(self.row, self.op, machine_id) is not None
+
+    def get(self, machine_id: int, default=None):
+        value = self.table.processing_time_on(self.row, self.op, machine_id)
+        return default if value is None else value
+
+    def _as_dict(self) -> Dict[int, float]:
+        return self.table.operation_times_of(self.row, self.op)
+
+    def keys(self):
+        return self._as_dict().keys()
+
+    def values(self):
+        return self._as_dict().values()
+
+    def items(self):
+        return self._as_dict().items()
+
+    def __iter__(self):
+        return iter(self._as_dict())
+
+    def __len__(self) -> int:
+        return len(self._as_dict())
+
+    def __eq__(self, other) -> bool:
+        return self._as_dict() == (other._as_dict() if isinstance(other, OperationTimes) else other)
+
+    def __repr__(self) -> str:
+        return repr(self._as_dict())
+
+
+class ProcessingTimes:
+    """Read-only list-of-dicts view of a job's processing times"""
+    __slots__ = ('table', 'row')
+
+    def __init__(self, table: JobTable, row: int):
+        self.table = table
+        self.row = row
+
+    def __len__(self) -> int:
+        return int(self.table.num_ops[self.row])
+
+    def __getitem__(self, op):
+        if isinstance(op, slice):
+            return [self[i] for i in range(*op.indices(len(self)))]
+        if op < 0:
+            op += len(self)
+        if not 0 <= op < len(self):
+            raise IndexError("operation index out of range")
+        return OperationTimes(self.table, self.row, op)
+
+    def __iter__(self):
+        return (OperationTimes(self.table, self.row, op) for op in range(len(self)))
+
+    def __repr__(self) -> str:
+        return repr(self.table.processing_times_of(self.row))
+
+
+# Jobs created without a table share this one instead of each getting its own
+_STANDALONE_TABLE: Optional[JobTable] = None
+
+
+def _standalone_table() -> JobTable:
+    global _STANDALONE_TABLE
+    if _STANDALONE_TABLE is None:
+        _STANDALONE_TABLE = JobTable()
+    return _STANDALONE_TABLE
 
 
 class Job:
+    """Thin view over one row of a JobTable"""
+    __slots__ = ('table', 'row')
 
     def __init__(self, job_id: int, typ: int, routing: List[int],
                  processing_time: List[Dict[int, int]], due_date: Optional[int] = None,
                  # Remove this parameter: all_work_centers: Optional[Dict[int, 'WorkCenter']] = None,
+                 table: Optional[JobTable] = None,
                  ):
+        if table is None:
+            table = _standalone_table()
+        self.table = table
+        self.row = table.add(job_id, typ, routing, processing_time, due_date)
+
+    @classmethod
+    def from_row(cls, table: JobTable, row: int) -> 'Job':
+        job = cls.__new__(cls)
+        job.table = table
+        job.row = row
+        return job
+
+    def __deepcopy__(self, memo):
+        # Detach the row into its own table instead of copying the shared one
+        table = JobTable(self.table.machine_ids, self.table.max_ops, capacity=1)
+        return Job.from_row(table, self.table.copy_row(self.row, table))
+
+    def __repr__(self) -> str:
+        return f"Job(job_id={self.job_id}, typ={self.typ}, op={self.current_op_idx}/{self.num_operations})"
+
+    # ------------------------------------------------------------------
+    # column-backed attributes
+    # ------------------------------------------------------------------
+    @property
+    def job_id(self) -> int:
+        return int(self.table.job_id[self.row])
+
+    @property
+    def typ(self) -> int:
+        return int(self.table.typ[self.row])
+
+    @property
+    def routing(self) -> List[int]:
+        return self.table.routing_of(self.row)
+
+    @property
+    def processing_time(self) -> ProcessingTimes:
+        return ProcessingTimes(self.table, self.row)
+
+    @property
+    def num_operations(self) -> int:
+        return int(self.table.num_ops[self.row])
+
+    @property
+    def current_op_idx(self) -> int:
+        return int(self.table.current_op[self.row])
+
+    @current_op_idx.setter
+    def current_op_idx(self, value: int):
+        self.table.current_op[self.row] = value
 
-        self.job_id = job_id
-        self.routing = routing
-        self.processing_time = processing_time
-        self.current_op_idx = 0
-        self.start_time = None
-        self.end_time = None
-        self.due_date = due_date
-        self.completion_status = False
-        self.operation_times = []
-        # Remove this line: self.all_work_centers = all_work_centers
-        # self.routing_agent = routing_agent
-        self.completion_callbacks = []
-        self.expected_slack = []
-        self.actual_slack = []
-        self.typ = typ
-        self.rework = False
+    @property
+    def due_date(self) -> Optional[float]:
+        return JobTable.get_float(self.table.due_date, self.row)
 
+    @property
+    def start_time(self) -> Optional[float]:
+        return JobTable.get_float(self.table.start_time, self.row)
 
+    @start_time.setter
+    def start_time(self, value: Optional[float]):
+        self.table.start_time[self.row] = float('nan') if value is None else value
 
-    def add_completion_callback(self, callback: Callable):
-        self.completion_callbacks.append(callback)
+    @property
+    def end_time(self) -> Optional[float]:
+        return JobTable.get_float(self.table.end_time, self.row)
 
+    @end_time.setter
+    def end_time(self, value: Optional[float]):
+        self.table.end_time[self.row] = float('nan') if value is None else value
+
+    @property
+    def completion_status(self) -> bool:
+        return bool(self.table.completed[self.row])
+
+    @completion_status.setter
+    def completion_status(self, value: bool):
+        self.table.completed[self.row] = value
+
+    @property
+    def operation_times(self) -> List[Dict]:
+        table, row = self.table, self.row
+        recorded = []
+        for op in range(self.num_operations):
+            if table.op_machine[row, op] < 0:
+                break
+            recorded.append({
+                'start': JobTable.get_float(table.op_start[row], op),
+                'wc_id': int(table.op_wc[row, op]),
+                'machine_id': int(table.op_machine[row, op]),
+                'end': JobTable.get_float(table.op_end[row], op),
+            })
+        return recorded
+
+    # ------------------------------------------------------------------
+    # fast accessors for the simulation hot paths
+    # ------------------------------------------------------------------
+    def current_processing_time(self, machine_id: int) -> Optional[float]:
+        """Processing time of the current operation on machine_id (None if ineligible)"""
+        table = self.table
+        col = table.machine_col.get(machine_id)
+        if col is None:
+            return None
+        value = table.pt[self.row, table.current_op[self.row], col]
+        return None if value != value else float(value)
+
+    def current_workcenter(self) -> int:
+        return int(self.table.routing[self.row, self.table.current_op[self.row]])
+
+    def remaining_work(self, start_op: int) -> float:
+        """Sum of all eligible processing times from operation start_op onward"""
+        return self.table.remaining_work(self.row, start_op)
+
+    # ------------------------------------------------------------------
+    # behaviour
+    # ------------------------------------------------------------------
     def notify_completion(self):
-        return self.current_op_idx >= len(self.routing)
+        return self.current_op_idx >= self.num_operations
 
     def get_current_operation_options(self) -> Tuple[List[int], Dict[int, int]]:
-        if self.current_op_idx < len(self.routing):
-            return [self.routing[self.current_op_idx]], self.processing_time[self.current_op_idx]
+        if self.current_op_idx < self.num_operations:
+            return [self.current_workcenter()], self.processing_time[self.current_op_idx]
         return [], {}
 
     def get_next_op(self):
-        if self.current_op_idx < len(self.routing):
+        if self.current_op_idx < self.num_operations:
             return self.current_op_idx + 1
         else:
             return -1
 
     def is_completed(self) -> bool:
-        return self.current_op_idx >= len(self.routing)
+        return bool(self.table.current_op[self.row] >= self.table.num_ops[self.row])
 
     def record_operation_start(self, time: float, wc_id: int, machine_id: int):
-
-        if len(self.operation_times) <= self.current_op_idx:
-            self.operation_times.append({
-                'start': time,
-                'wc_id': wc_id,
-                'machine_id': machine_id,
-                'end': None
-            })
-        else:
-            self.operation_times[self.current_op_idx]['start'] = time
-            self.operation_times[self.current_op_idx]['wc_id'] = wc_id
-            self.operation_times[self.current_op_idx]['machine_id'] = machine_id
+        table, row, op = self.table, self.row, self.current_op_idx
+        table.op_start[row, op] = time
+        table.op_wc[row, op] = wc_id
+        table.op_machine[row, op] = machine_id
 
     def record_operation_end(self, time: float):
-        if self.current_op_idx < len(self.operation_times):
-            self.operation_times[self.current_op_idx]['end'] = time
-        self.current_op_idx += 1
-        if self.current_op_idx >= len(self.routing):
-            self.end_time = time
-            self.completion_status = True
+        table, row = self.table, self.row
+        op = table.current_op[row]
+        if op < table.num_ops[row] and table.op_machine[row, op] >= 0:
+            table.op_end[row, op] = time
+        table.current_op[row] = op + 1
+        if op + 1 >= table.num_ops[row]:
+            table.end_time[row] = time
+            table.completed[row] = True
+            if table.completions is not None:
+                table.completions.add(time, self.calculate_tardiness(), self.calculate_flow_time())
             # print(f"-------------------Job {self.job_id} Has completed all of its Operation ")
             self.notify_completion()
 
@@ -90,4 +267,3 @@ class Job:
             for ops in self.processing_time[self.current_op_idx+1:]
         )
         return self.due_date - (current_time + remaining_pt)
-
@@ -0,0 +1,102 @@
+import os
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from .job_table import JobTable
+
+
+class JobArchive:
+    """Streaming aggregates over completed jobs, with an optional columnar spill
+
+    JobCreator.archive_completed() hands finished rows here before dropping
+    them from the live lists, so totals and maxima of tardiness and flow time,
+    makespan and per-type counts survive at O(1) memory. With a path, the rows
+    are also buffered and written as one .npz file of columns per chunk
+    (completed_00000.npz, ...), readable with JobArchive.load(path).
+    """
+
+    COLUMNS = ('job_id', 'typ', 'num_ops', 'due_date', 'start_time', 'end_time',
+               'routing', 'op_start', 'op_end', 'op_machine', 'op_wc')
+
+    def __init__(self, path: Optional[str] = None, chunk_rows: int = 4096):
+        self.path = path
+        self.chunk_rows = max(1, chunk_rows)
+        self.count = 0
+        self.total_tardiness = 0.0
+        self.max_tardiness = 0.0
+        self.total_flow_time = 0.0
+        self.makespan = 0.0
+        self.type_counts: Dict[int, int] = {}
+        self.chunks_written = 0
+        self._pending: List[Dict[str, np.ndarray]] = []
+        self._pending_rows = 0
+        if path:
+            os.makedirs(path, exist_ok=True)
+
+    def __len__(self) -> int:
+        return self.count
+
+    def add(self, table: JobTable, rows: np.ndarray):
+        """Fold completed rows of table into the aggregates (and the spill buffer)"""
+        rows = np.asarray(rows, dtype=np.int64)
+        if not len(rows):
+            return
+        tardiness = table.tardiness(rows)
+        flow = table.flow_time(rows)
+        self.count += len(rows)
+        self.total_tardiness += float(tardiness.sum())
+        self.max_tardiness = max(self.max_tardiness, float(tardiness.max()))
+        self.total_flow_time += float(flow.sum())
+        self.makespan = max(self.makespan, float(np.nanmax(table.end_time[rows])))
+        types, counts = np.unique(table.typ[rows], return_counts=True)
+        for typ, n in zip(types.tolist(), counts.tolist()):
+            self.type_counts[typ] = self.type_counts.get(typ, 0) + n
+        if self.path:
+            self._pending.append({name: getattr(table, name)[rows] for name in self.COLUMNS})
+            self._pending_rows += len(rows)
+            if self._pending_rows >= self.chunk_rows:
+                self.flush()
+
+    def flush(self):
+        """Write buffered rows to the next chunk file"""
+        if not self.path or not self._pending:
+            return
+        columns = self._concat(self._pending)
+        filename = os.path.join(self.path, f"completed_{self.chunks_written:05d}.npz")
+        np.savez(filename, **columns)
+        self.chunks_written += 1
+        self._pending = []
+        self._pending_rows = 0
+
+    def summary(self) -> Dict[str, float]:
+        return {
+            'count': self.count,
+            'total_tardiness': self.total_tardiness,
+            'mean_tardiness': self.total_tardiness / self.count if self.count else 0,
+            'max_tardiness': self.max_tardiness,
+            'total_flow_time': self.total_flow_time,
+            'mean_flow_time': self.total_flow_time / self.count if self.count else 0,
+            'makespan': self.makespan,
+        }
+
+    @classmethod
+    def load(cls, path: str) -> Dict[str, np.ndarray]:
+        """Concatenate every chunk under path into one dict of columns"""
+        files = sorted(f for f in os.listdir(path) if f.startswith('completed_') and f.endswith('.npz'))
+        chunks = [np.load(os.path.join(path, f)) for f in files]
+        return cls._concat(chunks) if chunks else {}
+
+    @classmethod
+    def _concat(cls, chunks) -> Dict[str, np.ndarray]:
+        # Per-operation columns may differ in width between chunks; pad to the widest
+        width = max(chunk['routing'].shape[1] for chunk in chunks)
+        columns = {}
+        for name in cls.COLUMNS:
+            parts = [chunk[name] for chunk in chunks]
+            if parts[0].ndim == 2:
+                fill = np.nan if parts[0].dtype.kind == 'f' else -1
+                parts = [np.pad(p, ((0, 0), (0, width - p.shape[1])), constant_values=fill)
+                         for p in parts]
+            columns[name] = np.concatenate(parts)
+        return columns
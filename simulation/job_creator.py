@@ -1,17 +1,24 @@
 import simpy
 import random
 from typing import Dict, Optional
+from .completion_index import CompletionIndex
 from .job import Job
+from .job_archive import JobArchive
+from .job_table import JobTable
 from .workcenter import WorkCenter
+from utils.tracing import DEBUG, get_tracer
 # from routing_agent import DRLAwareRoutingAgent      
 
+_trace = get_tracer("routing")
+
 
 
 class JobCreator:
     def __init__(self, env: simpy.Environment, work_centers: Dict[int, 'WorkCenter'],
                  num_work_centers: int, target_utilization: float = 1.02,
                  current_time: int = 0,
-                 processing_distributions: Optional[Dict[int, Dict]] = None):
+                 processing_distributions: Optional[Dict[int, Dict]] = None,
+                 completions: Optional[CompletionIndex] = None):
         self.env = env
         self.work_centers = work_centers
         self.num_work_centers = num_work_centers
@@ -19,8 +26,18 @@ class JobCreator:
         self.job_counter = 0
         # self.rng = random.seed(2)
         self.created_jobs = []
+        # Columnar storage backing every Job this creator generates
+        self.job_table = JobTable(
+            machine_ids=[m.machine_id for wc in work_centers.values() for m in wc.machines],
+            max_ops=num_work_centers,
+        )
+        # End-time index of every completion, for O(log n) window metrics
+        self.completions = completions if completions is not None else CompletionIndex()
+        self.job_table.completions = self.completions
+        # Long-horizon mode: completed jobs are folded in here and dropped (see archive_completed)
+        self.archive: Optional[JobArchive] = None
         # self.routing_agent = routing_agent
-        self.env.process(self.create_jobs())
+        self.env.start_arrivals(self)
         self.collect =  True
         self.processing_distributions = processing_distributions or {}
 
@@ -49,34 +66,80 @@ class JobCreator:
         high = cfg.get("high", 6.0)
         return random.uniform(low, high)
 
+    def completed_count(self) -> int:
+        """Completed jobs, archived ones included"""
+        archived = self.archive.count if self.archive is not None else 0
+        return archived + sum(1 for job in self.created_jobs if job.completion_status)
+
+    def created_count(self) -> int:
+        return self.job_counter
+
+    def archive_completed(self, keep_window: Optional[float] = None) -> int:
+        """Fold completed jobs into the archive and drop them from the live state
+
+        The job table is compacted to the open jobs, whose Job views (shared with
+        the machine queues) are rebound to it. With keep_window, completions
+        older than now - keep_window are also trimmed from the completion index.
+        Returns the number of jobs archived.
+        """
+        if self.archive is None:
+            self.archive = JobArchive()
+        table = self.job_table
+        live = [job for job in self.created_jobs if not job.completion_status]
+        done = len(self.created_jobs) - len(live)
+        if done:
+            self.archive.add(table, table.completed_rows())
+            if live:
+                compact = table.take([job.row for job in live])
+            else:
+                compact = JobTable(table.machine_ids, table.max_ops)
+            compact.completions = self.completions
+            for row, job in enumerate(live):
+                job.table = compact
+                job.row = row
+            self.job_table = compact
+            self.created_jobs = live
+        if keep_window is not None:
+            self.completions.trim(self.env.now - keep_window)
+        return done
+
     def create_jobs(self):
         while True:
-            # Estimate mean processing time from provided distributions
-            mean_processing_time = sum(self._dist_mean(wc_id) for wc_id in range(1, self.num_work_centers + 1)) / self.num_work_centers
-            mean_operations = 3
-            total_machines = sum(len(wc.machines) for wc in self.work_centers.values())
+            yield self.env.timeout(self.next_interarrival_time())
+            self.release_job()
+
+    # Arrival steps shared by the SimPy process above and the event kernel
+    def next_interarrival_time(self) -> float:
+        # Estimate mean processing time from provided distributions
+        mean_processing_time = sum(self._dist_mean(wc_id) for wc_id in range(1, self.num_work_centers + 1)) / self.num_work_centers
+        mean_operations = 3
+        total_machines = sum(len(wc.machines) for wc in self.work_centers.values())
+
+        arrival_rate = 0.9*(self.target_utilization * total_machines) / \
+                      (mean_processing_time * mean_operations)
+        inter_arrival_time = max(0.01, random.expovariate(arrival_rate))
+        # inter_arrival_time = max(0.01, random.expovariate(0.533))
+        # inter_arrival_time = random.expovariate(0.533)
+        # inter_arrival_time  = 1/0.5
+        return inter_arrival_time
 
-            arrival_rate = 0.9*(self.target_utilization * total_machines) / \
-                          (mean_processing_time * mean_operations)
-            inter_arrival_time = max(0.01, random.expovariate(arrival_rate))
-            # inter_arrival_time = max(0.01, random.expovariate(0.533))
-            # inter_arrival_time = random.expovariate(0.533)
-            # inter_arrival_time  = 1/0.5
-            yield self.env.timeout(inter_arrival_time)
-            job = self.generate_random_job()
-            job.start_time = self.env.now
-            self.created_jobs.append(job)
-            self.route_job(job)
+    def release_job(self) -> Job:
+        job = self.generate_random_job()
+        job.start_time = self.env.now
+        self.created_jobs.append(job)
+        self.route_job(job)
+        return job
 
 
 
     def route_job(self, job):
-        if job.current_op_idx >= len(job.routing):
-            print(f"-------------------------------Job {job.job_id} has completed all operations----------------------")
+        if job.is_completed():
+            if _trace.debug:
+                _trace.emit(DEBUG, "job_completed", job=job.job_id, time=self.env.now)
             return -1
         # if job.completion_status : print(f"-------------------------------Job {job.job_id} has completed all operations----------------------")
 
-        selected_wc = job.routing[job.current_op_idx]
+        selected_wc = job.current_workcenter()
 
 
         # print(f"Processing Job ID {self.job_id} operation {self.current_op_idx} at WC({selected_wc}) ")
@@ -148,4 +211,5 @@ class JobCreator:
             due_date=due_date,
             # Remove this line: all_work_centers=self.work_centers,
             # routing_agent=None,  # Also remove routing_agent if it contains generators
-            typ=typ_)
+            typ=typ_,
+            table=self.job_table)
@@ -0,0 +1,241 @@
+import numpy as np
+from typing import Dict, Iterable, List, Optional
+
+
+class JobTable:
+    """Columnar storage for jobs
+
+    One row per job. Scalars (due date, start/end time, current operation
+    index, type) live in 1-D NumPy arrays, operation data in 2-D arrays indexed
+    by (job, op), and processing times in a dense (job, op, machine) matrix with
+    NaN marking machines that cannot run an operation. Job objects are thin
+    views over a row, see simulation.job.Job.
+    """
+
+    def __init__(self, machine_ids: Iterable[int] = (), max_ops: int = 3, capacity: int = 256):
+        self.machine_ids: List[int] = []
+        self.machine_col: Dict[int, int] = {}
+        for machine_id in machine_ids:
+            self._column(machine_id)
+        self.max_ops = max(1, max_ops)
+        self.capacity = max(1, capacity)
+        self.size = 0
+
+        n, k, m = self.capacity, self.max_ops, max(1, len(self.machine_ids))
+        self.job_id = np.zeros(n, dtype=np.int64)
+        self.typ = np.zeros(n, dtype=np.int16)
+        self.num_ops = np.zeros(n, dtype=np.int16)
+        self.current_op = np.zeros(n, dtype=np.int16)
+        self.due_date = np.full(n, np.nan)
+        self.start_time = np.full(n, np.nan)
+        self.end_time = np.full(n, np.nan)
+        self.completed = np.zeros(n, dtype=bool)
+
+        self.routing = np.full((n, k), -1, dtype=np.int16)
+        self.op_work = np.zeros((n, k))               # sum of eligible processing times per op
+        self.work_from = np.zeros((n, k + 1))         # op_work summed from op onward
+        self.op_start = np.full((n, k), np.nan)
+        self.op_end = np.full((n, k), np.nan)
+        self.op_machine = np.full((n, k), -1, dtype=np.int16)
+        self.op_wc = np.full((n, k), -1, dtype=np.int16)
+        self.pt = np.full((n, k, m), np.nan)
+        self._shared = False
+        # Optional CompletionIndex fed by Job.record_operation_end
+        self.completions = None
+
+    # Largest typ, operation count, WorkCenter id and machine id the int16 columns hold
+    ID_LIMIT = np.iinfo(np.int16).max
+
+    # Columns that never change once a job is created, and those that record progress
+    STATIC_COLUMNS = ('job_id', 'typ', 'num_ops', 'due_date', 'routing', 'op_work', 'work_from', 'pt')
+    PROGRESS_COLUMNS = ('current_op', 'start_time', 'end_time', 'completed',
+                        'op_start', 'op_end', 'op_machine', 'op_wc')
+
+    def __len__(self) -> int:
+        return self.size
+
+    # ------------------------------------------------------------------
+    # row management
+    # ------------------------------------------------------------------
+    def add(self, job_id: int, typ: int, routing: List[int],
+            processing_time: List[Dict[int, float]], due_date: Optional[float] = None) -> int:
+        """Append a job and return its row index"""
+        if self._shared:
+            self._unshare()
+        num_ops = len(routing)
+        limit = self.ID_LIMIT
+        if num_ops > limit or not 0 <= typ <= limit or any(not 0 <= wc <= limit for wc in routing):
+            raise ValueError(f"Job {job_id}: type, operation count and WorkCenter ids must be "
+                             f"within 0..{limit}")
+        for op in processing_time:
+            for machine_id in op:
+                if machine_id not in self.machine_col:
+                    self._column(machine_id)
+        if num_ops > self.max_ops or len(processing_time) > self.max_ops:
+            self._resize(ops=max(num_ops, len(processing_time)))
+        if len(self.machine_ids) > self.pt.shape[2]:
+            self._resize(machines=len(self.machine_ids))
+        if self.size == self.capacity:
+            self._resize(rows=self.capacity * 2)
+
+        row = self.size
+        self.size += 1
+        self.job_id[row] = job_id
+        self.typ[row] = typ
+        self.num_ops[row] = num_ops
+        self.due_date[row] = np.nan if due_date is None else due_date
+        self.routing[row, :num_ops] = routing
+        for op_idx, op in enumerate(processing_time):
+            work = 0
+            for machine_id, time in op.items():
+                self.pt[row, op_idx, self.machine_col[machine_id]] = time
+                work += time
+            self.op_work[row, op_idx] = work
+        for op_idx in range(num_ops - 1, -1, -1):
+            self.work_from[row, op_idx] = self.work_from[row, op_idx + 1] + self.op_work[row, op_idx]
+        return row
+
+    def copy_row(self, row: int, target: Optional['JobTable'] = None) -> int:
+        """Copy a row (including progress) into target, a new table by default"""
+        if target is None:
+            target = JobTable(self.machine_ids, self.max_ops, capacity=1)
+        new_row = target.add(
+            int(self.job_id[row]), int(self.typ[row]), self.routing_of(row),
+            self.processing_times_of(row), self.get_float(self.due_date, row))
+        target.current_op[new_row] = self.current_op[row]
+        target.start_time[new_row] = self.start_time[row]
+        target.end_time[new_row] = self.end_time[row]
+        target.completed[new_row] = self.completed[row]
+        k = self.max_ops
+        target.op_start[new_row, :k] = self.op_start[row]
+        target.op_end[new_row, :k] = self.op_end[row]
+        target.op_machine[new_row, :k] = self.op_machine[row]
+        target.op_wc[new_row, :k] = self.op_wc[row]
+        return new_row
+
+    def take(self, rows: List[int]) -> 'JobTable':
+        """Return a compact table holding copies of the given rows, in order"""
+        rows = np.asarray(rows, dtype=np.int64)
+        table = JobTable.__new__(JobTable)
+        table.machine_ids = list(self.machine_ids)
+        table.machine_col = dict(self.machine_col)
+        table.max_ops = self.max_ops
+        table.size = len(rows)
+        table.capacity = max(1, len(rows))
+        for name in self.STATIC_COLUMNS + self.PROGRESS_COLUMNS:
+            column = getattr(self, name)
+            taken = column[rows]
+            if len(rows) == 0:
+                taken = np.empty((1,) + column.shape[1:], dtype=column.dtype)
+            setattr(table, name, taken)
+        table._shared = False
+        table.completions = None
+        return table
+
+    def fork(self) -> 'JobTable':
+        """Copy-on-write fork: static columns are shared, progress columns copied
+
+        The fork can advance jobs independently of this table. Adding a row to
+        the fork first gives it private copies of the shared columns.
+        """
+        table = JobTable.__new__(JobTable)
+        table.machine_ids = self.machine_ids
+        table.machine_col = self.machine_col
+        table.max_ops = self.max_ops
+        table.size = self.size
+        table.capacity = self.capacity
+        for name in self.STATIC_COLUMNS:
+            setattr(table, name, getattr(self, name))
+        for name in self.PROGRESS_COLUMNS:
+            setattr(table, name, getattr(self, name).copy())
+        table._shared = True
+        table.completions = None
+        return table
+
+    def _unshare(self):
+        self.machine_ids = list(self.machine_ids)
+        self.machine_col = dict(self.machine_col)
+        for name in self.STATIC_COLUMNS:
+            setattr(self, name, getattr(self, name).copy())
+        self._shared = False
+
+    def _column(self, machine_id: int) -> int:
+        if not 0 <= machine_id <= self.ID_LIMIT:
+            raise ValueError(f"Machine id {machine_id} is outside 0..{self.ID_LIMIT}")
+        self.machine_col[machine_id] = len(self.machine_ids)
+        self.machine_ids.append(machine_id)
+        return self.machine_col[machine_id]
+
+    def _resize(self, rows: Optional[int] = None, ops: Optional[int] = None,
+                machines: Optional[int] = None):
+        n = rows or self.capacity
+        k = max(ops or self.max_ops, self.max_ops)
+        m = max(machines or self.pt.shape[2], self.pt.shape[2])
+
+        def grow(arr, shape, fill):
+            new = np.full(shape, fill, dtype=arr.dtype)
+            new[tuple(slice(0, s) for s in arr.shape)] = arr
+            return new
+
+        for name, fill in (('job_id', 0), ('typ', 0), ('num_ops', 0), ('current_op', 0),
+                           ('due_date', np.nan), ('start_time', np.nan),
+                           ('end_time', np.nan), ('completed', False)):
+            setattr(self, name, grow(getattr(self, name), (n,), fill))
+        for name, fill in (('routing', -1), ('op_work', 0), ('op_start', np.nan),
+                           ('op_end', np.nan), ('op_machine', -1), ('op_wc', -1)):
+            setattr(self, name, grow(getattr(self, name), (n, k), fill))
+        self.work_from = grow(self.work_from, (n, k + 1), 0)
+        self.pt = grow(self.pt, (n, k, m), np.nan)
+        self.capacity, self.max_ops = n, k
+
+    # ------------------------------------------------------------------
+    # row accessors used by the Job view
+    # ------------------------------------------------------------------
+    @staticmethod
+    def get_float(arr: np.ndarray, row: int) -> Optional[float]:
+        value = arr[row]
+        return None if value != value else float(value)
+
+    def routing_of(self, row: int) -> List[int]:
+        return [int(wc) for wc in self.routing[row, :self.num_ops[row]]]
+
+    def processing_times_of(self, row: int) -> List[Dict[int, float]]:
+        return [self.operation_times_of(row, op) for op in range(self.num_ops[row])]
+
+    def operation_times_of(self, row: int, op: int) -> Dict[int, float]:
+        times = self.pt[row, op]
+        return {self.machine_ids[col]: float(times[col])
+                for col in np.flatnonzero(~np.isnan(times))}
+
+    def processing_time_on(self, row: int, op: int, machine_id: int) -> Optional[float]:
+        col = self.machine_col.get(machine_id)
+        if col is None or op >= self.pt.shape[1]:
+            return None
+        value = self.pt[row, op, col]
+        return None if value != value else float(value)
+
+    def remaining_work(self, row: int, start_op: int) -> float:
+        """Sum of eligible processing times over operations start_op onward"""
+        if start_op >= self.num_ops[row]:
+            return 0.0
+        return float(self.work_from[row, start_op])
+
+    # ------------------------------------------------------------------
+    # vectorized metrics
+    # ------------------------------------------------------------------
+    def completed_rows(self) -> np.ndarray:
+        return np.flatnonzero(self.completed[:self.size])
+
+    def tardiness(self, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        rows = self.completed_rows() if rows is None else rows
+        return np.maximum(0.0, np.nan_to_num(self.end_time[rows] - self.due_date[rows]))
+
+    def flow_time(self, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        rows = self.completed_rows() if rows is None else rows
+        return np.nan_to_num(self.end_time[rows] - self.start_time[rows])
+
+    def nbytes(self) -> int:
+        return sum(arr.nbytes for arr in (
+            self.job_id, self.typ, self.num_ops, self.current_op, self.due_date,
+            self.start_time, self.end_time, self.completed, self.routing, self.op_work, self.work_from,
+            self.op_start, self.op_end, self.op_machine, self.op_wc, self.pt))
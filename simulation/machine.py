@@ -1,8 +1,14 @@
 import simpy
 import random
-from typing import List, Optional, Dict, Tuple, Callable
+from collections import deque
+from typing import List, Optional, Dict, Sequence, Tuple, Callable
+from .dispatch_queue import DispatchQueue
 from .job import Job
 from .sequencing_agent import SequencingAgent
+from utils.tracing import DEBUG, get_tracer
+
+_trace = get_tracer("machine")
+_breakdown_trace = get_tracer("breakdown")
 
 
 class Machine:
@@ -10,7 +16,8 @@ class Machine:
                  machine_id, wc_id,  strategy: str = None,  
                  initial_queue: List = None, 
                  sequenceing_agent: SequencingAgent = SequencingAgent("FIS"),
-                 setup_time: List[List[int]] = None
+                 setup_time: List[List[int]] = None,
+                 history_limit: Optional[int] = None
                     ):
         self.env = env
         self.resource = resource
@@ -24,10 +31,12 @@ class Machine:
         self.total_working_time = 0.0
         self.total_idle_time = 0.0
         self.last_activity_time = 0.0
-        self.queue = initial_queue if initial_queue is not None else []
+        self.strategy = strategy if strategy else "SPT"
+        self.queue = DispatchQueue(machine_id, initial_queue, rule=self.strategy)
         self.next_available_time = 0.0
-        self.scheduled_jobs = []
-        self.env.process(self.breakdown_process())
+        # Ring buffers when history_limit is set (long-horizon runs)
+        self.scheduled_jobs = deque(maxlen=history_limit)
+        self.env.start_breakdowns(self)
         # self.env.process(self.process_jobs())
         self.repair_dur = 0
         self.start_time = self.env.now
@@ -37,36 +46,66 @@ class Machine:
         self.is_idle = True
         self.job_creator = None
         # self.strategy = strategy if strategy is not None else []
-        self.strategy = strategy if strategy else "SPT"
-        print(self.strategy)
+        if _trace.debug:
+            _trace.emit(DEBUG, "created", machine=machine_id, wc=wc_id, strategy=self.strategy)
         self.count_lower = 0  # Jobs processed in <=5 mins
         self.count_upper = 0  # Jobs processed in >5 mins
         self.temp_lower = 0   # Per-shift counter for <=5 mins
         self.temp_upper = 0   # Per-shift counter for >5 mins
         self.shift_duration = 60*4  # 4-hour shifts
 
-        self.state_history = []
+        self.state_history = deque(maxlen=history_limit)
         self.last_state = None
         self.queue_buildup_time = 0
         self.setup_time = setup_time
         self.last_processed_job_type = None
+        self.wake_event = None
+        self.process = None
+
+    def start(self):
+        """Start the dispatch loop unless one is already running for this machine"""
+        if self.process is None or not self.process.is_alive:
+            self.process = self.env.start_dispatch(self)
+        return self.process
+
+    def wake(self):
+        """Resume an idle dispatch loop that is blocked waiting for work"""
+        if self.wake_event is not None and not self.wake_event.triggered:
+            self.wake_event.succeed()
+
     def breakdown_process(self):
         while True:
-            yield self.env.timeout(random.expovariate(1.0 / self.breakdown_mean))
-            if not self.is_broken and self.processing_job:
-                print(f"Machine {self.machine_id} breakdown at {self.env.now}")
-                self.is_broken = True
-                self.breakdown_count += 1
-                repair_duration = max(1, random.normalvariate(self.repair_time, self.repair_time/4))
-                self.repair_dur = repair_duration
+            yield self.env.timeout(self.next_breakdown_delay())
+            repair_duration = self.begin_breakdown()
+            if repair_duration is not None:
                 yield self.env.timeout(repair_duration)
-                self.next_available_time += repair_duration
-                self.is_broken = False
-                self.repair_dur = 0
-                print(f"Machine {self.machine_id} repaired at {self.env.now}")
+                self.end_breakdown(repair_duration)
 
                 #again run process
 
+    # Breakdown steps shared by the SimPy process above and the event kernel
+    def next_breakdown_delay(self) -> float:
+        return random.expovariate(1.0 / self.breakdown_mean)
+
+    def begin_breakdown(self) -> Optional[float]:
+        """Break down if busy; return the repair duration or None if nothing happened"""
+        if not self.is_broken and self.processing_job:
+            if _breakdown_trace.debug:
+                _breakdown_trace.emit(DEBUG, "breakdown", machine=self.machine_id, time=self.env.now)
+            self.is_broken = True
+            self.breakdown_count += 1
+            repair_duration = max(1, random.normalvariate(self.repair_time, self.repair_time/4))
+            self.repair_dur = repair_duration
+            return repair_duration
+        return None
+
+    def end_breakdown(self, repair_duration: float):
+        self.next_available_time += repair_duration
+        self.is_broken = False
+        self.repair_dur = 0
+        if _breakdown_trace.debug:
+            _breakdown_trace.emit(DEBUG, "repaired", machine=self.machine_id, time=self.env.now)
+
     def get_available_time(self):
       #Calculate the total available time for this machine from a given start time
       total_time = 0
@@ -76,14 +115,12 @@ class Machine:
       if self.is_broken:
           total_time += self.repair_dur
 
-      # processing time for all queued jobs
-      for job in self.queue:
-          if self.machine_id in job.processing_time[job.current_op_idx]:
-              Q_t += job.processing_time[job.current_op_idx][self.machine_id]
+      # processing time for all queued jobs (running aggregate, O(1))
+      Q_t = self.queue.workload()
       # remaining processing time of current job
-      if self.processing_job and self.machine_id in self.processing_job.processing_time[self.processing_job.current_op_idx]:
-          M_R += (self.processing_job.processing_time[self.processing_job.current_op_idx][self.machine_id] -
-                        (self.env.now - self.start_time))
+      current_pt = self.processing_job.current_processing_time(self.machine_id) if self.processing_job else None
+      if current_pt is not None:
+          M_R += (current_pt - (self.env.now - self.start_time))
       total_time = Q_t + M_R
       # print(f"available time of machine{self.machine_id} is -->{total_time} Q_t = {Q_t} M_R = {M_R}")
       # print(f"processing { self.processing_job.processing_time[self.processing_job.current_op_idx][self.machine_id]}, env.now {self.env.now} self.start {self.start_time}")
@@ -93,17 +130,19 @@ class Machine:
 
 
 
-    def get_sorted_queue(self, queue: Optional[List[Job]] = None, strategy: Optional[str] = None, machine_id: Optional[int] = None) -> List[Job]:
-        if queue is None:
-            queue = self.queue
+    def get_sorted_queue(self, queue: Optional[List[Job]] = None, strategy: Optional[str] = None, machine_id: Optional[int] = None) -> Sequence[Job]:
         if strategy is None:
-            strategy = self.strategy[0]
+            strategy = self.strategy
         if machine_id is None:
             machine_id = self.machine_id
+        if queue is None or (queue is self.queue and machine_id == self.machine_id):
+            # Read-only view kept in order by the dispatch structure
+            return self.queue.sorted(strategy)
+
         # sorted_queue = copy.deepcopy(queue)  # make a copy to avoid modifying the original
         sorted_queue = list(queue)
         if strategy == 'SPT':  # Shortest Processing Time
-            sorted_queue.sort(key=lambda job: job.processing_time[job.current_op_idx][machine_id])
+            sorted_queue.sort(key=lambda job: job.current_processing_time(machine_id))
 
         elif strategy == 'FIFO':  # First In First Out (keep original order)
             pass  # no sorting needed
@@ -115,23 +154,20 @@ class Machine:
             sorted_queue.sort(key=lambda job: job.job_id)
 
         elif strategy == 'LPT':  # Longest Processing Time
-            sorted_queue.sort(key=lambda job: job.processing_time[job.current_op_idx][machine_id], reverse=True)
+            sorted_queue.sort(key=lambda job: job.current_processing_time(machine_id), reverse=True)
 
         return sorted_queue
 
     def total_process_time_remain(self, machine, job):
         """Calculate total remaining processing time for a job"""
         # Current operation processing time
-        sigma_tji = job.processing_time[job.current_op_idx][machine.machine_id]
+        sigma_tji = job.current_processing_time(machine.machine_id)
 
         # Remaining operations processing time
         r_tij = 0
-        if job.current_op_idx < len(job.processing_time) - 1:
+        if job.current_op_idx < job.num_operations - 1:
             # Sum expected processing times from next operation to end
-            for op_index in range(job.current_op_idx + 1, len(job.processing_time)):
-                op = job.processing_time[op_index]  # Fixed: was job.processing_time[op]
-                for machine_id, time in op.items():
-                    r_tij += time
+            r_tij = job.remaining_work(job.current_op_idx + 1)
             r_tij = r_tij / 2 # Average across machines
 
         return sigma_tji + r_tij
@@ -158,12 +194,10 @@ class Machine:
                         (self.env.now - self.start_time))
         # exp_mc_av = max(0, exp_mc_av)  # Ensure non-negative
 
-        print(f"\n=== Expected Slack Times for Machine {machine.machine_id} ===")
-        print(f"Given Sequence:f{self.strategy}")
-        print(f"Queue sequence: {[job.job_id for job in queue_sorted]}")
-        print(f"Current time: {current_time}")
-        print(f"Machine Available time: {exp_mc_av}")
-        print(f"Initial machine available time: {exp_mc_av:.2f}")
+        if _trace.debug:
+            _trace.emit(DEBUG, "expected_slack", machine=machine.machine_id, strategy=self.strategy,
+                        queue=[job.job_id for job in queue_sorted], time=current_time,
+                        available=round(exp_mc_av, 2))
 
         # Calculate slack for each job in the sorted queue
         for idx, job in enumerate(queue_sorted):
@@ -182,11 +216,10 @@ class Machine:
             # Store slack time
             slack_times[job.job_id] = slack
 
-            print(f"Job ID: {job.job_id}, Position: {idx}, "
-                  f"Due Date: {job.due_date}, "
-                  f"Total Remaining Time: {total_remaining_time:.2f}, "
-                  f" Current Job Processing time {job.processing_time[job.current_op_idx][machine.machine_id]}, "
-                  f"Expected Slack Time: {slack:.2f}")
+            if _trace.debug:
+                _trace.emit(DEBUG, "job_slack", machine=machine.machine_id, job=job.job_id,
+                            position=idx, due=job.due_date, remaining=round(total_remaining_time, 2),
+                            pt=p, slack=round(slack, 2))
 
         return slack_times
 
@@ -275,13 +308,32 @@ class Machine:
 
     def add_to_machine_queue(self, job: Job):
         self.queue.append(job)
+        self.wake()
         # print(f"Queue in front of machine{self.machine_id}")
         # for j in self.queue:
         #   print(f"---------------------- Job ID---{j.job_id} PT---{j.processing_time[j.current_op_idx][self.machine_id]}")
         # print(f"Job {job.job_id} added to queue of machine {self.machine_id}")
 
     def total_mc_pt(self):
-        return sum(j.processing_time[j.current_op_idx][self.machine_id] for j in self.queue)
+        return self.queue.workload()
+
+    def queue_stats(self) -> Dict[str, float]:
+        """O(1) processing-time features of the queue from the running aggregates"""
+        count = self.queue.pt_count()
+        total = self.queue.workload()
+        mean = total / count if count else 0.0
+        cv = 0.0
+        if count >= 2 and mean:
+            variance = max(0.0, (self.queue.pt_sum_squares() - count * mean * mean) / (count - 1))
+            cv = variance ** 0.5 / mean
+        return {
+            'count': count,
+            'sum': total,
+            'mean': mean,
+            'cv': cv,
+            'min': self.queue.pt_min() or 0.0,
+            'max': self.queue.pt_max() or 0.0,
+        }
 
     def get_queue_status(self):
       print(f"Queue in front machine {self.machine_id}")
@@ -292,80 +344,106 @@ class Machine:
     # working fine as commented the breakdown thing and rework thing # i thing rework is not important enought
     def process_jobs(self):
 
-        while True and self.env.now > 120:
-            if self.is_idle == True:
-              print(f"Machine Starting time is : {self.env.now}")
-            
+        while True and self.dispatch_open():
+            if self.is_idle == True and _trace.debug:
+                _trace.emit(DEBUG, "start", machine=self.machine_id, time=self.env.now)
 
             while not self.queue:
                 self.is_idle = True
-                yield self.env.timeout(0.01)  # Small timeout to prevent busy waiting
+                # Block until add_to_machine_queue signals that work has arrived
+                self.wake_event = self.env.event()
+                yield self.wake_event
+            self.wake_event = None
 
             # Process next job
             if self.queue:
-                self.is_idle = False
-                
-                job = self.sequenceing_agent.select(self, self.strategy)
+                job = self.select_next_job()
                 # print(f"---Time {self.env.now}: Strategy : {self.strategy} Job {job.job_id} Selected on Machine {self.machine_id} (WC {self.wc_id}) DD--- {job.due_date}")
-                if self.machine_id not in job.processing_time[job.current_op_idx]:continue
-                if self.last_processed_job_type is not None and self.last_processed_job_type != job.typ:
-                    # Setup time needed
-                    setup_duration = self.setup_time[self.last_processed_job_type-1][job.typ-1]
+                if job.current_processing_time(self.machine_id) is None:continue
+                setup_duration = self.get_setup_duration(job)
+                if setup_duration is not None:
                     # print(f"Machine {self.machine_id} performing setup for {setup_duration} time units at {self.env.now} for Job {job.job_id}")
                     yield self.env.timeout(setup_duration)
-                    print("-----Setup_time_needed------")
-                    self.last_activity_time += setup_duration  # Consider setup time as active time    
-                processing_time = job.processing_time[job.current_op_idx][self.machine_id]
+                    self.end_setup(setup_duration)
 
                 try:
                     # Request resource for this specific job
                     with self.resource.request(priority=0) as req:
                         yield req
-                        self.start_time = self.env.now
-                        
-                        job.record_operation_start(self.env.now, self.wc_id, self.machine_id)
-                        self.processing_job = job
-                        start_time = self.env.now
-                        # print("---------------START TIME-----------------------",self.start_time)
-                        self.next_available_time = start_time + processing_time
-
-                        if self.last_activity_time < self.env.now:
-                            self.total_idle_time += self.env.now - self.last_activity_time
+                        start_time, processing_time = self.begin_operation(job)
 
                         # Process the job
                         yield self.env.timeout(processing_time)
-                        self.last_processed_job_type = job.typ
                         # yield self.env.timeout(2)
-                        self.scheduled_jobs.append({
-                            'job_id': job.job_id,
-                            'start': start_time,
-                            'end': self.env.now
-                        })
-
-
-                        if processing_time > 5:
-                            self.count_upper += 1
-                            self.temp_upper += 1
-                        else:
-                            self.count_lower += 1
-                            self.temp_lower += 1
-
-                        # Job completed
-                        if not self.is_broken:
-                            self.total_working_time += processing_time
-                            self.last_activity_time = self.env.now
-                            self.processing_job = None
-                            # self.start_time = self.env.now
-
-
-                            job.record_operation_end(self.env.now)
-                            # print(f"-----------Time {self.env.now}: Job {job.job_id} completed on Machine {self.machine_id} (WC {self.wc_id})")
-
-                            if not job.is_completed():
-                                self.job_creator.route_job(job)
+                        self.end_operation(job, start_time, processing_time)
                         # Resource is automatically released when exiting 'with' block
 
                 except simpy.Interrupt:
                     self.queue.insert(0, job)
                     self.processing_job = None
-                    print(f"Time {self.env.now}: Breakdown interrupted Job {job.job_id} on Machine {self.machine_id}")
+                    if _breakdown_trace.debug:
+                        _breakdown_trace.emit(DEBUG, "interrupted", machine=self.machine_id,
+                                              job=job.job_id, time=self.env.now)
+
+    # Dispatch steps shared by process_jobs above and the event kernel
+    def dispatch_open(self) -> bool:
+        return self.env.now > 120
+
+    def select_next_job(self) -> Job:
+        self.is_idle = False
+        return self.sequenceing_agent.select(self, self.strategy)
+
+    def get_setup_duration(self, job: Job) -> Optional[float]:
+        if self.last_processed_job_type is not None and self.last_processed_job_type != job.typ:
+            # Setup time needed
+            return self.setup_time[self.last_processed_job_type-1][job.typ-1]
+        return None
+
+    def end_setup(self, setup_duration: float):
+        if _trace.debug:
+            _trace.emit(DEBUG, "setup", machine=self.machine_id, duration=setup_duration, time=self.env.now)
+        self.last_activity_time += setup_duration  # Consider setup time as active time
+
+    def begin_operation(self, job: Job) -> Tuple[float, float]:
+        processing_time = job.current_processing_time(self.machine_id)
+        self.start_time = self.env.now
+
+        job.record_operation_start(self.env.now, self.wc_id, self.machine_id)
+        self.processing_job = job
+        start_time = self.env.now
+        # print("---------------START TIME-----------------------",self.start_time)
+        self.next_available_time = start_time + processing_time
+
+        if self.last_activity_time < self.env.now:
+            self.total_idle_time += self.env.now - self.last_activity_time
+        return start_time, processing_time
+
+    def end_operation(self, job: Job, start_time: float, processing_time: float):
+        self.last_processed_job_type = job.typ
+        self.scheduled_jobs.append({
+            'job_id': job.job_id,
+            'start': start_time,
+            'end': self.env.now
+        })
+
+
+        if processing_time > 5:
+            self.count_upper += 1
+            self.temp_upper += 1
+        else:
+            self.count_lower += 1
+            self.temp_lower += 1
+
+        # Job completed
+        if not self.is_broken:
+            self.total_working_time += processing_time
+            self.last_activity_time = self.env.now
+            self.processing_job = None
+            # self.start_time = self.env.now
+
+
+            job.record_operation_end(self.env.now)
+            # print(f"-----------Time {self.env.now}: Job {job.job_id} completed on Machine {self.machine_id} (WC {self.wc_id})")
+
+            if not job.is_completed():
+                self.job_creator.route_job(job)
@@ -1,5 +1,6 @@
 # from machine import Machine
 from typing import List, Optional, Dict, Tuple, Callable
+from .dispatch_queue import DispatchQueue
 from .job import Job
 
 
@@ -14,30 +15,8 @@ class SequencingAgent:
         # Use override if provided, otherwise use instance strategy
         strategy_to_use = strategy_override if strategy_override is not None else self.strategy
 
-        if strategy_to_use == 'SPT':  # Shortest Processing Time
-            selected_job = min(machine.queue,
-                             key=lambda job: job.processing_time[job.current_op_idx][machine.machine_id])
-            machine.queue.remove(selected_job)
-            return selected_job
-
-        elif strategy_to_use == 'FIFO':  # First In First Out
-            return machine.queue.pop(0)
-
-        elif strategy_to_use == 'EDD':  # Earliest Due Date
-            selected_job = min(machine.queue, key=lambda job: job.due_date)
-            machine.queue.remove(selected_job)
-            return selected_job
-
-        elif strategy_to_use == "FIS":  # First In System
-            selected_job = min(machine.queue, key=lambda job: job.job_id)
-            machine.queue.remove(selected_job)
-            return selected_job
-
-        elif strategy_to_use == "LPT":  # Longest Processing Time
-            selected_job = max(machine.queue,
-                             key=lambda job: job.processing_time[job.current_op_idx][machine.machine_id])
-            machine.queue.remove(selected_job)
-            return selected_job
-
-        else:  # Default to FIFO
-            return machine.queue.pop(0)
+        # SPT/LPT/EDD/FIS are served from the machine's heap, FIFO from its
+        # arrival order; unknown rules default to FIFO
+        if strategy_to_use not in DispatchQueue.RULES:
+            strategy_to_use = 'FIFO'
+        return machine.queue.select(strategy_to_use)
@@ -0,0 +1,103 @@
+import hashlib
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .job import Job
+from .job_table import JobTable
+
+
+class ShopSnapshot:
+    """Frozen copy of the shop's open jobs, taken once per decision interval
+
+    Holds one compact JobTable with every incomplete job plus the order of the
+    job creator's list and of each machine queue, as row indices. fork() hands
+    every sub-simulation its own copy-on-write view: static job data (routing,
+    processing times, due dates) is shared, only the progress columns are
+    copied, and each job is a single object shared by the queues and the
+    created jobs list.
+
+    Times in the table are relative to the snapshot (TIME_COLUMNS are shifted
+    by -time at capture), matching the sub-simulation clock, which starts at 0.
+    Two snapshots that differ only by when they were taken therefore share a
+    fingerprint and give the same sub-simulation results.
+    """
+
+    TIME_COLUMNS = ('due_date', 'start_time', 'end_time', 'op_start', 'op_end')
+
+    def __init__(self, time: float, table: JobTable, created_rows: List[int],
+                 queue_rows: Dict[int, List[List[int]]]):
+        self.time = time
+        self.table = table
+        self.created_rows = created_rows
+        self.queue_rows = queue_rows
+        self._fingerprint: Optional[str] = None
+
+    @classmethod
+    def capture(cls, work_centers: Dict, job_creator, time: float) -> 'ShopSnapshot':
+        """Snapshot incomplete jobs and machine queues of a running shop"""
+        slots: Dict[int, int] = {}       # id(job) -> snapshot row
+        sources: List[Job] = []
+
+        def slot(job: Job) -> int:
+            row = slots.get(id(job))
+            if row is None:
+                row = slots[id(job)] = len(sources)
+                sources.append(job)
+            return row
+
+        created_rows = [slot(job) for job in job_creator.created_jobs if not job.completion_status]
+        queue_rows = {
+            wc_id: [[slot(job) for job in machine.queue] for machine in wc.machines]
+            for wc_id, wc in work_centers.items()
+        }
+        table = cls._collect(sources)
+        for name in cls.TIME_COLUMNS:
+            getattr(table, name)[:table.size] -= time
+        return cls(time, table, created_rows, queue_rows)
+
+    @staticmethod
+    def _collect(jobs: List[Job]) -> JobTable:
+        tables = {id(job.table): job.table for job in jobs}
+        if len(tables) == 1:
+            (source,) = tables.values()
+            return source.take([job.row for job in jobs])
+        # Jobs from several tables (or none): copy row by row
+        first = jobs[0].table if jobs else JobTable()
+        table = JobTable(first.machine_ids, first.max_ops, capacity=max(1, len(jobs)))
+        for job in jobs:
+            job.table.copy_row(job.row, table)
+        return table
+
+    def __len__(self) -> int:
+        return self.table.size
+
+    def fingerprint(self) -> str:
+        """Stable hash of the relative shop state: queue order and every job column
+
+        The snapshot time itself is not part of it, see the class docstring.
+        """
+        if self._fingerprint is None:
+            digest = hashlib.blake2b(digest_size=16)
+            digest.update(repr((self.created_rows, self.queue_rows,
+                                self.table.machine_ids)).encode())
+            size = self.table.size
+            for name in JobTable.STATIC_COLUMNS + JobTable.PROGRESS_COLUMNS:
+                digest.update(np.ascontiguousarray(getattr(self.table, name)[:size]).tobytes())
+            self._fingerprint = digest.hexdigest()
+        return self._fingerprint
+
+    def fork(self, completions=None) -> Tuple[List[Job], Dict[int, List[List[Job]]]]:
+        """Return (created_jobs, {wc_id: [queue per machine]}) over a private fork
+
+        completions, if given, is the CompletionIndex the forked jobs report to.
+        """
+        table = self.table.fork()
+        table.completions = completions
+        jobs = [Job.from_row(table, row) for row in range(table.size)]
+        created_jobs = [jobs[row] for row in self.created_rows]
+        queues = {
+            wc_id: [[jobs[row] for row in rows] for rows in machines]
+            for wc_id, machines in self.queue_rows.items()
+        }
+        return created_jobs, queues
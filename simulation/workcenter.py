@@ -1,9 +1,15 @@
 import simpy
 import statistics
-from typing import List
+from collections import deque
+import numpy as np
+from typing import List, Optional
 from .job import Job
 from .machine import Machine
+from state.feature_schema import FIELD_INDEX, NUM_FIELDS, FeatureSchema
+from utils.tracing import DEBUG, INFO, WARNING, get_tracer
 # from routing_agent import DRLAwareRoutingAgent
+
+_trace = get_tracer("workcenter")
 BREAKDOWN_MEAN = 500  # Mean time between breakdowns
 REPAIR_TIME = 50      # Mean repair time    
 
@@ -11,7 +17,10 @@ class WorkCenter:
     def __init__(self, env: simpy.Environment, wc_id: int, 
                  num_machines: int,
                  strategy:  str = "FIS",
-                 setup_time: List[List[int]] = None):
+                 setup_time: List[List[int]] = None,
+                 history_limit: Optional[int] = None):
+        """history_limit bounds the per-WorkCenter and per-machine histories
+        (ring buffers holding the latest entries); None keeps them unbounded"""
         self.env = env
         self.wc_id = wc_id
         self.num_machines = num_machines
@@ -27,10 +36,11 @@ class WorkCenter:
         self.workcenter_state = {}
         # Experience tracking for WorkCenter (if needed)
         self.workcenter_experiences = []
-        self.state_history = []
+        self.state_history = deque(maxlen=history_limit)
+        self.workcenter_state_history = deque(maxlen=history_limit)
         self.last_workcenter_state = None
         self.state = {}
-        self.processed_count = []
+        self.processed_count = deque(maxlen=history_limit)
         self.setup_times =  setup_time
 
         # Create machines and assign WorkCenter strategy to all machines
@@ -43,7 +53,8 @@ class WorkCenter:
             machine = Machine(
                 self.env, resource, BREAKDOWN_MEAN, REPAIR_TIME,
                 machine_id, wc_id, self.workcenter_strategy,
-                setup_time=self.setup_times
+                setup_time=self.setup_times,
+                history_limit=history_limit
             )
             self.machines.append(machine)
 
@@ -54,7 +65,9 @@ class WorkCenter:
             self.workcenter_strategy = new_strategy
             for machine in self.machines:
                 machine.strategy = new_strategy
-            print(f"WorkCenter {self.wc_id} strategy updated to: {new_strategy}")
+                machine.queue.set_rule(new_strategy)
+            if _trace.info:
+                _trace.emit(INFO, "strategy_updated", wc=self.wc_id, strategy=new_strategy)
 
 
 
@@ -100,9 +113,6 @@ class WorkCenter:
             # self.workcenter_state = self.get_workcenter_states(state1, state2)
 
             # Store the WorkCenter state for later use
-            if not hasattr(self, 'workcenter_state_history'):
-                self.workcenter_state_history = []
-
             self.workcenter_state_history.append({
                 'timestamp': current_time,
                 'shift': self.current_shift,
@@ -158,10 +168,7 @@ class WorkCenter:
             # Calculate the machine ID based on work center ID and machine index
             machine_id = (self.wc_id - 1) * self.num_machines + i + 1
 
-            total_time = 0
-            for job in machine.queue:
-                if machine_id in job.processing_time[job.current_op_idx]:
-                    total_time += job.processing_time[job.current_op_idx][machine_id]
+            total_time = machine.queue.workload()
 
             if total_time < min_total_time:
                 min_total_time = total_time
@@ -225,102 +232,141 @@ class WorkCenter:
 
 
 
+    @staticmethod
+    def _empty_machine_state() -> dict:
+        return FeatureSchema.machine_state(np.zeros(NUM_FIELDS))
+
     def get_machine_state(self, machine, queue_sorted: List[Job], current_time):
         """Calculate machine state metrics for jobs in sorted queue"""
-        state = {
-            'num_jobs': len(queue_sorted),
-            'processing_time': {'min': 0, 'max': 0, 'avg': 0, 'sum': 0},
-            'slack_time': {'min': 0, 'max': 0, 'avg': 0},
-            'due_date_tightness': {'min': 0, 'max': 0, 'sum': 0},
-            'processing_time_distribution': {'<=5': 0, '>5': 0},
-            'remaining_time': {'min': 0, 'max': 0, 'avg': 0, 'sum': 0},
-            'coeff_variation_pt': 0,
-            'coeff_variation_rt': 0
-        }
-
-        if not queue_sorted:
-            return state
-
-        # Initialize collections
-        processing_times = []
-        slack_times = []
-        ttd_values = []
-        remaining_times = []
-        pt_buckets = [0]*2  # For <5, 6
-
-        # Calculate machine available time
-        exp_mc_av = 0
-        if machine.processing_job and machine.machine_id in machine.processing_job.processing_time[machine.processing_job.current_op_idx]:
-            exp_mc_av += (machine.processing_job.processing_time[machine.processing_job.current_op_idx][machine.machine_id] -
-                        (machine.env.now - machine.start_time))
-
-        # Process each job in queue
-        for idx, job in enumerate(queue_sorted):
-            # Get processing time
-            pt = job.processing_time[job.current_op_idx][machine.machine_id]
-            processing_times.append(pt)
-
-            # Calculate slack
-            total_remaining = machine.total_process_time_remain(machine, job)
-            slack = job.due_date - current_time - exp_mc_av - total_remaining
-            slack_times.append(slack)
-
-            # Calculate tightness of due date
-            ttd = job.due_date - current_time
-            ttd_values.append(ttd)
-
-            # Calculate remaining time
-            remaining_times.append(total_remaining)
-
-            # Update processing time buckets
-            if pt <= 5:
-                pt_buckets[0] += 1
-            else:
-                pt_buckets[1] += 1
-
-            # Update machine available time for next job
-            exp_mc_av += pt
-
-        # Calculate statistics
-        state['processing_time'] = {
-            'min': min(processing_times),
-            'max': max(processing_times),
-            'avg': statistics.mean(processing_times),
-            'sum': sum(processing_times)  }
-
-        state['slack_time'] = {
-            'min': min(slack_times),
-            'max': max(slack_times),
-            'avg': statistics.mean(slack_times)
-        }
-
-        state['due_date_tightness'] = {
-            'min': min(ttd_values),
-            'max': max(ttd_values),
-            'sum': sum(ttd_values)
-        }
-
-        state['remaining_time'] = {
-            'min': min(remaining_times),
-            'max': max(remaining_times),
-            'avg': statistics.mean(remaining_times),
-            'sum': sum(remaining_times)
-        }
-
-        # Calculate coefficients of variation
-        state['coeff_variation_pt'] = self._calculate_coeff_variation(processing_times)
-        state['coeff_variation_rt'] = self._calculate_coeff_variation(remaining_times)
-
-        # Calculate percentage distributions
-        total_jobs = len(queue_sorted)
-        state['processing_time_distribution'] = {
-            '<=5': (pt_buckets[0]/total_jobs)*100,
-            '>5': (pt_buckets[1]/total_jobs)*100
+        return self.get_machine_states(current_time, [machine], [queue_sorted])[0]
+
+    def get_machine_states(self, current_time, machines: Optional[List[Machine]] = None,
+                           queues: Optional[List[List[Job]]] = None) -> List[dict]:
+        """State dicts for several machines at once (same layout as get_machine_state)"""
+        features = self.machine_features(current_time, machines, queues)
+        return [FeatureSchema.machine_state(values) for values in features]
+
+    def get_feature_vector(self, current_time, max_machines: int,
+                           out: Optional[np.ndarray] = None) -> np.ndarray:
+        """This WorkCenter's float32 row in the FeatureSchema(max_machines) layout,
+        written into out when given (the row-wise counterpart of
+        get_workcenter_states(get_machine_states(...), max_machines))"""
+        if self.num_machines > max_machines and _trace.warning:
+            _trace.emit(WARNING, "states_truncated", wc=self.wc_id, given=self.num_machines,
+                        max_machines=max_machines)
+        machines = self.machines[:max_machines]
+        return FeatureSchema(max_machines).pack(self.machine_features(current_time, machines), out)
+
+    def machine_features(self, current_time, machines: Optional[List[Machine]] = None,
+                         queues: Optional[List[List[Job]]] = None) -> np.ndarray:
+        """[machines, NUM_FIELDS] aggregates in MACHINE_FIELDS order (zeros for empty queues)
+
+        Queues are laid out as one padded (machines x longest queue) array per
+        quantity and reduced with a handful of NumPy passes. machines defaults to
+        all machines of this WorkCenter and queues to their sorted queues.
+        """
+        machines = self.machines if machines is None else machines
+        if queues is None:
+            queues = [machine.get_sorted_queue() for machine in machines]
+        features = np.zeros((len(machines), NUM_FIELDS))
+        counts = np.array([len(queue) for queue in queues], dtype=np.int64)
+        width = int(counts.max()) if len(counts) else 0
+        if width == 0:
+            return features
+
+        pt, due, rest = self._queue_columns(machines, queues, width)
+        mask = np.arange(width) < counts[:, None]
+        n = np.maximum(counts, 1)
+
+        # Machine available time before each job: what is left of the job in
+        # process plus the processing times of the jobs ahead in the queue
+        base = np.zeros(len(machines))
+        for i, machine in enumerate(machines):
+            job = machine.processing_job
+            current_pt = job.current_processing_time(machine.machine_id) if job else None
+            if current_pt is not None:
+                base[i] = current_pt - (machine.env.now - machine.start_time)
+        pt0 = np.where(mask, pt, 0.0)
+        ahead = base[:, None] + np.cumsum(pt0, axis=1) - pt0
+
+        remaining = pt + rest
+        slack = due - current_time - ahead - remaining
+        ttd = due - current_time
+
+        def reduce(values):
+            masked = np.where(mask, values, np.nan)
+            total = np.where(mask, values, 0.0).sum(axis=1)
+            return (np.nanmin(np.where(mask, values, np.inf), axis=1),
+                    np.nanmax(np.where(mask, values, -np.inf), axis=1),
+                    total / n, total, masked)
+
+        def coeff_variation(masked, avg):
+            dev = np.where(mask, masked - avg[:, None], 0.0)
+            std = np.sqrt((dev * dev).sum(axis=1) / np.maximum(counts - 1, 1))
+            with np.errstate(divide='ignore', invalid='ignore'):
+                cv = std / avg
+            return np.where((counts >= 2) & (avg != 0), cv, 0.0)
+
+        pt_min, pt_max, pt_avg, pt_sum, pt_masked = reduce(pt)
+        sl_min, sl_max, sl_avg, _, _ = reduce(slack)
+        td_min, td_max, _, td_sum, _ = reduce(ttd)
+        rt_min, rt_max, rt_avg, rt_sum, rt_masked = reduce(remaining)
+        short = (mask & (pt <= 5)).sum(axis=1)
+
+        columns = {
+            'num_jobs': counts,
+            'processing_time.min': pt_min, 'processing_time.max': pt_max,
+            'processing_time.avg': pt_avg, 'processing_time.sum': pt_sum,
+            'slack_time.min': sl_min, 'slack_time.max': sl_max, 'slack_time.avg': sl_avg,
+            'due_date_tightness.min': td_min, 'due_date_tightness.max': td_max,
+            'due_date_tightness.sum': td_sum,
+            'processing_time_distribution.<=5': short / n * 100,
+            'processing_time_distribution.>5': (counts - short) / n * 100,
+            'remaining_time.min': rt_min, 'remaining_time.max': rt_max,
+            'remaining_time.avg': rt_avg, 'remaining_time.sum': rt_sum,
+            'coeff_variation_pt': coeff_variation(pt_masked, pt_avg),
+            'coeff_variation_rt': coeff_variation(rt_masked, rt_avg),
         }
-
-
-
-        return state
+        for field, values in columns.items():
+            features[:, FIELD_INDEX[field]] = values
+        # Empty queues keep their zero block
+        features[counts == 0] = 0
+        return features
+
+    @staticmethod
+    def _queue_columns(machines: List[Machine], queues: List[List[Job]], width: int):
+        """Padded (machine, position) arrays of processing time, due date and the
+        remaining work after the current operation (averaged over two machines)"""
+        shape = (len(machines), width)
+        pt = np.full(shape, np.nan)
+        due = np.full(shape, np.nan)
+        rest = np.zeros(shape)
+
+        # Gather per job table so each table is read with one fancy index
+        groups = {}
+        for i, (machine, queue) in enumerate(zip(machines, queues)):
+            for pos, job in enumerate(queue):
+                table = job.table
+                group = groups.get(id(table))
+                if group is None:
+                    group = groups[id(table)] = (table, [], [], [])
+                group[1].append(i * width + pos)
+                group[2].append(job.row)
+                group[3].append(table.machine_col.get(machine.machine_id, -1))
+
+        pt_flat, due_flat, rest_flat = pt.reshape(-1), due.reshape(-1), rest.reshape(-1)
+        for table, flat, rows, cols in groups.values():
+            flat = np.asarray(flat)
+            rows = np.asarray(rows)
+            cols = np.asarray(cols)
+            op = table.current_op[rows].astype(np.intp)
+            values = table.pt[rows, op, np.maximum(cols, 0)]
+            pt_flat[flat] = np.where(cols >= 0, values, np.nan)
+            due_flat[flat] = table.due_date[rows]
+            nxt = op + 1
+            rest_flat[flat] = np.where(nxt < table.num_ops[rows],
+                                       table.work_from[rows, np.minimum(nxt, table.max_ops)] / 2, 0.0)
+        return pt, due, rest
 
     def _calculate_coeff_variation(self, data):
         """Helper function to calculate coefficient of variation"""
@@ -350,27 +396,19 @@ class WorkCenter:
         actual_count = len(machine_states)
 
         if actual_count > max_machines:
-            print(f"Warning: {actual_count} machine states provided, which exceeds max_machines={max_machines}. Truncating.")
+            if _trace.warning:
+                _trace.emit(WARNING, "states_truncated", wc=self.wc_id, given=actual_count,
+                            max_machines=max_machines)
             machine_states = machine_states[:max_machines]
             actual_count = max_machines
         elif actual_count < max_machines:
-            print(f"Info: {actual_count} machine states provided, less than max_machines={max_machines}. Filling remaining with empty states.")
-
-        # Template for an empty machine state (keeps keys consistent with get_machine_state)
-        empty_state = {
-            'num_jobs': 0,
-            'processing_time': {'min': 0, 'max': 0, 'avg': 0, 'sum': 0},
-            'slack_time': {'min': 0, 'max': 0, 'avg': 0},
-            'due_date_tightness': {'min': 0, 'max': 0, 'sum': 0},
-            'processing_time_distribution': {'<=5': 0, '>5': 0},
-            'remaining_time': {'min': 0, 'max': 0, 'avg': 0, 'sum': 0},
-            'coeff_variation_pt': 0,
-            'coeff_variation_rt': 0
-        }
+            if _trace.debug:
+                _trace.emit(DEBUG, "states_padded", wc=self.wc_id, given=actual_count,
+                            max_machines=max_machines)
 
         # Ensure list length equals max_machines by appending empty states if needed
         for _ in range(actual_count, max_machines):
-            machine_states.append(empty_state.copy())
+            machine_states.append(self._empty_machine_state())
 
         # Combine states: for dict-valued keys keep a nested dict with per-machine suffixes,
         # for scalar keys create key_m{n}
@@ -0,0 +1,116 @@
+"""Fixed float32 layout of WorkCenter states, and on-demand dict views of it."""
+
+from collections.abc import Mapping
+from typing import Dict, Iterator, List, Optional, Sequence
+
+import numpy as np
+
+# One block per machine slot, in the key order of the legacy machine state dict
+MACHINE_FIELDS = (
+    ('num_jobs', None),
+    ('processing_time', 'min'), ('processing_time', 'max'),
+    ('processing_time', 'avg'), ('processing_time', 'sum'),
+    ('slack_time', 'min'), ('slack_time', 'max'), ('slack_time', 'avg'),
+    ('due_date_tightness', 'min'), ('due_date_tightness', 'max'), ('due_date_tightness', 'sum'),
+    ('processing_time_distribution', '<=5'), ('processing_time_distribution', '>5'),
+    ('remaining_time', 'min'), ('remaining_time', 'max'),
+    ('remaining_time', 'avg'), ('remaining_time', 'sum'),
+    ('coeff_variation_pt', None),
+    ('coeff_variation_rt', None),
+)
+FIELD_INDEX = {(key if sub is None else f"{key}.{sub}"): i for i, (key, sub) in enumerate(MACHINE_FIELDS)}
+NUM_FIELDS = len(MACHINE_FIELDS)
+
+
+class FeatureSchema:
+    """Fixed-width layout of one WorkCenter state vector
+
+    The row holds max_machines consecutive blocks of MACHINE_FIELDS, one per
+    machine slot (missing machines are zero blocks, extra ones are dropped),
+    so column i of every row means the same thing in every WorkCenter. The
+    nested dicts of get_machine_state / get_workcenter_states are decoded
+    from a row only when asked for.
+    """
+
+    def __init__(self, max_machines: int):
+        self.max_machines = max(1, max_machines)
+        self.width = NUM_FIELDS * self.max_machines
+
+    def column(self, field: str, machine: int = 0) -> int:
+        """Column of field ('num_jobs', 'processing_time.avg', ...) for machine slot machine"""
+        return machine * NUM_FIELDS + FIELD_INDEX[field]
+
+    def columns(self, field: str) -> np.ndarray:
+        """Columns of field across all machine slots"""
+        return FIELD_INDEX[field] + NUM_FIELDS * np.arange(self.max_machines)
+
+    def pack(self, machine_rows: np.ndarray, out: Optional[np.ndarray] = None) -> np.ndarray:
+        """Flatten [num_machines, NUM_FIELDS] aggregates into one row of width"""
+        row = np.zeros(self.width, dtype=np.float32) if out is None else out
+        used = min(len(machine_rows), self.max_machines)
+        row[:used * NUM_FIELDS] = machine_rows[:used].reshape(-1)
+        row[used * NUM_FIELDS:] = 0
+        return row
+
+    def num_jobs(self, row: np.ndarray) -> int:
+        """Jobs queued across the machine slots of a row"""
+        return int(row[self.columns('num_jobs')].sum())
+
+    @staticmethod
+    def machine_state(values: Sequence[float]) -> Dict:
+        """Legacy machine state dict from one NUM_FIELDS block"""
+        count = int(values[0])
+        state = {}
+        for (key, sub), value in zip(MACHINE_FIELDS, values):
+            value = float(value) if count else 0
+            if sub is None:
+                state[key] = value
+            else:
+                state.setdefault(key, {})[sub] = value
+        state['num_jobs'] = count
+        return state
+
+    def workcenter_state(self, row: np.ndarray) -> Dict:
+        """Legacy combined dict (num_jobs_m1, processing_time: {avg_m1, ...}) from a row"""
+        combined = {}
+        for idx in range(self.max_machines):
+            m_suffix = f"_m{idx + 1}"
+            block = self.machine_state(row[idx * NUM_FIELDS:(idx + 1) * NUM_FIELDS])
+            for key, val in block.items():
+                if isinstance(val, dict):
+                    nested = combined.setdefault(key, {})
+                    for subk, subv in val.items():
+                        nested[f"{subk}{m_suffix}"] = subv
+                else:
+                    combined[f"{key}{m_suffix}"] = val
+        return combined
+
+
+class WorkCenterStates(Mapping):
+    """Read-only wc_id -> state dict view over a [num_wc, width] feature matrix
+
+    Dicts are decoded from their row on first access and cached; the matrix
+    itself is what the agent consumes.
+    """
+
+    def __init__(self, wc_ids: List[int], features: np.ndarray, schema: FeatureSchema):
+        self.wc_ids = list(wc_ids)
+        self.features = features
+        self.schema = schema
+        self._rows = {wc_id: i for i, wc_id in enumerate(self.wc_ids)}
+        self._decoded: Dict[int, Dict] = {}
+
+    def row(self, wc_id: int) -> np.ndarray:
+        return self.features[self._rows[wc_id]]
+
+    def __getitem__(self, wc_id: int) -> Dict:
+        state = self._decoded.get(wc_id)
+        if state is None:
+            state = self._decoded[wc_id] = self.schema.workcenter_state(self.row(wc_id))
+        return state
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self.wc_ids)
+
+    def __len__(self) -> int:
+        return len(self.wc_ids)
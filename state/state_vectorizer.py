@@ -1,14 +1,35 @@
-"""Utility to convert workcenter dictionaries into fixed-size vectors."""
+"""Utility to turn WorkCenters into fixed-size float32 vectors."""
 
-from typing import Dict, Iterable, Tuple, Union
+from typing import Dict, Optional
+
+import numpy as np
+
+from .feature_schema import FeatureSchema
 
 
 class StateVectorizer:
-    def vectorize(self, workcenter_state: Dict[str, Union[int, float]]) -> Tuple[float, ...]:
-        num_jobs = float(workcenter_state.get('num_jobs', 0))
-        avg_processing = float(workcenter_state.get('processing_time', {}).get('avg', 0))
-        utilization = float(workcenter_state.get('utilization', 0))
-        return (num_jobs, avg_processing, utilization)
-
-    def vectorize_all(self, workcenter_states: Dict[int, Dict[str, Union[int, float]]]) -> Dict[int, Tuple[float, ...]]:
-        return {wc_id: self.vectorize(state) for wc_id, state in workcenter_states.items()}
+    """WorkCenter feature rows in the FeatureSchema(max_machines) layout"""
+
+    def __init__(self, max_machines: int = 2):
+        self.schema = FeatureSchema(max_machines)
+
+    @property
+    def dim(self) -> int:
+        return self.schema.width
+
+    def vectorize(self, work_center, current_time: float, out: Optional[np.ndarray] = None) -> np.ndarray:
+        return work_center.get_feature_vector(current_time, self.schema.max_machines, out)
+
+    def vectorize_all(self, work_centers: Dict[int, object], current_time: float,
+                      out: Optional[np.ndarray] = None) -> np.ndarray:
+        """[num_wc, dim] float32 matrix, one row per WorkCenter in wc_id order"""
+        wc_ids = sorted(work_centers)
+        if out is None:
+            out = np.empty((len(wc_ids), self.dim), dtype=np.float32)
+        for i, wc_id in enumerate(wc_ids):
+            self.vectorize(work_centers[wc_id], current_time, out[i])
+        return out
+
+    def as_dict(self, row: np.ndarray) -> Dict:
+        """Legacy nested dict of a row, for logging"""
+        return self.schema.workcenter_state(row)
@@ -0,0 +1,43 @@
+"""The SimPy and event-kernel backends must complete the same jobs at the same times."""
+
+import contextlib
+import io
+
+import pytest
+
+from coordinator.backend_parity import collect_job_end_times
+from utils.tracing import configure_tracing
+
+
+def _end_times(backend, seed, mode, intervals, **kwargs):
+    configure_tracing(quiet=True)
+    with contextlib.redirect_stdout(io.StringIO()):
+        end_times, _ = collect_job_end_times(backend, seed, intervals, mode, **kwargs)
+    return end_times
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2, 3, 4, 42])
+def test_static_inference_parity(seed):
+    simpy_end = _end_times("simpy", seed, "infer", 6, rule_mode="static")
+    kernel_end = _end_times("kernel", seed, "infer", 6, rule_mode="static")
+    assert simpy_end, "no job completed; the comparison would be vacuous"
+    assert simpy_end == kernel_end
+
+
+@pytest.mark.parametrize("seed", [0, 42])
+def test_static_training_parity(seed):
+    assert _end_times("simpy", seed, "train", 3, rule_mode="static") == \
+        _end_times("kernel", seed, "train", 3, rule_mode="static")
+
+
+def test_seeded_runs_repeat():
+    first = _end_times("simpy", 0, "infer", 6, rule_mode="static")
+    assert first == _end_times("simpy", 0, "infer", 6, rule_mode="static")
+
+
+@pytest.mark.parametrize("mode, intervals", [("infer", 6), ("train", 3)])
+def test_dynamic_parity(mode, intervals):
+    # Seeding torch makes the DQN's initial weights, and so its choices, repeat
+    simpy_end = _end_times("simpy", 42, mode, intervals, rule_mode="dynamic")
+    assert simpy_end == _end_times("kernel", 42, mode, intervals, rule_mode="dynamic")
+    assert simpy_end == _end_times("simpy", 42, mode, intervals, rule_mode="dynamic")
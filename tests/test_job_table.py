@@ -0,0 +1,29 @@
+"""Job rows must hold large ids and share one table by default."""
+
+import pytest
+
+from simulation.job import Job
+from simulation.job_table import JobTable
+
+
+def test_ids_past_int8_round_trip():
+    table = JobTable()
+    routing = list(range(100, 300))
+    times = [{wc: 1.0} for wc in routing]
+    row = table.add(1, 0, routing, times)
+    assert table.routing_of(row) == routing
+    table.current_op[row] = 250
+    table.op_wc[row, 199] = 299
+    assert int(table.current_op[row]) == 250 and int(table.op_wc[row, 199]) == 299
+
+
+def test_out_of_range_ids_are_rejected():
+    with pytest.raises(ValueError):
+        JobTable().add(1, 0, [JobTable.ID_LIMIT + 1], [{1: 1.0}])
+
+
+def test_standalone_jobs_share_a_table():
+    first = Job(1, 0, [1], [{1: 2.0}])
+    second = Job(2, 0, [2], [{2: 3.0}])
+    assert first.table is second.table
+    assert (first.job_id, second.job_id) == (1, 2)
@@ -0,0 +1,23 @@
+"""Prioritized sampling must stay on filled slots with finite weights."""
+
+import numpy as np
+import torch
+
+from agent.replay_buffer import PrioritizedReplayBuffer, SumTree
+
+
+def test_find_never_returns_an_empty_leaf():
+    tree = SumTree(8)
+    tree.update(np.arange(3), np.array([0.1, 0.2, 0.3]))
+    # Mass just past the total, as rounding can produce, walks into the empty right subtree
+    leaves = tree.find(np.array([tree.total() * (1 + 1e-12)]), filled=3)
+    assert leaves.tolist() == [2]
+
+
+def test_partly_filled_buffer_gives_finite_weights():
+    buffer = PrioritizedReplayBuffer(64, 4)
+    for _ in range(5):
+        buffer.push([0.0] * 4, 0, 0.0, [0.0] * 4)
+    slots, weights = buffer.sample_prioritized(32, beta=0.4)
+    assert slots.max() < len(buffer)
+    assert torch.isfinite(weights).all()
@@ -0,0 +1,24 @@
+"""Worker failures in the vector env must surface in the parent."""
+
+import pytest
+
+from coordinator.training_coordinator import PauseResumeTrainingCoordinator
+from coordinator.vector_env import VectorShopEnv
+from utils.tracing import configure_tracing
+
+
+def test_worker_error_is_raised_in_parent():
+    configure_tracing(quiet=True)
+    trainer = PauseResumeTrainingCoordinator(num_work_centers=3, num_machines=[2, 2, 2], rule_mode="static")
+    strategies = {1: "SPT", 2: "SPT", 3: "SPT"}
+    env = VectorShopEnv(2, 0, [2, 2, 2], strategies, trainer.setup_time,
+                        trainer.processing_distributions, workers=2)
+    try:
+        env.reset()
+        with pytest.raises(RuntimeError, match="KeyError"):
+            env.step([{9: "SPT"}, strategies])
+        # The workers keep serving after reporting the error
+        _, rewards, _ = env.step([strategies, strategies])
+        assert rewards.shape == (2, 3)
+    finally:
+        env.close()
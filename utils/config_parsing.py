@@ -0,0 +1,88 @@
+"""Parsers for the layout, distribution and static rule settings.
+
+Shared by the main.py flags and the experiment scenarios; malformed values
+raise argparse.ArgumentTypeError.
+"""
+
+import argparse
+from typing import Dict, List
+
+
+def parse_machine_layout(machines_arg: str) -> List[int]:
+    try:
+        machines = [int(x) for x in machines_arg.split(',') if x.strip()]
+    except ValueError as exc:
+        raise argparse.ArgumentTypeError(
+            "--machines must be a comma separated list of integers"
+        ) from exc
+    if not machines:
+        raise argparse.ArgumentTypeError("--machines cannot be empty")
+    if any(m <= 0 for m in machines):
+        raise argparse.ArgumentTypeError("Machine counts must be positive")
+    return machines
+
+
+def parse_distributions(dist_arg: str, num_work_centers: int) -> Dict[int, Dict]:
+    """Return per-WC distribution config with sensible defaults."""
+    default = {
+        wc_id: {"type": "uniform", "low": 3.0, "high": 6.0}
+        for wc_id in range(1, num_work_centers + 1)
+    }
+    if not dist_arg:
+        return default
+
+    for item in dist_arg.split(','):
+        parts = [p.strip() for p in item.split(':') if p.strip()]
+        if len(parts) < 2:
+            raise argparse.ArgumentTypeError(
+                "Distribution entry must be 'wc:dist:param1:param2'"
+            )
+        wc_id = int(parts[0])
+        dist_type = parts[1].lower()
+        if wc_id < 1 or wc_id > num_work_centers:
+            raise argparse.ArgumentTypeError(f"Invalid workcenter id {wc_id}")
+
+        if dist_type in {"normal", "gaussian"}:
+            if len(parts) != 4:
+                raise argparse.ArgumentTypeError(
+                    "Normal distribution requires mean and std (wc:normal:mean:std)"
+                )
+            mean = float(parts[2])
+            std = float(parts[3])
+            default[wc_id] = {"type": "normal", "mean": mean, "std": std}
+        elif dist_type == "uniform":
+            if len(parts) != 4:
+                raise argparse.ArgumentTypeError(
+                    "Uniform distribution requires low and high (wc:uniform:low:high)"
+                )
+            low = float(parts[2])
+            high = float(parts[3])
+            default[wc_id] = {"type": "uniform", "low": low, "high": high}
+        elif dist_type in {"const", "constant"}:
+            if len(parts) != 3:
+                raise argparse.ArgumentTypeError(
+                    "Constant distribution requires a single value (wc:const:value)"
+                )
+            val = float(parts[2])
+            default[wc_id] = {"type": "constant", "value": val}
+        else:
+            raise argparse.ArgumentTypeError(f"Unsupported distribution '{dist_type}'")
+
+    return default
+
+
+def parse_static_rules(rule_arg: str, num_work_centers: int) -> Dict[int, str]:
+    if not rule_arg:
+        return {}
+    mapping: Dict[int, str] = {}
+    for item in rule_arg.split(','):
+        parts = [p.strip() for p in item.split(':') if p.strip()]
+        if len(parts) != 2:
+            raise argparse.ArgumentTypeError(
+                "Static rule entry must be 'wc:STRATEGY'"
+            )
+        wc_id = int(parts[0])
+        if wc_id < 1 or wc_id > num_work_centers:
+            raise argparse.ArgumentTypeError(f"Invalid workcenter id {wc_id}")
+        mapping[wc_id] = parts[1].upper()
+    return mapping
@@ -0,0 +1,142 @@
+"""Per-phase wall time, counters and peak memory of training intervals.
+
+The coordinator wraps each step of an interval in a phase and closes the
+interval with its counters:
+
+    with profiler.phase("main_sim"):
+        self.run_main_simulation_interval()
+    ...
+    profiler.end_interval({"events": env.events_processed, ...}, interval=3)
+
+Counters are passed as running totals and recorded as per-interval deltas.
+Each interval becomes one record, kept in memory, appended to an optional
+JSON-lines file and printable as a table. Phases named in profile_phases
+(or "all") additionally run under cProfile; their stats accumulate over the
+run and close() writes them to <profile_dir>/<phase>.prof.
+"""
+
+import cProfile
+import io
+import json
+import os
+import pstats
+import sys
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterable, List, Optional
+
+try:
+    import resource
+except ImportError:     # Windows
+    resource = None
+
+
+def peak_rss_mb() -> Optional[float]:
+    """Peak resident set size of this process so far, in MiB"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+class PhaseProfiler:
+    def __init__(self, log_path: Optional[str] = None, profile_phases: Iterable[str] = (),
+                 profile_dir: str = "profiles"):
+        self.log_path = log_path
+        self.profile_phases = set(profile_phases)
+        self.profile_dir = profile_dir
+        self.profiles: Dict[str, cProfile.Profile] = {}
+        self.records: List[Dict] = []
+        self.phases: Dict[str, float] = {}
+        self._last_counters: Dict[str, float] = {}
+        self._log = open(log_path, "w") if log_path else None
+
+    def _profiled(self, name: str) -> bool:
+        return "all" in self.profile_phases or name in self.profile_phases
+
+    @contextmanager
+    def phase(self, name: str):
+        profile = None
+        if self._profiled(name):
+            profile = self.profiles.get(name)
+            if profile is None:
+                profile = self.profiles[name] = cProfile.Profile()
+            profile.enable()
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            if profile is not None:
+                profile.disable()
+            self.phases[name] = self.phases.get(name, 0.0) + elapsed
+
+    def split(self, phase: str, part: str, seconds: float):
+        """Move seconds measured inside phase (e.g. gradient steps) to a phase of their own"""
+        seconds = min(seconds, self.phases.get(phase, 0.0))
+        self.phases[phase] = self.phases.get(phase, 0.0) - seconds
+        self.phases[part] = self.phases.get(part, 0.0) + seconds
+
+    def end_interval(self, counters: Dict[str, float], **fields) -> Dict:
+        """Close the current interval: record phase times, counter deltas and peak memory"""
+        deltas = {name: round(value - self._last_counters.get(name, 0), 6) for name, value in counters.items()}
+        self._last_counters = dict(counters)
+        record = dict(fields)
+        record["phases"] = {name: round(seconds, 6) for name, seconds in self.phases.items()}
+        record["total_seconds"] = round(sum(self.phases.values()), 6)
+        record["counters"] = deltas
+        record["peak_rss_mb"] = peak_rss_mb()
+        self.records.append(record)
+        if self._log is not None:
+            self._log.write(json.dumps(record) + "\n")
+            self._log.flush()
+        self.phases = {}
+        return record
+
+    @staticmethod
+    def format_record(record: Dict) -> str:
+        phases = ", ".join(f"{name} {seconds:.3f}s" for name, seconds in record["phases"].items())
+        counters = ", ".join(f"{name} {value:g}" for name, value in record["counters"].items())
+        rss = record["peak_rss_mb"]
+        return (f"{phases} (total {record['total_seconds']:.3f}s) | {counters}"
+                + (f" | peak RSS {rss:.0f} MiB" if rss is not None else ""))
+
+    def print_table(self):
+        if not self.records:
+            return
+        phases = list(dict.fromkeys(name for record in self.records for name in record["phases"]))
+        counters = list(dict.fromkeys(name for record in self.records for name in record["counters"]))
+        keys = [key for key in self.records[0] if key not in ("phases", "counters", "total_seconds", "peak_rss_mb")]
+        header = ([f"{key:>8}" for key in keys] + [f"{name[:12]:>13}" for name in phases]
+                  + [f"{'total':>9}"] + [f"{name[:12]:>13}" for name in counters] + [f"{'rss MiB':>9}"])
+        print("\n=== Interval phase timings (seconds) ===")
+        print("".join(header))
+        for record in self.records:
+            rss = record["peak_rss_mb"]
+            row = ([f"{record[key]!s:>8}" for key in keys]
+                   + [f"{record['phases'].get(name, 0.0):>13.4f}" for name in phases]
+                   + [f"{record['total_seconds']:>9.3f}"]
+                   + [f"{record['counters'].get(name, 0):>13g}" for name in counters]
+                   + [f"{rss:>9.0f}" if rss is not None else f"{'-':>9}"])
+            print("".join(row))
+        totals = {name: sum(record["phases"].get(name, 0.0) for record in self.records) for name in phases}
+        grand = sum(totals.values()) or 1.0
+        print("Share of interval time: " + ", ".join(
+            f"{name} {seconds / grand:.0%}" for name, seconds in totals.items()))
+
+    def close(self, top: int = 15):
+        """Write and summarize the cProfile stats of profiled phases, close the log"""
+        if self.profiles:
+            os.makedirs(self.profile_dir, exist_ok=True)
+        for name, profile in self.profiles.items():
+            path = os.path.join(self.profile_dir, f"{name}.prof")
+            profile.dump_stats(path)
+            out = io.StringIO()
+            pstats.Stats(profile, stream=out).sort_stats("cumulative").print_stats(top)
+            print(f"\n=== cProfile: {name} (written to {path}) ===")
+            print(out.getvalue().strip())
+        self.profiles = {}
+        if self._log is not None:
+            self._log.close()
+            self._log = None
@@ -0,0 +1,131 @@
+"""Structured trace events for the simulation, built on utils.logger.
+
+Call sites hold a per-subsystem channel and test one boolean before building
+anything, so a disabled channel costs a single attribute lookup:
+
+    _trace = get_tracer("machine")
+    ...
+    if _trace.debug:
+        _trace.emit(DEBUG, "breakdown", machine=self.machine_id, time=self.env.now)
+
+Enabled events go to an in-memory ring buffer, optionally to a JSON-lines file
+written in batches, and (at or above the echo level) to the logger.
+"""
+
+import atexit
+import json
+import logging
+from collections import deque
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from utils.logger import get_logger
+
+DEBUG = logging.DEBUG
+INFO = logging.INFO
+WARNING = logging.WARNING
+
+SUBSYSTEMS = ('machine', 'breakdown', 'kernel', 'routing', 'workcenter', 'subsim', 'reward')
+
+
+class TraceChannel:
+    """Handle for one subsystem; debug/info/warning say whether that level is on"""
+    __slots__ = ('subsystem', 'tracer', 'debug', 'info', 'warning')
+
+    def __init__(self, subsystem: str, tracer: 'Tracer'):
+        self.subsystem = subsystem
+        self.tracer = tracer
+        self.debug = self.info = self.warning = False
+
+    def emit(self, level: int, event: str, **fields):
+        self.tracer.record(self.subsystem, level, event, fields)
+
+
+class Tracer:
+    def __init__(self):
+        self.channels: Dict[str, TraceChannel] = {}
+        self.level = INFO
+        self.subsystems: Optional[set] = None     # None: every subsystem
+        self.quiet = False
+        self.echo_level = INFO
+        self.buffer: deque = deque(maxlen=10000)
+        self.batch_size = 500
+        self._file = None
+        self._pending: List[str] = []
+        self.logger = get_logger('trace')
+
+    def channel(self, subsystem: str) -> TraceChannel:
+        channel = self.channels.get(subsystem)
+        if channel is None:
+            channel = self.channels[subsystem] = TraceChannel(subsystem, self)
+            self._refresh(channel)
+        return channel
+
+    def configure(self, level: int = INFO, subsystems: Optional[Iterable[str]] = None,
+                  quiet: bool = False, echo_level: Optional[int] = None, ring_size: int = 10000,
+                  path: Optional[str] = None, batch_size: int = 500):
+        """Set the level, enabled subsystems (None for all), quiet mode and outputs
+
+        echo_level defaults to level, so everything recorded is also logged.
+        """
+        self.flush()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        self.level = level
+        self.subsystems = None if subsystems is None else set(subsystems)
+        self.quiet = quiet
+        self.echo_level = level if echo_level is None else echo_level
+        self.logger.setLevel(self.echo_level)
+        self.buffer = deque(self.buffer, maxlen=ring_size)
+        self.batch_size = max(1, batch_size)
+        if path:
+            self._file = open(path, 'a', encoding='utf-8')
+        for channel in self.channels.values():
+            self._refresh(channel)
+
+    def _refresh(self, channel: TraceChannel):
+        on = not self.quiet and (self.subsystems is None or channel.subsystem in self.subsystems)
+        channel.debug = on and self.level <= DEBUG
+        channel.info = on and self.level <= INFO
+        channel.warning = on and self.level <= WARNING
+
+    def record(self, subsystem: str, level: int, event: str, fields: Dict):
+        if self.quiet or level < self.level:
+            return
+        entry = (subsystem, level, event, fields)
+        self.buffer.append(entry)
+        if self._file is not None:
+            self._pending.append(json.dumps({
+                'subsystem': subsystem, 'level': logging.getLevelName(level),
+                'event': event, **fields}, default=str))
+            if len(self._pending) >= self.batch_size:
+                self.flush()
+        if level >= self.echo_level:
+            detail = " ".join(f"{key}={value}" for key, value in fields.items())
+            self.logger.log(level, f"[{subsystem}] {event} {detail}".rstrip())
+
+    def recent(self, subsystem: Optional[str] = None) -> List[Tuple]:
+        return [e for e in self.buffer if subsystem is None or e[0] == subsystem]
+
+    def flush(self):
+        if self._file is not None and self._pending:
+            self._file.write("\n".join(self._pending) + "\n")
+            self._file.flush()
+        self._pending = []
+
+
+_TRACER = Tracer()
+atexit.register(_TRACER.flush)
+
+
+def get_tracer(subsystem: str) -> TraceChannel:
+    return _TRACER.channel(subsystem)
+
+
+def configure_tracing(**kwargs):
+    _TRACER.configure(**kwargs)
+
+
+def trace_buffer(subsystem: Optional[str] = None) -> List[Tuple]:
+    """Recent (subsystem, level, event, fields) entries from the ring buffer"""
+    return _TRACER.recent(subsystem)